@@ -10,7 +10,57 @@ Developed by: Udey Rishi, 2014
 """
 
 from truth_tables import *
-import copy, math
+from covering import *
+from cubes import *
+from espresso import *
+from exact4 import *
+from npn import *
+from diskcache import *
+from qm import *
+from checkpoint import *
+from planner import *
+from memory import *
+from esop import *
+from spectral import *
+import concurrent.futures, copy, math, random, weakref
+
+# Biggest # of minterms for which the prime chart is solved exactly when
+# minimising a BF stored as a cover
+CHART_LIMIT = 4096
+
+# Limits on the iterated consensus used when minimising a BF stored as a
+# cover: the # of primes, and the time in seconds
+CONSENSUS_LIMIT = 2000
+CONSENSUS_TIME = 10
+
+# Biggest # of variables for which Q-M is used when the consensus gives up
+QM_LIMIT = 14
+
+# The # of cofactors (as a power of 2) the function is split into by
+# min_sop(method = 'parallel') before finding the primes; 0 for no split
+SHANNON_SPLIT = 0
+
+# Biggest # of variables for which npn_canonical works (the packed tt has
+# 2^n bits)
+NPN_LIMIT = 16
+
+# min_sop results are shared by all the functions of an NPN class (see npn.py)
+# up to NPN_CACHE_VARS variables. Finding the class takes at most
+# NPN_SEARCH_LIMIT candidates; if it needs more, the function isn't shared
+NPN_CACHE_VARS = 10
+NPN_SEARCH_LIMIT = 5000
+
+# Biggest # of rows whose value BF.edit changes while still updating the
+# primes and the minimum cover of the BF; a bigger edit is minimised from
+# scratch
+EDIT_LIMIT = 64
+
+# The most seconds min_esop spends improving the ESOP (see esop.exorcism)
+ESOP_TIME = 10
+
+# The minimum covers found so far, by (# of variables, canonical table, output
+# negated). The cubes are over the positions of the canonical table
+_npn_results = {}
 
 class InvalidBooleanFunctionError(Exception):
     """
@@ -18,6 +68,44 @@ class InvalidBooleanFunctionError(Exception):
     """
     pass
 
+# The persistent cache of results (see diskcache.py and use_disk_cache), or
+# None if it isn't used
+_disk_cache = None
+
+# Picks the engines of the BF operations, and logs its decisions (see
+# planner.py and planner())
+_planner = Planner()
+
+# The memory the BF operations may take (see memory.py and memory_budget())
+_memory = MemoryBudget()
+
+# The # of rows iter_truthtable makes at a time, as a power of 2
+CHUNK_VARS = 16
+
+# Biggest # of variables for which BFs are interned (see BF._intern); the key
+# is the packed tt, which has 2^n bits
+INTERN_VARS = 10
+
+# The interned _Shared objects by (variables, packed tt, packed don't cares).
+# Weak, so an entry goes away with the last BF using it
+_interned = weakref.WeakValueDictionary()
+
+class _Shared:
+    """
+    The parts of a BF that depend only on the function (not on its name or
+    expression): the tt and the cached results. BFs of the same function
+    share one (see BF._intern), so a result computed for one of them is
+    there for all.
+    """
+    pass
+
+def _shared(field):
+    """
+    Returns a property storing the given BF attribute in its _Shared object.
+    """
+    return property(lambda self: getattr(self._shared, field), \
+                    lambda self, value: setattr(self._shared, field, value))
+
 class BF:
     """
     The BF class. Stores the details of a BF and provides numerous methods to do
@@ -43,7 +131,29 @@ class BF:
     details, see strings.py.   
     """
 
+    # Stored in self._shared, see _Shared
+    _table = _shared('_table')
+    _minterms = _shared('_minterms')
+    _maxterms = _shared('_maxterms')
+    _min_exp = _shared('_min_exp')
+    _max_exp = _shared('_max_exp')
+    _min_sop = _shared('_min_sop')
+    _min_sop_optimal = _shared('_min_sop_optimal')
+    _off = _shared('_off')
+    _min_espresso = _shared('_min_espresso')
+    _min_esop = _shared('_min_esop')
+    _npn = _shared('_npn')
+    _hash = _shared('_hash')
+    _walsh = _shared('_walsh')
+    _autocorrelation = _shared('_autocorrelation')
+    _primes = _shared('_primes')
+    _seed = _shared('_seed')
+
     def __init__(self, function, name = 'f'):
+        self._shared = _Shared()
+
+        # The don't care clause, d(...), is handled separately
+        function, dc = split_dc(function)
 
         # Converts the function to its proper version using the best estimation
         function = proper(function, name)
@@ -51,22 +161,221 @@ class BF:
         # After appropriate name is set up, store this name as an attribute
         self._name = find_name(function)
 
-        # Parsing out the list of variables and expression, and creating the
-        # truth table (tt) from the proper function
-        variables, table, expression = make_table(function)
+        # Parsing out the list of variables and expression
+        variables, expression = parse(function)
+        expression = expression.replace('^', '%')
         if expression.strip() == '':
             raise InvalidBooleanFunctionError("No expression given!")
 
+        # Expressions using only +, * and ~ are stored as a cube cover (see
+        # cubes.py), which is much smaller than the truth table for most 
+        # functions. The truth table (tt) is then made only when needed.
+        # The cover uses the same variable order as the tt would
+        self._cover = expression_cover(expression, variables)
+        self._function = function
+
         variables.sort()
 
-        # Reading out the minterms and maxterms from the tt
+        # Store the vars and the expression as attributes of the BF
+        self._expression = expression
+        self._variables = variables
+        self._table = None
+        self._dc = None if dc is None else self._parse_dc(dc)
+
+        if self._cover is None:
+            # Creating the truth table from the proper function
+            self._materialise()
+
+        self._clear_cache()
+        self._intern()
+
+    def _parse_dc(self, dc):
+        """
+        Helper method for the constructor. Returns the cover of the don't
+        cares given in a d(...) clause: a list of minterms, or an expression
+        over the variables of the BF.
+        """
+        n = len(self._variables)
+        if dc.replace(",", " ").replace(" ", "").isdigit():
+            minterms = [int(i) for i in dc.replace(",", " ").split()]
+            if max(minterms) >= 2 ** n:
+                raise InvalidBooleanFunctionError("Don't care %d is out of "
+                                                  "range" %max(minterms))
+            return Cover.from_minterms(minterms, n)
+
+        cover = expression_cover(dc, self._variables)
+        if cover is None:
+            # Needs the tt of the expression
+            dc = BF("dc(%s) = %s" %(self._varstring(), dc))
+            if dc.variables() != self._variables:
+                raise InvalidBooleanFunctionError("The don't cares use "
+                                                  "unknown variables")
+            cover = dc.cover()
+        return cover
+
+    @staticmethod
+    def from_minterms(minterms, variables, dcs = (), name = 'f'):
+        """
+        Creates a BF from the lists of minterms and don't cares over the
+        (sorted) variables. See from_cover.
+
+        >>> f = BF.from_minterms([1, 2], ['a', 'b'], [3])
+        >>> f.minterms(), f.maxterms(), f.dont_cares()
+        ([1, 2], [0], [3])
+        >>> f.min_sop().expression() in ['a + b', 'b + a']
+        True
+        """
+        n = len(variables)
+        if any(i >= 2 ** n for i in list(minterms) + list(dcs)):
+            raise InvalidBooleanFunctionError("Minterm out of range")
+        dc = Cover.from_minterms(dcs, n) if dcs else None
+        return BF.from_cover(Cover.from_minterms(minterms, n), variables, \
+                             name, dc)
+
+    @staticmethod
+    def from_cover(cover, variables, name = 'f', dc = None):
+        """
+        Creates a BF straight from a cube cover (see cubes.py), without making
+        or parsing an expression string. The ith variable is the ith character
+        of the PI strings, so the variables must be in the sorted order, as in
+        every BF. The expression is formed only when it is asked for. dc is
+        the (optional) cover of the don't cares.
+
+        >>> f = BF.from_cover(Cover.from_strings(['10'], 2), ['a', 'b'])
+        >>> f
+        f(a, b) = a*~b
+        >>> f.minterms()
+        [2]
+        """
+        if list(variables) != sorted(variables) or \
+           len(set(variables)) != len(variables):
+            raise InvalidBooleanFunctionError("The variables must be distinct "
+                                              "and sorted")
+        if cover.num_vars() != len(variables):
+            raise InvalidBooleanFunctionError("The cover has %d variables, "
+                                              "%d were given" \
+                                              %(cover.num_vars(), len(variables)))
+        rv = BF.__new__(BF)
+        rv._shared = _Shared()
+        rv._name = name
+        rv._cover = cover
+        rv._function = None
+        rv._expression = None # Formed by expression()
+        rv._variables = list(variables)
+        rv._table = None
+        rv._dc = dc if dc is not None and len(dc) else None
+        rv._clear_cache()
+        rv._intern()
+        return rv
+
+    def _clear_cache(self):
+        """
+        Helper method that empties the cached simplified expressions. These
+        are filled the first time the appropriate methods are called.
+        """
+        self._min_exp = None
+        self._max_exp = None
+        self._min_sop = None
+        self._off = None # The BF of the off-set, see _off_set
+        self._min_espresso = None
+        self._min_esop = None
+        self._npn = None # (canonical table, transform), see npn_canonical
+        self._hash = None
+        self._walsh = None # See walsh_spectrum
+        self._autocorrelation = None
+
+        # All the primes (cubes, don't cares included) once they are found,
+        # and a cover of primes to start the chart search from (see edit)
+        self._primes = None
+        self._seed = None
+
+        # False if the cached min_sop isn't proven to be the minimum
+        self._min_sop_optimal = True
+
+        # For BFs returned by the minimisation methods: False if this BF
+        # isn't proven to be the minimum form
+        self._optimal = True
+
+    def _intern(self):
+        """
+        Helper method for the constructors. If a BF of the same function over
+        the same variables (and with the same don't cares) exists, this BF
+        shares its tt and cached results instead of keeping its own. Only
+        done up to INTERN_VARS variables.
+
+        >>> f = BF("f(a,b) = a*b + a*~b")
+        >>> BF("g(a,b) = a + a*b")._shared is f._shared
+        True
+        >>> BF("g(a,b,c) = a")._shared is f._shared
+        False
+        >>> g = BF("g(a,b) = a + d(a*b)")
+        >>> BF("h(a,b) = a*~b + d(a*b)")._shared is g._shared
+        True
+        """
+        if len(self._variables) > INTERN_VARS: return
+        dc = 0
+        for i in self.dont_cares(): dc |= 1 << i
+        key = (tuple(self._variables), self.packed(), dc)
+
+        shared = _interned.get(key)
+        if shared is None:
+            _interned[key] = self._shared
+        elif shared is not self._shared:
+            if shared._table is None and self._table is not None:
+                # Keeping the tt made by this BF
+                shared._table = self._table
+                shared._minterms = self._minterms
+                shared._maxterms = self._maxterms
+                _memory.hold(shared, table_bytes(len(self._variables)))
+            self._shared = shared
+
+    def _materialise(self):
+        """
+        Helper method that creates the truth table, and the minterms and 
+        maxterms from it, if they aren't created yet. Every method needing them
+        should call this first. Raises MemoryBudgetError if the tt doesn't fit
+        in the memory budget (see memory_budget).
+        """
+        if self._table is not None: return
+        n = len(self._variables)
+        _memory.check(table_bytes(n), "The truth table of %s" %self._name)
+
+        if self._cover is None:
+            # Parsing the expression for every row is slow, so the tt may be
+            # in the disk cache
+            packed = self._disk_get("table", self._variables, self._expression)
+            if packed is None:
+                variables, table, expression = make_table(self._function)
+                if _disk_cache is not None:
+                    packed = sum(1 << int(i, 2) for i in table if table[i])
+                    _disk_cache.put("table", "%x" %packed, self._variables, \
+                                    self._expression)
+            else:
+                packed = int(packed, 16)
+                table = {}
+                for i in range(2 ** n):
+                    table[bin_conv(i, n)] = bool(packed >> i & 1)
+        else:
+            # Filling the tt from the minterms of the cover
+            n = self._cover.num_vars()
+            table = {}
+            for i in range(2 ** n):
+                table[bin_conv(i, n)] = False
+            for i in self._cover.minterms():
+                table[bin_conv(i, n)] = True
+
+        # Reading out the minterms and maxterms from the tt. The don't cares
+        # are neither
         minterms = [i for i in table if table[i]]
         maxterms = [i for i in table if not table[i]]
+        if self._dc is not None:
+            n = len(self._variables)
+            dcs = set(bin_conv(i, n) for i in self._dc.minterms())
+            minterms = [i for i in minterms if i not in dcs]
+            maxterms = [i for i in maxterms if i not in dcs]
 
-        # Store the vars, TT, and the expression as attributes of the BF
-        self._expression = expression
-        self._variables = variables
         self._table = table
+        _memory.hold(self._shared, table_bytes(n))
 
         # Storing minterms hashed with the number of 1s, and maxterms hashed 
         # with the number of 0s
@@ -98,29 +407,134 @@ class BF:
             maxterms2.append(int(i, 2))
 
         for i in maxterms2:
-            if find_zeros(i, len(variables)) in self._maxterms:
-                self._maxterms[find_zeros(i, len(variables))].append(i)
+            if find_zeros(i, len(self._variables)) in self._maxterms:
+                self._maxterms[find_zeros(i, len(self._variables))].append(i)
             else:
-                self._maxterms[find_zeros(i, len(variables))] = [i]
+                self._maxterms[find_zeros(i, len(self._variables))] = [i]
 
+    def is_optimal(self):
+        """
+        Returns False if this BF was returned by a minimisation method that
+        couldn't prove its result to be the minimum (e.g. it ran out of its
+        search budget, or used a heuristic). True otherwise.
+        """
+        return self._optimal
 
-        # Storing simplified expressions as a cache. This will be filled the
-        # first time the appropriate methods are called
-        self._min_exp = None
-        self._max_exp = None
-        self._min_sop = None
-        self._min_pos = None
+    def cover(self):
+        """
+        Returns the cube cover of the BF, creating it from the minterms if the
+        BF is stored as a truth table.
+        """
+        if self._cover is None:
+            self._cover = Cover.from_minterms(self.minterms(), \
+                                              len(self._variables))
+        return self._cover
+
+    def dc_cover(self):
+        """
+        Returns the cube cover of the don't cares (empty if there are none).
+        """
+        if self._dc is None: return Cover([], len(self._variables))
+        return self._dc
+
+    def dont_cares(self):
+        """
+        Returns a sorted list of the don't cares.
+        """
+        if self._dc is None: return []
+        return self._dc.minterms()
+
+    def iter_prime_implicants(self):
+        """
+        Yields the prime implicants of the BF as (cube, # of minterms it
+        covers), as soon as Q-M proves them prime (see qm.iter_primes), so
+        they can be used while the rest are being found. The cubes are ints
+        (see cubes.py; cube_to_string(cube, # of variables) makes a PI string
+        of them). The don't cares can be part of a PI, but aren't counted;
+        the PIs made of don't cares only aren't yielded.
+
+        >>> f = BF("f(a,b,c) = a*b + c")
+        >>> [(cube_to_string(i, 3), k) for i, k in f.iter_prime_implicants()]
+        [('11-', 2), ('--1', 4)]
+        """
+        n = len(self._variables)
+        minterms = self._cover.minterms() if self._table is None else \
+                   self.minterms()
+        return iter_primes(minterms, self.dont_cares(), n)
+
+    def _dc_clause(self):
+        """
+        Helper method that returns the don't care clause for the proper form
+        of the BF (e.g. " + d(~a*b)"), or "" if there are no don't cares.
+        """
+        if self._dc is None: return ""
+        strings = self._dc.strings()
+        return " + d(%s)" %form_function(strings, self._variables)
+
+    def cover_over(self, variables):
+        """
+        Returns the cube cover of the BF over the given (sorted) variables,
+        which must include all the variables of the BF. The others are absent
+        in every cube.
+
+        >>> BF("f = a*~c").cover_over(['a', 'b', 'c'])
+        Cover(['1-0'])
+        """
+        return self._widen(self.cover(), variables)
+
+    def _widen(self, cover, variables):
+        """
+        Helper method that moves a cover over the variables of the BF to the
+        given (sorted) variables. See cover_over.
+        """
+        if variables == self._variables: return cover
+        if not set(self._variables) <= set(variables):
+            raise InvalidBooleanFunctionError("%s isn't over the variables %s" \
+                                              %(self._name, variables))
+        columns = [variables.index(var) for var in self._variables]
+        m, n = len(self._variables), len(variables)
+        return Cover([widen(cube, columns, m, n) for cube in cover], n)
 
     def expression(self):
         """
         Returns the BF expression. 
         """
+        if self._expression is None:
+            # Made from a cover (see from_cover)
+            strings = self._cover.strings()
+            self._expression = form_function(strings, self._variables) \
+                               if strings else "0"
         return self._expression
 
-    def minterms(self):
+    def minterms(self, engine = None):
+        """
+        Returns a sorted list of the minterms. Read from the tt, or listed
+        from the cubes of the cover (without making the tt), whichever the
+        planner (see planner.py) estimates cheaper, unless the engine
+        ("table" or "cover") is given.
+
+        >>> f = BF.from_cover(Cover.from_strings(['1-', '-1'], 2), ['a', 'b'])
+        >>> f.minterms(), f._table is None
+        ([1, 2, 3], True)
+        >>> f.minterms("table"), f._table is None
+        ([1, 2, 3], False)
         """
-        Returns a sorted list of the minterms.
+        stats = self._stats()
+        engine = self._plan("minterms", minterms_costs(stats), engine)
+        if engine == "cover":
+            # The minterms of every cube are gathered in a set first
+            _memory.check(2 * terms_bytes(stats["volume"] + \
+                                          stats["dc_volume"]), \
+                          "The minterms of %s" %self._name)
+            dcs = set(self.dont_cares())
+            return [i for i in self._cover.minterms() if i not in dcs]
+        return self._table_minterms()
+
+    def _table_minterms(self):
         """
+        Helper method that returns a sorted list of the minterms, from the tt.
+        """
+        self._materialise()
         rv = []
         for i in self._minterms.values():
             rv += i 
@@ -132,12 +546,14 @@ class BF:
         Returns a long version of the minterms, mapping the # of 1's in it to
         the actual minterm.
         """
+        self._materialise()
         return copy.deepcopy(self._minterms) # Dicts are mutable
 
     def maxterms(self):
         """
         Returns a sorted list of the maxterms.
         """
+        self._materialise()
         rv = []
         for i in self._maxterms.values():
             rv += i 
@@ -149,8 +565,76 @@ class BF:
         Returns a long version of the maxterms, mapping the # of 0's in it to
         the actual minterm.
         """ 
+        self._materialise()
         return copy.deepcopy(self._maxterms) # Dicts are mutable
 
+    def count(self, engine = None):
+        """
+        Returns the # of minterms (the don't cares aren't counted). Counted
+        in the tt, in the packed tt, or on the cover without listing the
+        minterms (see Cover.count), whichever the planner estimates cheaper,
+        unless the engine ("table", "packed" or "cover") is given.
+
+        >>> f = BF("f(a,b,c) = a*b + c + d(~a*~b*~c)")
+        >>> f.count(), f.count("cover"), f.count("packed"), f.count("table")
+        (5, 5, 5, 5)
+        """
+        engine = self._plan("count", count_costs(self._stats()), engine)
+        if engine == "cover":
+            cover = self.cover()
+            if self._dc is not None: cover = cover.sharp(self._dc)
+            return cover.count()
+        if engine == "packed":
+            packed = self.packed()
+            for i in self.dont_cares(): packed &= ~(1 << i)
+            return bin(packed).count("1")
+        self._materialise()
+        return sum(len(i) for i in self._minterms.values())
+
+    def _stats(self):
+        """
+        Helper method that returns what the planner estimates the costs of
+        the engines from (see planner.py): the # of variables, the # of
+        cubes of the cover and of the don't cares (None/0 if there are none)
+        and the # of minterms in them, the length of the expression, the #
+        of ones, if the tt, the min_sop result and the primes are cached, and
+        the memory the operation may take (None for no limit).
+        """
+        n = len(self._variables)
+        volume = dc_volume = None
+        if self._cover is not None:
+            volume = sum(2 ** (n - literals(i, n)) for i in self._cover)
+        dc_volume = 0
+        if self._dc is not None:
+            dc_volume = sum(2 ** (n - literals(i, n)) for i in self._dc)
+
+        if self._table is not None:
+            ones = sum(len(i) for i in self._minterms.values())
+        elif volume is not None: ones = min(volume, 2 ** n)
+        else: ones = 2 ** n // 2 # A guess
+
+        # A cover's expression is made from its cubes when asked for
+        if self._expression is not None: chars = len(self._expression)
+        else: chars = 3 * n * len(self._cover)
+
+        return {"n" : n, "cubes" : None if self._cover is None else \
+                len(self._cover), "volume" : volume, "dcs" : 0 if self._dc \
+                is None else len(self._dc), "dc_volume" : dc_volume, "ones" : \
+                ones, "chars" : chars, "table" : self._table is not None, \
+                "min_sop" : bool(self._min_sop), "primes" : self._primes \
+                is not None, "memory" : _memory.available()}
+
+    def _plan(self, op, costs, engine = None, others = ()):
+        """
+        Helper method that returns the engine the planner picks for op (see
+        planner.py), on this BF and the others.
+        """
+        names = (self._name,) + tuple(i._name for i in others)
+        try:
+            return _planner.choose(op, costs, engine, names)
+        except PlanError as error:
+            raise InvalidBooleanFunctionError(str(error))
+
     def variables(self):
         """
         Returns a copy of the variables in the BF.
@@ -170,10 +654,156 @@ class BF:
 
     def truthtable(self):
         """
-        Returns the BF's tt.
+        Returns the BF's tt. See iter_truthtable for BFs whose tt doesn't fit
+        in the memory budget.
         """
+        self._materialise()
+        _memory.check(table_bytes(len(self._variables)), \
+                      "A copy of the truth table of %s" %self._name)
         return copy.deepcopy(self._table)
 
+    def iter_truthtable(self):
+        """
+        Yields the rows of the tt as (bit-string, value), in order. A BF
+        stored as a cover doesn't make its tt: the rows are made 2^CHUNK_VARS
+        at a time from the cubes (see Cover.packed), so any BF can be listed
+        within the memory budget.
+
+        >>> f = BF.from_cover(Cover.from_strings(['1-'], 2), ['a', 'b'])
+        >>> list(f.iter_truthtable()), f._table is None
+        ([('00', False), ('01', False), ('10', True), ('11', True)], True)
+        """
+        n = len(self._variables)
+        if self._table is not None:
+            for i in range(2 ** n):
+                row = bin_conv(i, n)
+                yield row, self._table[row]
+            return
+
+        low = min(n, CHUNK_VARS)
+        for high in range(2 ** (n - low)):
+            packed = self._cover.packed(low, high)
+            for i in range(2 ** low):
+                yield bin_conv(high << low | i, n), bool(packed >> i & 1)
+
+    def packed(self):
+        """
+        Returns the packed tt of the BF: an int whose ith bit is the value at
+        the minterm i. The don't cares are 0.
+
+        >>> bin(BF("f(a,b) = a*~b").packed())
+        '0b100'
+        >>> f = BF("f(a,b) = a + d(a*b)")
+        >>> bin(f.packed()), f._table is None
+        ('0b100', True)
+        """
+        if self._table is None:
+            _memory.check(packed_bytes(len(self._variables)), \
+                          "The packed truth table of %s" %self._name)
+            # The cover may overlap the don't cares
+            rv = self._cover.packed()
+            if self._dc is not None: rv &= ~self._dc.packed()
+            return rv
+        rv = 0
+        for i in self._table_minterms(): rv |= 1 << i
+        return rv
+
+    def npn_canonical(self, limit = None):
+        """
+        Returns (canonical tt, transform): the canonical packed tt of the NPN
+        class of the BF (see npn.py), and the transform making it from the
+        packed tt of the BF. The don't cares are treated as 0s.
+
+        Two BFs with the same # of variables are the same up to permuting and
+        negating the inputs and negating the output iff they have the same
+        canonical tt. Returns None if more than limit candidates would have
+        to be tried.
+
+        >>> f = BF("f(a,b,c) = a*~b + c")
+        >>> g = BF("g(a,b,c) = ~c*b + ~a")
+        >>> f.npn_canonical()[0] == g.npn_canonical()[0]
+        True
+        >>> table, npn = f.npn_canonical()
+        >>> transform(f.packed(), 3, npn) == table
+        True
+        """
+        if self._npn is None:
+            n = len(self._variables)
+            if n > NPN_LIMIT:
+                raise InvalidBooleanFunctionError("%s has more than %d " \
+                      "variables" %(self._name, NPN_LIMIT))
+            self._npn = canonical(self.packed(), n, limit)
+        return self._npn
+
+    def walsh_spectrum(self):
+        """
+        Returns the Walsh spectrum of the BF (see spectral.py): the list of
+        its 2^n Walsh coefficients, indexed like the minterms (W[0b100] is
+        the one of the first of 3 variables). Found by the fast
+        Walsh-Hadamard transform of the packed tt, in O(n*2^n), and cached.
+        The don't cares are treated as 0s.
+
+        >>> BF("f(a,b) = a*b").walsh_spectrum()
+        [2, 2, 2, -2]
+        >>> BF("f(a,b) = a + d(a*b)").walsh_spectrum()
+        [2, -2, 2, 2]
+        """
+        if self._walsh is None:
+            n = len(self._variables)
+            # The (-1)^f column, and the coefficients
+            _memory.check(2 * terms_bytes(2 ** n), \
+                          "The Walsh spectrum of %s" %self._name)
+            self._walsh = walsh_spectrum(self.packed(), n)
+        return list(self._walsh) # Lists are mutable
+
+    def influence(self):
+        """
+        Returns the influence of every variable of the BF (a dictionary): the
+        fraction of the rows where flipping the variable flips the value,
+        read from the Walsh spectrum. Their sum is the average sensitivity
+        of the BF.
+
+        >>> BF("f(a,b,c) = a*b + c").influence()
+        {'a': 0.25, 'b': 0.25, 'c': 0.75}
+        >>> BF("f(a,b) = a + d(a*b)").influence()
+        {'a': 0.5, 'b': 0.5}
+        """
+        n = len(self._variables)
+        self.walsh_spectrum()
+        by_position = influences(self._walsh, n)
+        return {self._variables[i] : by_position[n - 1 - i] for i in \
+                range(n)}
+
+    def autocorrelation(self):
+        """
+        Returns the autocorrelation of the BF: the list of the r(d) = sum
+        over all the x of (-1)^(f(x) % f(x ^ d)), for all the d (indexed like
+        the minterms). Found from the Walsh spectrum by a second transform,
+        and cached.
+
+        >>> BF("f(a,b) = a % b").autocorrelation()
+        [4, -4, -4, 4]
+        """
+        if self._autocorrelation is None:
+            self.walsh_spectrum()
+            self._autocorrelation = autocorrelation(self._walsh, \
+                                                    len(self._variables))
+        return list(self._autocorrelation) # Lists are mutable
+
+    def correlation_immunity(self):
+        """
+        Returns the order of correlation immunity of the BF: the biggest m
+        such that the value is independent of any m of the variables taken
+        together (their Walsh coefficients are 0).
+
+        >>> BF("f(a,b,c) = a % b % c").correlation_immunity()
+        2
+        >>> BF("f(a,b,c) = a*b + c").correlation_immunity()
+        0
+        """
+        self.walsh_spectrum()
+        return correlation_immunity(self._walsh, len(self._variables))
+
     def name(self):
         """
         Returns the name of the BF.
@@ -187,129 +817,239 @@ class BF:
         NOT the same as just calling the BF instance, as that returns another BF
         object, not a string. 
         """
-        return ("%s(%s) = %s" %(self._name, self._varstring(), self.expression()))       
+        return ("%s(%s) = %s%s" %(self._name, self._varstring(), \
+                                   self.expression(), self._dc_clause()))
 
     # The following two are just used for making object interaction user firendly
     def __str__(self):
-        return ("%s(%s) = %s" %(self._name, self._varstring(), self.expression()))
+        return self._print()
 
     def __repr__(self):
-        return ("%s(%s) = %s" %(self._name, self._varstring(), self.expression()))
+        return self._print()
 
     
     def __eq__(self, func):
         """
-        Equates the 2 BFs
+        Equates the 2 BFs (see equals).
+
+        >>> f = BF("f(a,b,c) = a*b + ~a*c + b*c")
+        >>> f.min_sop() == f
+        True
+        >>> f._table is None
+        True
+        """
+        return self.equals(func)
+
+    def equals(self, func, engine = None):
+        """
+        Equates the 2 BFs, with the engine the planner (see planner.py)
+        estimates cheapest, unless it is given:
+        - "cover": checks the containment of the covers both ways (see
+          Cover.equivalent), so no truth table is made.
+        - "packed": compares the packed tts, made from the covers if there
+          is no tt.
+        - "table": compares the truth tables.
+        BFs with don't cares are equal if the don't cares are the same, and
+        the functions are the same everywhere else.
+
+        >>> f = BF("f(a,b,c) = a*b + ~a*c + b*c")
+        >>> g = BF("g(a,b,c) = a*b + ~a*c")
+        >>> [f.equals(g, i) for i in ["cover", "packed", "table"]]
+        [True, True, True]
         """
         try:
-            return self.truthtable() == func.truthtable()
+            if self._shared is func._shared:
+                # Interned as the same function (see _intern)
+                return True
+            if len(self._variables) != len(func._variables): return False
+            engine = self._plan("eq", eq_costs(self._stats(), \
+                                func._stats()), engine, [func])
         except AttributeError:
             raise InvalidBooleanFunctionError("Object isn't a Boolean Function!")
 
-    
+        if engine == "cover":
+            if self._dc is not None or func._dc is not None:
+                dc = self.dc_cover()
+                if not dc.equivalent(func.dc_cover()): return False
+                return self.cover().union(dc).equivalent(func.cover().union(dc))
+            return self.cover().equivalent(func.cover())
+
+        if engine == "packed":
+            dc = self.dont_cares()
+            if dc != func.dont_cares(): return False
+            mask = 0
+            for i in dc: mask |= 1 << i
+            return self.packed() | mask == func.packed() | mask
+
+        if self._dc is not None or func._dc is not None:
+            return self.dont_cares() == func.dont_cares() and \
+                   self._table_minterms() == func._table_minterms()
+        return self.truthtable() == func.truthtable()
+
+    def __hash__(self):
+        """
+        Hashes the BF consistently with __eq__: equal BFs (same # of
+        variables, same function outside the don't cares, same don't cares)
+        have the same hash, whatever their names and expressions are.
+
+        Up to INTERN_VARS variables, the hash is made from the packed tt.
+        Bigger BFs are hashed by their values at 64 fixed minterms.
+
+        >>> hash(BF("f(a,b) = a")) == hash(BF("g(x,y) = x*y + x*~y"))
+        True
+        >>> len({BF("f = a*b"), BF("g = b*a"), BF("h = a + b")})
+        2
+        """
+        if self._hash is None:
+            n = len(self._variables)
+            dc = self.dc_cover()
+            if n <= INTERN_VARS:
+                packed_dc = 0
+                for i in dc.minterms(): packed_dc |= 1 << i
+                self._hash = hash((n, self.packed() | packed_dc, packed_dc))
+            else:
+                # The same minterms for every BF of n variables
+                sample = random.Random(n)
+                values = []
+                cover = self.cover()
+                for i in range(64):
+                    cube = minterm_cube(sample.getrandbits(n), n)
+                    in_dc = any(contains(c, cube) for c in dc)
+                    values.append((in_dc or \
+                                   any(contains(c, cube) for c in cover), in_dc))
+                self._hash = hash((n, tuple(values)))
+        return self._hash
+
     # Operators to combine boolean functions:
-    
-    def __add__(self, other):
+
+    # The expression and the name of the result of every operator
+    _operators = {"or" : ("(%s) + (%s)", "%s_OR_%s"),
+                  "and" : ("(%s) * (%s)", "%s_AND_%s"),
+                  "xor" : ("(%s) %% (%s)", "%s_XOR_%s"),
+                  "nor" : ("(%s) - (%s)", "%s_NOR_%s"),
+                  "nand" : ("(%s) | (%s)", "%s_NAND_%s"),
+                  "not" : ("~(%s)", "%s_NOT")}
+
+    def _combine(self, op, other = None, engine = None):
         """
-        Finds the OR of the BFs
+        Helper method for the operators. Returns the BF of op ("or", "and",
+        "xor", "nor", "nand", or "not" without other) on this BF and the
+        other, over the variables of both. The don't cares are dropped. The
+        engine is the one the planner (see planner.py) estimates cheapest,
+        unless it is given:
+        - "expression": parses the expressions joined by the operator.
+        - "cover": the cube algebra on the covers (union, intersection,
+          complement), so no truth table is made.
+        - "packed": bitwise operations on the packed tts.
+
+        >>> f, g = BF("f(a,b) = a*~b"), BF("g(b,c) = b + c")
+        >>> [f._combine("xor", g, i).minterms() for i in ["expression", \
+                                                            "cover", "packed"]]
+        [[1, 2, 3, 4, 6, 7], [1, 2, 3, 4, 6, 7], [1, 2, 3, 4, 6, 7]]
         """
+        pattern, naming = BF._operators[op]
+        operands = [self] if other is None else [self, other]
         try:
-            return BF("(%s) + (%s)" %(self.expression(), other.expression()), \
-                      "%s_OR_%s" %(self.name(), other.name()))
-
+            variables = sorted(set(i for bf in operands for i in bf._variables))
+            names = tuple(bf.name() for bf in operands)
+            stats = [bf._stats() for bf in operands] + [None]
         except AttributeError:
             raise InvalidBooleanFunctionError("The object is not a Boolean Function")
+        engine = self._plan(op, op_costs(op, stats[0], stats[1], \
+                                         len(variables)), engine, operands[1:])
+
+        if engine == "expression":
+            return BF(pattern %tuple(bf.expression() for bf in operands), \
+                      naming %names)
+
+        n = len(variables)
+        if engine == "cover":
+            covers = [bf.cover_over(variables) for bf in operands]
+            a = covers[0]
+            if op == "not": cover = a.complement()
+            else:
+                b = covers[1]
+                if op == "xor":
+                    cover = a.intersect(b.complement()).union( \
+                            a.complement().intersect(b))
+                elif op in ["or", "nor"]: cover = a.union(b)
+                else: cover = a.intersect(b)
+                if op in ["nor", "nand"]: cover = cover.complement()
+            return BF.from_cover(cover, variables, naming %names)
+
+        tables = []
+        for bf in operands:
+            if bf._variables == variables: tables.append(bf.packed())
+            else:
+                packed = 0
+                for i in bf.cover_over(variables).minterms(): packed |= 1 << i
+                tables.append(packed)
+        full = (1 << 2 ** n) - 1
+        a = tables[0]
+        if op == "not": table = ~a
+        else:
+            b = tables[1]
+            if op == "xor": table = a ^ b
+            elif op in ["or", "nor"]: table = a | b
+            else: table = a & b
+            if op in ["nor", "nand"]: table = ~table
+        table &= full
+        return BF.from_minterms([i for i in range(2 ** n) if table >> i & 1], \
+                                variables, name = naming %names)
+
+    def __add__(self, other):
+        """
+        Finds the OR of the BFs
+        """
+        return self._combine("or", other)
 
     def __radd__(self, other):
         """
         Finds the OR of the BFs
         """
-        try:
-            return BF("(%s) + (%s)" %(other.expression(), self.expression()), \
-                      "%s_OR_%s" %(other.name(), self.name()))
-            
-        except AttributeError:
-            raise InvalidBooleanFunctionError("The object is not a Boolean Function")
-        
+        return BF._combine(other, "or", self)
 
     def __mul__(self, other):
         """
         Finds the AND of the BFs
         """
-        try:
-            return BF("(%s) * (%s)" %(self.expression(), other.expression()), \
-                      "%s_AND_%s" %(self.name(), other.name()))
-
-        except AttributeError:
-            raise InvalidBooleanFunctionError("The object is not a Boolean Function")
-
+        return self._combine("and", other)
 
-    
     def __rmul__(self, other):
         """
         Finds the AND of the BFs
         """
-        try:
-            return BF("(%s) * (%s)" %(other.expression(), self.expression()), \
-                      "%s_AND_%s" %(other.name(), self.name()))
-            
-        except AttributeError:
-            raise InvalidBooleanFunctionError("The object is not a Boolean Function")
-        
+        return BF._combine(other, "and", self)
 
     def __xor__(self, other):
         """
         Finds the XOR of the BFs
         """
-        try:
-            return BF("(%s) % (%s)" %(self.expression(), other.expression()), \
-                      "%s_XOR_%s" %(self.name(), other.name()))
-            
-        except AttributeError:
-            raise InvalidBooleanFunctionError("The object is not a Boolean Function")
-        
+        return self._combine("xor", other)
+
     def __rxor__(self, other):
         """
         Finds the XOR of the BFs
         """
-        try:
-            return BF("(%s) % (%s)" %(other.expression(), self.expression()), \
-                      "%s_XOR_%s" %(other.name(), self.name()))
-            
-        except AttributeError:
-            raise InvalidBooleanFunctionError("The object is not a Boolean Function")
+        return BF._combine(other, "xor", self)
 
-    def bf_not(self):
+    def bf_not(self, engine = None):
         """
         Returns a not version of the boolean function.
         """
-        try:
-            string = ("~(%s)" %(self.expression()))
-            return BF(string, ("%s_NOT" %self.name()))
-        except AttributeError:
-            raise InvalidBooleanFunctionError("The object is not a Boolean Function")
+        return self._combine("not", None, engine)
 
-    def nor(self, other):
+    def nor(self, other, engine = None):
         """
         Returns a NOR-ed version of self with the boolean function passed in.
         """     
-        try:
-            string = ("(%s) - (%s)" %(self.expression(), other.expression()))
-            return BF(string, ("%s_NOR_%s" %(self.name(), other.name())))
+        return self._combine("nor", other, engine)
 
-        except AttributeError:
-            raise InvalidBooleanFunctionError("The object is not a Boolean Function")
-
-    def nand(self, other):
+    def nand(self, other, engine = None):
         """
         Returns a NAND-ed version of self with the boolean function passed in.
         """     
-        try:
-            string = ("(%s) | (%s)" %(self.expression(), other.expression()))
-            return BF(string, ("%s_NAND_%s" %(self.name(), other.name())))
-
-        except AttributeError:
-            raise InvalidBooleanFunctionError("The object is not a Boolean Function")
+        return self._combine("nand", other, engine)
 
     def min_expand(self):
         """
@@ -348,8 +1088,9 @@ class BF:
 
         # Since it is the same Boolean function, all the attributes except the
         # expression are same. So just copy and return. Makes processing MUCH
-        # faster
-        rv2 = copy.deepcopy(self)
+        # faster. The copy shares the tt and the caches (see _Shared)
+        rv2 = copy.copy(self)
+        rv2._variables = list(self._variables)
         rv2._name = "%s_min_expand" %self.name()
         rv2._expression = "%s" %rv
         return rv2
@@ -392,8 +1133,9 @@ class BF:
         
         # Since it is the same Boolean function, all the attributes except the
         # expression are same. So just copy and return. Makes processing MUCH
-        # faster
-        rv2 = copy.deepcopy(self)
+        # faster. The copy shares the tt and the caches (see _Shared)
+        rv2 = copy.copy(self)
+        rv2._variables = list(self._variables)
         rv2._name = "%s_max_expand" %self.name()
         rv2._expression = "%s" %rv
         return rv2
@@ -407,12 +1149,111 @@ class BF:
             return self.truthtable()[values]
         except KeyError:
             raise KeyError("This value does not exist in the function's truth-table")
-            
-    def min_sop(self):
+
+    def edit(self, on = (), off = (), dc = ()):
+        """
+        Returns this BF with the rows (minterm #s) in on set to 1, those in
+        off set to 0 and those in dc made don't cares. The other rows keep
+        their value. The BF itself doesn't change, as BFs of the same
+        function share their results (see _intern).
+
+        What this BF knows of its minimum is carried over, so that min_sop
+        of the result only has to redo the part the edit touched:
+        - its primes are updated (see cubes.update_primes): the primes
+          having a row that left the on-set and don't cares are cut down to
+          the cubes without it, and the primes through the new rows are
+          added.
+        - its min_sop result loses the cubes having such a row, the others
+          are grown into primes, and the rows left uncovered are covered
+          greedily. This repaired cover is where the chart search starts
+          from (see covering.min_cover), so it's never worse than that.
+        It's done only if the primes of this BF are known (i.e. min_sop
+        found them), and at most EDIT_LIMIT rows enter or leave the on-set
+        and don't cares. Bigger edits are minimised from scratch.
+
+        >>> f = BF("f(a,b,c,d,e) = a*b + ~a*c*d + b*~c*e")
+        >>> g = f.min_sop()
+        >>> h = f.edit(on = [0], off = [31])
+        >>> h.minterms() == sorted(set(f.minterms()) - {31} | {0})
+        True
+        >>> h._primes is not None
+        True
+        >>> h.min_sop() == h
+        True
+        """
+        n = len(self._variables)
+        on, off, dc = set(on), set(off), set(dc)
+        if on & off or on & dc or off & dc:
+            raise InvalidBooleanFunctionError("A row can't be given 2 values")
+        if any(i < 0 or i >= 2 ** n for i in on | off | dc):
+            raise InvalidBooleanFunctionError("Row out of range")
+
+        minterms = set(self._cover.minterms() if self._table is None else \
+                       self.minterms())
+        dcs = set(self.dont_cares())
+        new_on = (minterms - off - dc) | on
+        new_dc = (dcs - on - off) | dc
+        rv = BF.from_minterms(sorted(new_on), self._variables, \
+                              sorted(new_dc), self._name)
+
+        # Already known (e.g. the edit undid an earlier one), or nothing to
+        # carry over
+        if rv._min_sop or rv._primes is not None or self._primes is None:
+            return rv
+
+        # The primes are of the on-set and don't cares together, so only the
+        # rows entering or leaving both change them
+        care = minterms | dcs
+        new_care = new_on | new_dc
+        added = sorted(new_care - care)
+        removed = sorted(care - new_care)
+        if len(added) + len(removed) > EDIT_LIMIT: return rv
+
+        primes = update_primes(self._primes, added, removed, \
+                               lambda m: m in new_care, n)
+        rv._primes = primes
+        if not self._min_sop: return rv
+
+        # Repairing the old cover. Its cubes without removed rows are still
+        # implicants, so each is in some prime
+        gone = [minterm_cube(m, n) for m in removed]
+        seed = []
+        loose = set(added)
+        for cube in expression_cover(self._min_sop, self._variables):
+            if any(contains(cube, i) for i in gone):
+                # Its rows may be left uncovered
+                loose.update(cube_minterms(cube, n))
+            else:
+                seed.append(next(i for i in primes if contains(i, cube)))
+
+        # The on-set rows left uncovered, covered greedily by the primes
+        # having them (same costs as in _solve_primes)
+        loose = [m for m in sorted(loose & new_on) if not any(contains(i, \
+                 minterm_cube(m, n)) for i in seed)]
+        if loose:
+            cubes = [minterm_cube(m, n) for m in loose]
+            candidates = [i for i in primes if any(contains(i, j) for j in \
+                                                   cubes)]
+            rows = []
+            for prime in candidates:
+                row = 0
+                for j in range(len(cubes)):
+                    if contains(prime, cubes[j]): row |= 1 << j
+                rows.append(row)
+            term_cost = n * len(candidates) + 1
+            costs = [term_cost + literals(i, n) for i in candidates]
+            seed += [candidates[i] for i in greedy_cover(rows, \
+                     (1 << len(cubes)) - 1, costs)]
+        rv._seed = sorted(set(seed))
+        return rv
+
+    def min_sop(self, method = None, time_budget = None, max_implicants = None, \
+                checkpoint = None):
         """
         Finds and returns the simplified sum-of-products form of the Boolean
         Function.
-        Uses Quine-McCluskey algorithm. 
+        Uses Quine-McCluskey algorithm (method = 'qm'), or the method the
+        planner (see planner.py) estimates cheapest if none is given.
         
         Source: http://en.wikipedia.org/wiki/Quine-McCluskey_algorithm
         Runtime: O(exp(n)/n)
@@ -424,15 +1265,117 @@ class BF:
         "" 
         (Wikipedia)
 
-        Better algorithms (e.g. ESPRESSO) are out of scope of this project, 
-        given the time constraint. So this method is useful only for limited 
-        number of variables.
+        The prime implicant chart is solved exactly by branch-and-bound (see
+        covering.py), but only within covering.NODE_LIMIT nodes. If that runs
+        out, the best cover found so far is returned and the is_optimal()
+        method of the returned BF gives False.
+
+        BFs stored as covers (see cubes.py) find their primes by iterated 
+        consensus on the cover instead of Q-M. Two cases there fall back to a
+        result that isn't guaranteed to be the minimum (is_optimal() gives 
+        False): a prime chart too big to solve exactly (see CHART_LIMIT), and
+        too many primes with more than QM_LIMIT variables (ESPRESSO is used).
+
+        BFs of up to 4 variables without don't cares aren't minimised at all:
+        their minimum is looked up in a precomputed table (see exact4.py).
+
+        Once the primes of a BF are found, they are kept, and a later call
+        (e.g. with a bigger budget) only solves the chart. BFs made by edit
+        start with the primes and cover of the BF they were edited from,
+        updated for the rows that changed.
+
+        method = 'parallel' finds the primes with the integer Q-M of qm.py
+        instead, spreading every merge level over WORKERS processes (and
+        optionally splitting the function into Shannon cofactors first, see
+        SHANNON_SPLIT). The chart is then solved as for the covers.
+
+        method = 'external' finds the primes with the integer Q-M too, but
+        keeps its levels in temporary files (see qm.iter_primes), so that
+        only the primes have to fit in memory. Much slower, but it works for
+        the BFs whose Q-M levels don't fit in memory.
+
+        So Q-M is useful only for limited number of variables. For bigger
+        functions, use method = 'espresso', which uses the ESPRESSO heuristic
+        (see espresso.py). Its result is irredundant and made of primes, but
+        isn't guaranteed to be the minimum.
+
+        The minimisation is anytime: it can be given a time_budget (seconds)
+        and a limit on the # of implicants generated (max_implicants), and it
+        can be stopped by Ctrl-C. In all these cases the best cover found so
+        far is returned, with is_optimal() False. If the primes were all
+        found, that's the greedy cover of the prime chart, improved by the
+        exact search for as long as it ran. If Q-M was stopped earlier, it's
+        the greedy cover of the primes and implicants it had, and if the
+        primes couldn't be found at all (the cover and parallel paths), it's
+        the cover of the BF itself. Such results aren't cached, so calling
+        min_sop again with a bigger budget does better. The budgets don't
+        apply to ESPRESSO.
+
+        checkpoint = path saves the progress to that file every
+        checkpoint.INTERVAL seconds, and when a budget or Ctrl-C stops the
+        minimisation: the implicant level and the primes found so far, then
+        the frontier of the covering search (see checkpoint.py). If the file
+        exists, the minimisation resumes from it, and ends with the same
+        result as a run that never stopped. The file is removed once the
+        result is found. Checkpointed runs always find the primes with the
+        integer Q-M of qm.py (on WORKERS processes with method = 'parallel').
+
+        >>> f = BF("f(a,b,c,d,e) = a*b + ~a*c + b*c*d + a*~e + ~c*d*e")
+        >>> g = f.min_sop(time_budget = 0)
+        >>> g.is_optimal(), g == f
+        (False, True)
+        >>> f.min_sop().is_optimal()
+        True
         """
 
+        method = self._min_sop_method(method)
+        if method == 'espresso':
+            return self._min_sop_espresso()
+        budget = Budget(time_budget, max_implicants)
+
+        n = len(self._variables)
+        if not self._min_sop and n <= 4 and self._dc is None:
+            # Small enough to be looked up (see exact4.py)
+            cubes = lookup_min_sop(self._cover.minterms() if self._table \
+                                   is None else self.minterms(), n)
+            if cubes is not None:
+                self._min_sop = form_function([cube_to_string(i, n) for i in \
+                                               cubes], self._variables) \
+                                if cubes else "0"
+                self._min_sop_optimal = True
+
+        # Where to share the result with the NPN class, if it's worth it
+        shared = None
+        if not self._min_sop and 4 < n <= NPN_CACHE_VARS and self._dc is None:
+            shared = self._npn_reuse()
+
+        if not self._min_sop:
+            self._disk_min_sop("min_sop")
+        # True if the result is computed below (and so worth storing)
+        computed = not self._min_sop
+
+        if not self._min_sop and self._primes is not None:
+            # The primes are known already (e.g. updated by edit, or found by
+            # a run cut short), only the chart is left
+            self._solve_primes(self._primes, budget)
+
+        if not self._min_sop and checkpoint is not None:
+            self._min_sop_checkpoint(method, budget, checkpoint)
+
+        if not self._min_sop and method == 'parallel':
+            self._min_sop_parallel(budget)
+
+        if not self._min_sop and method == 'external':
+            self._min_sop_external(budget)
+
+        if not self._min_sop and self._table is None:
+            # The BF is stored as a cover, and the tt isn't made yet. Finding
+            # the primes from the cover itself is much cheaper than Q-M
+            self._min_sop_cover(budget)
+
         if self._min_sop:
             # Retrieving from cache
             rv = self._min_sop
-
         
         else:
             # 2 Extreme cases for faster computations
@@ -448,8 +1391,11 @@ class BF:
             else:
                 # STAGE 1 OF Q-M ALGORITHM
 
-                # First level PIs are the minterms themselves
+                # First level PIs are the minterms themselves, and the don't
+                # cares, which can be merged with them but needn't be covered
                 pis_num = self.mintermsl()
+                for i in self.dont_cares():
+                    pis_num.setdefault(find_ones(i), []).append(i)
 
                 # Register storing all the combinations. Used for tracing back
                 # the minterms covered
@@ -469,7 +1415,7 @@ class BF:
                         comb_register[string_minterm] = [string_minterm] 
 
                 # pis contains all the different levels of PIs, such that pis[i] 
-                # is the 2^i level PI.
+                # is the 2^i level PI. The levels already merged are None
                 # Converting to list to accomodate for future additions
                 pis = [pis]
 
@@ -478,37 +1424,63 @@ class BF:
 
                 # Doing the repetitive prime impliciation simplification
                 i = 0
-                while(1):
-                    # Find the new PIs calculated, the simplified PIs found
-                    # in the current PIs, and the temporary combination register
-                    # developed during this simplification
-                    sim_pi_found, pis_calc, temp_register = next_pis(pis[i])
-
-                    # These are the required simplified PIs
-                    sim_pis += sim_pi_found
-
-                    # Finding out the minterms involved in the merge
-                    for merge in temp_register:
-                        # For all the merged results
-
-                        parents = copy.deepcopy(temp_register[merge])
-
-                        for parent in parents:
-                            if parent in comb_register:
-                                # Checking if parents of merge were themselves merged earlier
-                                grandparents = comb_register[parent]
-                                # Substitute the parents with grandparents to get the minterms
-                                temp_register[merge] += grandparents
-                                temp_register[merge].remove(parent)
-
-                    # Record the combination results
-                    comb_register.update(temp_register)
-
-                    if pis_calc == {i:[] for i in self.mintermsl()}:
-                        break # The most simplified version is created. So end
-                    else:
-                        pis.append(pis_calc)
-                        i += 1
+                try:
+                    while(1):
+                        # Out of budget: every minterm is covered by a prime
+                        # found so far, or by an implicant of this level. The
+                        # chart of all of them is solved instead
+                        size = sum(len(j) for j in pis[i].values())
+                        if budget.expired() or \
+                           budget.too_many(len(sim_pis) + size):
+                            budget.cut = True
+                            break
+
+                        # Find the new PIs calculated, the simplified PIs found
+                        # in the current PIs, and the temporary combination register
+                        # developed during this simplification
+                        sim_pi_found, pis_calc, temp_register = next_pis(pis[i])
+
+                        # These are the required simplified PIs
+                        sim_pis += sim_pi_found
+
+                        # Finding out the minterms involved in the merge
+                        for merge in temp_register:
+                            # For all the merged results
+
+                            parents = copy.deepcopy(temp_register[merge])
+
+                            for parent in parents:
+                                if parent in comb_register:
+                                    # Checking if parents of merge were themselves merged earlier
+                                    grandparents = comb_register[parent]
+                                    # Substitute the parents with grandparents to get the minterms
+                                    temp_register[merge] += grandparents
+                                    temp_register[merge].remove(parent)
+
+                        # Record the combination results
+                        comb_register.update(temp_register)
+
+                        if pis_calc == {i:[] for i in pis_num}:
+                            break # The most simplified version is created. So end
+                        else:
+                            pis.append(pis_calc)
+                            # From now on, only the new level and the primes
+                            # are needed; the merged PIs and their minterms
+                            # can go
+                            primes = set(sim_pi_found)
+                            for k in pis[i]:
+                                for pi in pis[i][k]:
+                                    if pi not in primes:
+                                        comb_register.pop(pi, None)
+                            pis[i] = None
+                            i += 1
+                except KeyboardInterrupt:
+                    budget.stop()
+                if budget.cut:
+                    sim_pis = sorted(set(sim_pis + [j for k in pis[-1] for \
+                                                    j in pis[-1][k]]))
+                else:
+                    self._primes = [cube_from_string(j) for j in sim_pis]
 
                 # STAGE 2 OF Q-M ALGORITHM
 
@@ -518,7 +1490,9 @@ class BF:
                         comb_register[i][j] = int(comb_register[i][j], 2)
 
                 # Generating EPIs from simplified PIs == PI chart
-                epis = gen_epi(self.minterms(), sim_pis, comb_register)
+                epis, optimal = solve_chart(self.minterms(), sim_pis, \
+                                            comb_register, budget = budget)
+                self._min_sop_optimal = optimal
                 
                 # Generating Output
                 variables = self._varstring()
@@ -526,20 +1500,517 @@ class BF:
                 
                 self._min_sop = rv # Caching the calculated value
 
-        rv2 = copy.deepcopy(self)
-        rv2._name = ("%s_min_sop" %self.name())
+        # A new BF from the minimised cover; no need to deep copy this one
+        rv2 = BF.from_cover(expression_cover(rv, self._variables), \
+                            self._variables, "%s_min_sop" %self.name(), self._dc)
+        rv2._expression = rv
+        rv2._optimal = self._min_sop_optimal and not budget.cut
+
+        if budget.cut:
+            # Not the best this BF can do; not cached anywhere
+            self._min_sop = None
+            self._min_sop_optimal = True
+            return rv2
+        if shared is not None and self._min_sop_optimal:
+            key, npn = shared
+            _npn_results[key] = [transform_cube(i, n, npn) for i in rv2.cover()]
+        if computed and _disk_cache is not None:
+            _disk_cache.put("min_sop", (rv2.cover().cubes(), \
+                            self._min_sop_optimal), *self._fingerprint())
+        return rv2
+
+    def _min_sop_method(self, method):
+        """
+        Helper method for min_sop. Returns the method to minimise the BF with:
+        the one given, or the one the planner (see planner.py) estimates
+        cheapest if it is None.
+        """
+        if method not in [None, 'qm', 'parallel', 'external', 'espresso']:
+            raise InvalidBooleanFunctionError("Unknown minimisation method '%s'" \
+                                              %method)
+        return self._plan("min_sop", min_sop_costs(self._stats(), WORKERS), \
+                          method)
+
+    def _fingerprint(self):
+        """
+        Helper method that returns the key of the function in the disk cache
+        (see use_disk_cache): the packed tt and don't cares for BFs of up to
+        NPN_LIMIT variables, the sorted cubes of the covers for bigger ones.
+        The variable names aren't part of it, as the results are stored as
+        cubes.
+
+        >>> f = BF("f(a,b) = a + d(a*b)")
+        >>> f._fingerprint() == BF("g(x,y) = x*~y + d(x*y)")._fingerprint()
+        True
+        """
+        n = len(self._variables)
+        if n <= NPN_LIMIT:
+            dc = 0
+            for i in self.dont_cares(): dc |= 1 << i
+            return n, "%x" %self.packed(), "%x" %dc
+        return n, sorted(self.cover()), sorted(self.dc_cover())
+
+    def _disk_get(self, kind, *parts):
+        """
+        Helper method that returns the value in the disk cache for (kind,
+        parts), or for (kind, fingerprint) if no parts are given. None if
+        there is none, or the disk cache isn't used.
+        """
+        if _disk_cache is None: return None
+        return _disk_cache.get(kind, *(parts or self._fingerprint()))
+
+    def _disk_min_sop(self, kind):
+        """
+        Helper method for min_sop. Fills the min_sop cache (or the ESPRESSO
+        one, kind = "espresso") from the disk cache, if it has the result.
+        """
+        value = self._disk_get(kind)
+        if value is None: return
+        cubes, optimal = value
+        n = len(self._variables)
+        rv = form_function([cube_to_string(i, n) for i in cubes], \
+                           self._variables) if cubes else "0"
+        if kind == "espresso":
+            self._min_espresso = rv
+        else:
+            self._min_sop = rv
+            self._min_sop_optimal = optimal
+
+    def _npn_reuse(self):
+        """
+        Helper method for min_sop. If a function of the same NPN class was
+        minimised already, fills the min_sop cache from its minimum cover
+        (transformed back to this BF) and returns None. Otherwise returns
+        (key, transform) to store the result of this BF under in _npn_results
+        (or None if finding the class takes too long).
+
+        The output negation is part of the key: the minimum SOP of ~f isn't
+        made from that of f. So a class has up to 2 results.
+
+        >>> f = BF("f(a,b,c,d,e) = a*b*c + d*e")
+        >>> f.min_sop()
+        f_min_sop(a, b, c, d, e) = d*e + a*b*c
+        >>> key = (5, f.npn_canonical()[0], f.npn_canonical()[1][2])
+        >>> key in _npn_results
+        True
+        """
+        n = len(self._variables)
+        result = self.npn_canonical(NPN_SEARCH_LIMIT)
+        if result is None: return None
+        table, npn = result
+
+        key = (n, table, npn[2])
+        if key not in _npn_results: return key, npn
+
+        cubes = [untransform_cube(i, n, npn) for i in _npn_results[key]]
+        self._min_sop = form_function([cube_to_string(i, n) for i in cubes], \
+                                      self._variables) if cubes else "0"
+        self._min_sop_optimal = True
+        return None
+
+    def _min_sop_cover(self, budget):
+        """
+        Helper method for min_sop, used when the BF is stored as a cover and
+        the tt isn't made yet. Fills the min_sop cache (self._min_sop and
+        self._min_sop_optimal), unless the Q-M on the tt should be used
+        instead; then the cache is left empty.
+
+        The primes are found by iterated consensus on the cover (see 
+        Cover.primes), so the cost depends on the # of cubes, not on 2^n. The
+        essential primes are found by containment checks. The rest of the 
+        prime chart is solved exactly (covering.min_cover) if the part of the
+        function left uncovered has at most CHART_LIMIT minterms. Otherwise an
+        irredundant cover of the remaining primes is used, which isn't 
+        guaranteed to be the minimum.
+
+        If there are more than CONSENSUS_LIMIT primes (or they take more than
+        CONSENSUS_TIME seconds), Q-M is used for BFs with up to QM_LIMIT
+        variables, and ESPRESSO for the bigger ones.
+
+        The don't cares (a cover too) are added to the cover for finding the
+        primes, but only the rest of the on-set has to be covered.
+
+        The budget (see covering.Budget) bounds the consensus too. If it runs
+        out before the primes are found, the cover itself is the result.
+        """
+        n = len(self._variables)
+        dc = self.dc_cover()
+        primes = self._disk_get("primes")
+        if primes is not None:
+            primes = Cover(primes, n)
+        else:
+            limit = CONSENSUS_LIMIT
+            if budget.max_implicants is not None:
+                limit = min(limit, budget.max_implicants)
+            seconds = CONSENSUS_TIME
+            if budget.deadline is not None:
+                seconds = min(seconds, budget.left())
+            try:
+                primes = self._cover.union(dc).primes(limit, seconds)
+            except KeyboardInterrupt:
+                budget.stop()
+                primes = None
+            if primes is not None and _disk_cache is not None:
+                _disk_cache.put("primes", primes.cubes(), *self._fingerprint())
+
+        if primes is None:
+            # Q-M couldn't do better within the same limits
+            if budget.expired() or budget.cut or limit < CONSENSUS_LIMIT:
+                self._min_sop_fallback(budget)
+                return
+            if n <= QM_LIMIT: return # Q-M on the tt
+            cover = espresso(self._cover.cubes(), dc.cubes(), n)
+            self._min_sop = form_function([cube_to_string(i, n) for i in \
+                                           cover], self.variables()) \
+                            if cover else "0"
+            self._min_sop_optimal = False
+            return
+
+        self._solve_primes(primes.cubes(), budget)
+
+    def _min_sop_fallback(self, budget):
+        """
+        Helper method for min_sop, used when the budget runs out before the
+        primes are found. Fills the min_sop cache with the cover of the BF
+        itself (without the cubes contained in others): valid, but likely
+        far from the minimum.
+        """
+        budget.cut = True
+        n = len(self._variables)
+        cubes = single_cube_containment(self.cover().cubes())
+        self._min_sop = form_function([cube_to_string(i, n) for i in cubes], \
+                                      self.variables()) if cubes else "0"
+        self._min_sop_optimal = False
+
+    def _min_sop_parallel(self, budget):
+        """
+        Helper method for min_sop, used with method = 'parallel'. Fills the
+        min_sop cache like _min_sop_cover, but the primes are found by the
+        integer Q-M of qm.py on WORKERS processes. If SHANNON_SPLIT > 0, the
+        function is split into 2^SHANNON_SPLIT cofactors first, the primes of
+        which are found at the same time. If the budget runs out before the
+        primes are found, the cover of the BF is the result.
+        """
+        n = len(self._variables)
+        minterms = self._cover.minterms() if self._table is None else \
+                   self.minterms()
+        dcs = self.dont_cares()
+        memory = _memory.worker_bytes(WORKERS)
+        try:
+            if SHANNON_SPLIT > 0:
+                primes = shannon_primes(minterms, dcs, n, SHANNON_SPLIT, \
+                                        WORKERS, budget, memory)
+            else:
+                primes = qm_primes(minterms, dcs, n, WORKERS, budget = budget, \
+                                   memory = memory)
+        except KeyboardInterrupt:
+            budget.stop()
+            primes = None
+        if primes is None:
+            self._min_sop_fallback(budget)
+        else:
+            self._solve_primes(primes, budget)
+
+    def _min_sop_external(self, budget):
+        """
+        Helper method for min_sop, used with method = 'external'. Fills the
+        min_sop cache like _min_sop_parallel, but the primes are found with
+        the Q-M levels spilled to temporary files (see qm.iter_primes).
+        """
+        n = len(self._variables)
+        minterms = self._cover.minterms() if self._table is None else \
+                   self.minterms()
+        primes = []
+        try:
+            for cube, count in iter_primes(minterms, self.dont_cares(), n, \
+                                           spill = True):
+                if budget.expired() or budget.too_many(len(primes)):
+                    budget.cut = True
+                    break
+                primes.append(cube)
+        except KeyboardInterrupt:
+            budget.stop()
+        if budget.cut:
+            self._min_sop_fallback(budget)
+        else:
+            self._solve_primes(primes, budget)
+
+    def _min_sop_checkpoint(self, method, budget, path):
+        """
+        Helper method for min_sop, used with checkpoint = path. Fills the
+        min_sop cache like _min_sop_parallel, saving the progress to the
+        checkpoint file, or resuming from it. The file is keyed by the
+        fingerprint of the BF (see _fingerprint).
+        """
+        ck = Checkpoint(path, self._fingerprint())
+        try:
+            ck.load()
+        except CheckpointError as error:
+            raise InvalidBooleanFunctionError(str(error))
+
+        primes = ck.state.get("primes")
+        if primes is None:
+            n = len(self._variables)
+            minterms = self._cover.minterms() if self._table is None else \
+                       self.minterms()
+            workers = WORKERS if method == 'parallel' else 1
+            try:
+                primes = qm_primes(minterms, self.dont_cares(), n, workers, \
+                                   budget = budget, checkpoint = ck, \
+                                   memory = _memory.worker_bytes(workers))
+            except KeyboardInterrupt:
+                budget.stop()
+                primes = None
+            if primes is None:
+                self._min_sop_fallback(budget)
+                return
+            # The primes replace the level they were merged from
+            ck.save(qm = None, primes = primes)
+
+        self._solve_primes(primes, budget, ck)
+        if not budget.cut: ck.remove()
+
+    def _solve_primes(self, primes, budget, checkpoint = None):
+        """
+        Helper method for _min_sop_cover and _min_sop_parallel. Given all the
+        primes (list of cubes, don't cares included), picks the cheapest of
+        them covering the BF, and fills the min_sop cache. The chart is
+        solved within the budget, saving the search to the checkpoint, if
+        given.
+        """
+        n = len(self._variables)
+        dc = self.dc_cover()
+        self._primes = list(primes)
+
+        # The part that must be covered, and the primes having some of it
+        on = self.cover().sharp(dc)
+        dc = dc.cubes()
+        primes = [i for i in primes if not covers(dc, i, n)]
+        if primes == []:
+            self._min_sop = "0"
+            self._min_sop_optimal = True
+            return
+
+        # A prime is essential iff the other primes (and the don't cares)
+        # don't cover it
+        essentials = []
+        others = []
+        for i in range(len(primes)):
+            rest = primes[:i] + primes[i + 1:]
+            if covers(rest + dc, primes[i], n): others.append(primes[i])
+            else: essentials.append(primes[i])
+
+        # What is left to be covered by the non-essential primes
+        left = on.sharp(Cover(essentials, n))
+
+        chosen = []
+        optimal = True
+        if len(left):
+            size = sum(2 ** (n - literals(i, n)) for i in left)
+            if size <= CHART_LIMIT:
+                columns = left.minterms()
+                rows = []
+                for prime in others:
+                    row = 0
+                    for j in range(len(columns)):
+                        if contains(prime, minterm_cube(columns[j], n)):
+                            row |= 1 << j
+                    rows.append(row)
+
+                # Same costs as in gen_epi: fewer PIs, then fewer literals
+                term_cost = n * len(others) + 1
+                costs = [term_cost + literals(i, n) for i in others]
+
+                # The old cover repaired by edit, if any, is the bound to beat
+                initial = None
+                if self._seed is not None:
+                    initial = [others.index(i) for i in self._seed if i in \
+                               others]
+                picked, optimal = min_cover(rows, (1 << len(columns)) - 1, \
+                                            costs, budget = budget, \
+                                            checkpoint = checkpoint, \
+                                            initial = initial)
+                chosen = [others[i] for i in picked]
+            else:
+                # Too big for the chart
+                chosen = irredundant([i for i in others if not \
+                                      is_empty(supercube(left) & i, n)], \
+                                     essentials + dc, n)
+                optimal = False
+
+        epis = [cube_to_string(i, n) for i in essentials + chosen]
+        self._min_sop = form_function(epis, self.variables())
+        self._min_sop_optimal = optimal
+
+    def _min_sop_espresso(self):
+        """
+        Helper method for min_sop. Minimises the BF using ESPRESSO.
+        """
+        if not self._min_espresso:
+            self._disk_min_sop("espresso")
+
+        if self._min_espresso:
+            # Retrieving from cache
+            rv = self._min_espresso
+
+        else:
+            n = len(self._variables)
+            cover = espresso(self.cover().cubes(), self.dc_cover().cubes(), n)
+
+            if cover == []: rv = "0"
+            else:
+                rv = form_function([cube_to_string(i, n) for i in cover], \
+                                   self.variables())
+
+            self._min_espresso = rv # Caching the calculated value
+            if _disk_cache is not None:
+                _disk_cache.put("espresso", (cover, False), \
+                                *self._fingerprint())
+
+        rv2 = BF.from_cover(expression_cover(rv, self._variables), \
+                            self._variables, "%s_min_sop" %self.name(), self._dc)
         rv2._expression = rv
+        rv2._optimal = False # ESPRESSO is a heuristic
         return rv2
 
-    def min_pos(self):
+    def _off_set(self):
+        """
+        Helper method that returns the BF of the off-set (i.e. the complement,
+        with the same don't cares). It is made from the tt (maxterms) or the
+        cover, whichever this BF already has; no expression is parsed. Cached,
+        so that its minimised forms are cached too.
+        """
+        if self._off is None:
+            if self._table is None:
+                dc = self.dc_cover()
+                off = self._cover.union(dc).complement()
+                self._off = BF.from_cover(off, self._variables, \
+                                          "%s_off" %self._name, dc)
+            else:
+                self._off = BF.from_minterms(self.maxterms(), self._variables, \
+                                             self.dont_cares(), "%s_off" \
+                                             %self._name)
+        return self._off
+
+    def min_pos(self, method = None):
         """
         Finds and returns the most simplified POS form of the boolean function.
+
+        The off-set (the maxterms) is minimised as an SOP by min_sop, with the
+        same method, and the result is dualised: ~f = a*~b + c gives
+        f = (~a + b) * (~c). So everything said about min_sop (including
+        is_optimal()) holds here too.
+
+        >>> f = BF("f(a,b,c) = a*b + a*c")
+        >>> f.min_pos().expression() in ['(a) * (b + c)', '(b + c) * (a)']
+        True
+        >>> f.min_pos() == f
+        True
         """
+        off = self._off_set().min_sop(method)
+
+        n = len(self._variables)
+        factors = []
+        for cube in off.cover():
+            # Every term of ~f is a factor of f, with the literals complemented
+            lits = []
+            for i in range(n):
+                field = (cube >> (2 * (n - 1 - i))) & 3
+                if field == 2: lits.append("~" + self._variables[i])
+                elif field == 1: lits.append(self._variables[i])
+            factors.append("(%s)" %" + ".join(lits) if lits else "0")
+
+        if factors == []: rv = "1" # No maxterms
+        elif "0" in factors: rv = "0" # No minterms
+        else: rv = " * ".join(factors)
+
+        rv2 = BF.from_cover(off.cover().complement(), self._variables, \
+                            "%s_min_pos" %self.name(), self._dc)
+        rv2._expression = rv
+        rv2._optimal = off.is_optimal()
+        return rv2
+
+    def min_both(self, method = None):
+        """
+        Finds both the minimum SOP and POS forms. Returns (SOP BF, POS BF,
+        the cheaper of the 2). The cost is the # of terms/factors, then the #
+        of literals; a tie goes to the SOP.
+
+        Both minimisations share the tt or the cover of this BF (the off-set
+        is made from it, see min_pos), so the function is evaluated just once.
+
+        >>> sop, pos, best = BF("f(a,b,c) = a*b + a*c").min_both()
+        >>> best is pos
+        True
+        """
+        sop = self.min_sop(method)
+        pos = self.min_pos(method)
+        n = len(self._variables)
+        pos_cost = cost(self._off_set().min_sop(method).cover().cubes(), n)
+        if pos_cost < cost(sop.cover().cubes(), n): return sop, pos, pos
+        return sop, pos, sop
+
+    def min_esop(self):
+        """
+        Finds and returns a small exclusive-or sum of products (ESOP) of the
+        BF: product terms joined by % (see esop.py). Parity and arithmetic
+        functions are much smaller this way than as a sum of products, and
+        are found in milliseconds where min_sop has 2^(n-1) PIs to go
+        through. Made from the packed tt, with the don't cares tried as 0s
+        and as 1s. It's a heuristic: the result isn't proven to be the
+        minimum ESOP (is_optimal() is False).
+
+        A constant 1 term is folded into the smallest other term, which is
+        then complemented (1 % a*b = ~(a*b)).
+
+        >>> f = BF("f(a,b,c) = a*~b*~c + ~a*b*~c + ~a*~b*c + a*b*c")
+        >>> f.min_esop()
+        f_min_esop(a, b, c) = a % b % c
+        >>> BF("f(a,b) = ~a + ~b").min_esop().expression()
+        '~(a*b)'
+        >>> f.min_esop() == f
+        True
+        """
+        n = len(self._variables)
+        if self._min_esop is None:
+            table = self.packed()
+            dc = 0
+            for i in self.dont_cares(): dc |= 1 << i
+            tables = [table] if dc == 0 else [table & ~dc, table | dc]
+            cubes = min((min_esop(i, n, ESOP_TIME) for i in tables), \
+                        key = lambda x: cost(x, n))
+
+            def literal_list(cube):
+                lits = []
+                for i in range(n):
+                    field = (cube >> (2 * (n - 1 - i))) & 3
+                    if field == 1: lits.append("~" + self._variables[i])
+                    elif field == 2: lits.append(self._variables[i])
+                return lits
+
+            # The terms in the order of their first variable
+            cubes.sort(key = lambda x: [i == "-" for i in \
+                                        cube_to_string(x, n)])
+            terms = [literal_list(i) for i in cubes]
+            if [] in terms and len(terms) > 1:
+                terms.remove([])
+                smallest = min(terms, key = len)
+                if len(smallest) > 1: folded = "~(%s)" %"*".join(smallest)
+                elif smallest[0][0] == "~": folded = smallest[0][1:]
+                else: folded = "~" + smallest[0]
+                terms[terms.index(smallest)] = [folded]
+            terms = ["(%s)" %"*".join(i) if len(i) > 1 else i[0] if i else "1" \
+                     for i in terms]
+            self._min_esop = " % ".join(terms) if terms else "0"
+
+        # The same function, with the ESOP as its expression
+        rv = copy.copy(self)
+        rv._variables = list(self._variables)
+        rv._name = "%s_min_esop" %self.name()
+        rv._expression = self._min_esop
+        rv._optimal = False
+        return rv
 
-        # This should be able to be implemented by finding adapting the Q-M
-        # algorithm for POS. Couldn't implement due to lack of time
-        print("Still under development. Try min_sop instead")
-        
 def next_pis(current_pi):
     """
     Finds the next generation prime implicants from the current ones.
@@ -670,7 +2141,8 @@ def combine(pi1, pi2):
     # 0 bit difference == identical PIs (can never happen in the first place)
 
 
-def gen_epi(minterms, sim_pis, comb_register):
+def gen_epi(minterms, sim_pis, comb_register, node_limit = NODE_LIMIT, \
+            time_limit = None, budget = None):
     """
     Given a list of prime implicants that can't be simplified further, finds and
     returns a list of essential PIs. Based on the step 2 (prime implication chart)
@@ -679,6 +2151,14 @@ def gen_epi(minterms, sim_pis, comb_register):
     comb_register stores which minterms were combined to eventually form the 
     sim_pis.
 
+    The chart is solved by covering.min_cover: the essential PIs are picked,
+    the chart is reduced to its cyclic core, which is then solved exactly
+    with branch-and-bound. Fewer PIs is preferred, then fewer literals. If the
+    search exceeds node_limit nodes or time_limit seconds, the best cover found
+    so far (at worst the greedy one) is returned. Use solve_chart to know
+    whether that happened. A budget (see covering.Budget) limits the search
+    the same way, and lets Ctrl-C stop it.
+
     Test copied from Quine-McCluskey algorithm's Wikipedia page:
 
     >>> minterms = [4,8,9,10,11,12,14,15]
@@ -690,7 +2170,28 @@ def gen_epi(minterms, sim_pis, comb_register):
     >>> gen_epi(minterms, sim_pis, comb_register)
     ['-100', '10--', '1-1-']
 
+    A cyclic chart (no essential PIs). Greedy picking can end up with 4 PIs:
+
+    >>> sim_pis = ["00-", "0-1", "-11", "11-", "1-0", "-00"]
+    >>> comb_register = {"00-": [0, 1], "0-1": [1, 3], "-11": [3, 7], \
+                         "11-": [6, 7], "1-0": [4, 6], "-00": [0, 4]}
+    >>> gen_epi([0, 1, 3, 4, 6, 7], sim_pis, comb_register)
+    ['00-', '-11', '1-0']
+    """
+    return solve_chart(minterms, sim_pis, comb_register, node_limit, \
+                       time_limit, budget)[0]
+
+def solve_chart(minterms, sim_pis, comb_register, node_limit = NODE_LIMIT, \
+                time_limit = None, budget = None):
+    """
+    Does the work of gen_epi. Returns (list of EPIs, optimal), where optimal is
+    False iff the branch-and-bound ran out of node_limit or time_limit (or the
+    budget) before proving the cover minimum.
+
+    >>> solve_chart([4, 12], ["-100"], {"-100": [4, 12]})
+    (['-100'], True)
     """
+    optimal = True
     EPI = []
 
     if sim_pis and comb_register == {}:
@@ -699,53 +2200,341 @@ def gen_epi(minterms, sim_pis, comb_register):
         EPI = sim_pis        
 
     else:
-        # Finding minterms that are formed by just 1 sim_pi
-        pi_tally = {i:[] for i in minterms}
-
-        # Keeps track of which minterms are already covered by the contents of EPI
-        minterms_covered = []
-
+        # Giving every minterm a column in the PI chart
+        column = {}
+        for minterm in minterms:
+            column[minterm] = len(column)
+
+        # Every PI is a row in the chart, stored as the bitset of the columns
+        # (minterms) it covers
+        rows = []
         for pi in sim_pis:
-            # Loop over all the simplified PIs
+            row = 0
             for minterm in comb_register[pi]:
-                # Loop over all the minterms that were combined to get this PI
-                pi_tally[minterm].append(pi)
-                # Add this PI to that minterm's PI-tally
+                if minterm in column: row |= 1 << column[minterm]
+            rows.append(row)
 
-        for minterm in pi_tally:
-            # Now analysing all the minterms for their coverage by PIs
-            if len(pi_tally[minterm]) == 1:
-                # This minterm can be formed only by 1 PI
-                # This PI is an EPI
-                EPI.append(pi_tally[minterm][0])
+        # Cost of a PI: 1 for the term itself, and a bit more for each literal.
+        # The term part always outweighs all the literals put together
+        term_cost = len(sim_pis[0]) * len(sim_pis) + 1 if sim_pis else 1
+        costs = [term_cost + len(pi) - pi.count("-") for pi in sim_pis]
 
-                # Pulling out all the minterms that can be covered by this EPI
-                # Putting them in the list of minterms covered as well
-                minterms_covered += comb_register[pi_tally[minterm][0]]
+        chosen, optimal = min_cover(rows, (1 << len(column)) - 1, costs, \
+                                    node_limit, time_limit, budget)
+        EPI = [sim_pis[i] for i in chosen]
 
-        # Work left
-        minterms_left = [i for i in minterms if i not in minterms_covered]
+    return EPI, optimal
 
-        while minterms_left:
-            # Choosing EPIs based on the number of minterms they cover.
-            # This should produce the accurate results in most cases, and it 
-            # tries to simulate the trial and error technique used in reality.
-            # Nevertheless, a more thorough testing is needed.
+def use_disk_cache(path = DEFAULT_PATH, max_bytes = MAX_BYTES):
+    """
+    Makes every BF look up its results in the disk cache at path (see
+    diskcache.py) before computing them, and store them there after: the tt
+    of expressions that aren't sums of products, the primes, and the min_sop
+    and ESPRESSO covers. path = None stops using the disk cache. Returns the
+    DiskCache (or None).
+
+    >>> import tempfile
+    >>> cache = use_disk_cache(os.path.join(tempfile.mkdtemp(), "c.sqlite"))
+    >>> f = BF("f(a,b,c,d,e) = a*b*c + a*b*~c + d*e")
+    >>> f.min_sop()
+    f_min_sop(a, b, c, d, e) = d*e + a*b
+    >>> cubes, optimal = cache.get("min_sop", *f._fingerprint())
+    >>> sorted(cube_to_string(i, 5) for i in cubes), optimal
+    (['---11', '11---'], True)
+    >>> use_disk_cache(None)
+    """
+    global _disk_cache
+    new = None if path is None else DiskCache(path, max_bytes)
+    if _disk_cache is not None: _disk_cache.close()
+    _disk_cache = new
+    return _disk_cache
 
-            # Petrick's Method can be implemented in an improved version
-            # http://en.wikipedia.org/wiki/Petrick%27s_method
-            minterm = minterms_left.pop()
-            possible_choices = pi_tally[minterm]
-            choice = max(possible_choices, key = lambda x: len(comb_register[x]))
+def equivalence_classes(bfs, npn = False):
+    """
+    Groups the BFs into classes of equal functions (see BF.__eq__), or of
+    NPN equivalent ones if npn is True (see BF.npn_canonical; only up to
+    NPN_LIMIT variables). Returns the
+    list of classes (lists of BFs), in the order of their first BFs.
+
+    Instead of comparing every pair, the BFs are bucketed by their hash
+    (which equal BFs share) and compared only within a bucket, so the time
+    is about linear in the # of BFs. The NPN canonical forms are exact, so
+    the NPN buckets need no comparing at all.
+
+    >>> bfs = [BF("f = a*b"), BF("g = a + b"), BF("h = b*a"), BF("k = a*~b")]
+    >>> [[i.name() for i in c] for c in equivalence_classes(bfs)]
+    [['f', 'h'], ['g'], ['k']]
+    >>> [[i.name() for i in c] for c in equivalence_classes(bfs, True)]
+    [['f', 'g', 'h', 'k']]
+    """
+    classes = []
+    buckets = {} # Key -> indices of the classes with that key
+    for bf in bfs:
+        if npn:
+            key = (len(bf._variables), bf.npn_canonical()[0])
+        else:
+            key = hash(bf)
+
+        bucket = buckets.setdefault(key, [])
+        for i in bucket:
+            if npn or classes[i][0] == bf:
+                classes[i].append(bf)
+                break
+        else:
+            bucket.append(len(classes))
+            classes.append([bf])
+    return classes
 
-            EPI.append(choice)
-            # The choice PI will have some other minterms that it covers, which 
-            # might be there in the list of minterms_left. Pop them off
+def _worker_init(memory = None):
+    """
+    Runs first in every process of min_sop_many. The sqlite connection of the
+    disk cache can't be shared with the parent, so the workers don't use it
+    (the parent stores their results). The process may allocate memory bytes
+    (see memory.limit_process).
+    """
+    global _disk_cache
+    _disk_cache = None
+    limit_process(memory)
 
-            for i in comb_register[choice]:
-                if i in minterms_left: minterms_left.remove(i)
+def _min_sop_worker(bf, method, limits):
+    """
+    Runs in the processes of min_sop_many. Returns (the minimised expression,
+    optimal, kept), where kept is False if the result was cut short by the
+    limits (time_budget and max_implicants), and so isn't cached.
+    """
+    # The pool is using all the cores already
+    if method == 'parallel': method = 'qm'
+    try:
+        rv = bf.min_sop(method, **limits)
+    except MemoryError as error:
+        # Over the limit of the process: reported like the budget of the
+        # parent would have
+        if isinstance(error, MemoryBudgetError): raise
+        raise MemoryBudgetError("Minimising %s went over the memory of its " \
+                                "process" %bf.name())
+    if method == 'espresso': return rv.expression(), False, True
+    return rv.expression(), rv.is_optimal(), bf._min_sop is not None
+
+def _adopt_min_sop(bf, method, expression, optimal, kept):
+    """
+    Helper for min_sop_many. Fills the caches of the BF with the result of a
+    process, and returns the BF bf.min_sop(method) returns. A result that
+    wasn't kept by the process only makes the BF returned.
+    """
+    if method == 'espresso':
+        bf._min_espresso = expression
+    else:
+        bf._min_sop = expression
+        bf._min_sop_optimal = optimal
+    rv = bf.min_sop(method)
+    if not kept:
+        bf._min_sop = None
+        bf._min_sop_optimal = True
+        return rv
+    if _disk_cache is not None:
+        _disk_cache.put("espresso" if method == 'espresso' else "min_sop", \
+                        (rv.cover().cubes(), optimal), *bf._fingerprint())
+    return rv
 
-    return EPI
+def min_sop_many(bfs, method = None, workers = WORKERS, time_budget = None, \
+                 max_implicants = None):
+    """
+    Minimises the BFs (see BF.min_sop) on a pool of workers processes,
+    biggest first. Yields (BF, result) as they finish, where result is the
+    minimised BF, or the exception the minimisation raised. The min_sop cache
+    of every BF is filled, so calling its min_sop later is free.
+
+    A BF that crashes its process doesn't take the others down: the
+    unfinished BFs are retried one at a time, each in its own process, and
+    only the one crashing again gets an exception. Every process has a hard
+    limit on its memory (a share of the memory budget, see memory_budget), so
+    a BF needing more gets a MemoryBudgetError instead of crashing it.
+
+    time_budget and max_implicants apply to every BF separately (see
+    BF.min_sop); they start when its process starts minimising it.
+
+    >>> bfs = [BF("f = a*b + a*~b"), BF("g = a*b*c + a*b*~c"), BF("h = a*b")]
+    >>> sorted((bf.name(), rv.expression()) for bf, rv in \
+               min_sop_many(bfs, workers = 2))
+    [('f', 'a'), ('g', 'a*b'), ('h', 'a*b')]
+    >>> bfs[1]._min_sop
+    'a*b'
+    """
+    # Planned here, as the espresso results are cached apart from the others
+    methods = {id(bf) : bf._min_sop_method(method) for bf in bfs}
+
+    def size(bf):
+        cubes = len(bf._cover) if bf._cover is not None else \
+                len(bf.minterms())
+        return len(bf._variables), cubes
+    todo = sorted(bfs, key = size, reverse = True)
+    done = set()
+    limits = {'time_budget' : time_budget, 'max_implicants' : max_implicants}
+
+    memory = _memory.worker_bytes(workers)
+    pool = concurrent.futures.ProcessPoolExecutor(workers, \
+                                                  initializer = _worker_init, \
+                                                  initargs = (memory,))
+    broken = False
+    try:
+        futures = {}
+        for bf in todo:
+            futures[pool.submit(_min_sop_worker, bf, methods[id(bf)], \
+                                limits)] = bf
+        for future in concurrent.futures.as_completed(futures):
+            bf = futures[future]
+            try:
+                expression, optimal, kept = future.result()
+            except concurrent.futures.process.BrokenProcessPool:
+                broken = True
+                break
+            except Exception as error:
+                done.add(id(bf))
+                yield bf, error
+                continue
+            done.add(id(bf))
+            yield bf, _adopt_min_sop(bf, methods[id(bf)], expression, \
+                                     optimal, kept)
+    finally:
+        pool.shutdown(cancel_futures = True)
+
+    if broken:
+        # Some BF crashed its process, which broke the pool. Which one isn't
+        # known, so the rest go one by one
+        for bf in todo:
+            if id(bf) in done: continue
+            single = concurrent.futures.ProcessPoolExecutor(1, \
+                                                  initializer = _worker_init, \
+                                                  initargs = (memory,))
+            try:
+                expression, optimal, kept = single.submit(_min_sop_worker, \
+                    bf, methods[id(bf)], limits).result()
+            except Exception as error:
+                yield bf, error
+                continue
+            finally:
+                single.shutdown()
+            yield bf, _adopt_min_sop(bf, methods[id(bf)], expression, \
+                                     optimal, kept)
+
+def planner():
+    """
+    Returns the Planner picking the engines of the BF operations, to read its
+    decisions or override them for the session.
+
+    >>> f = BF("f(a,b,c) = a*b + c")
+    >>> planner().override("count", "packed")
+    >>> f.count(), planner().decisions(1)[0].engine
+    (5, 'packed')
+    >>> planner().override("count")
+    """
+    return _planner
+
+def memory_budget():
+    """
+    Returns the MemoryBudget of the session (see memory.py), to read what
+    the BFs hold or change its limits: operation and session, in bytes
+    (None for no limit).
+
+    >>> budget = memory_budget()
+    >>> budget.operation = 2 ** 20
+    >>> try: BF("f(a,b,c,d,e,f,g,h,i,j,k,l,m) = a % b")
+    ... except MemoryBudgetError as error: print(error)
+    The truth table of f: about 1.25 MB needed, 1 MB of the memory budget \
+left
+    >>> f = BF("f(a,b,c,d,e,f,g,h,i,j,k,l,m) = a*~b + ~a*b")
+    >>> f.count(), f._table is None
+    (4096, True)
+    >>> budget.operation = OPERATION_BYTES
+    """
+    return _memory
+
+def disk_cache():
+    """
+    Returns the DiskCache in use (see use_disk_cache), or None.
+    """
+    return _disk_cache
+
+def min_sop_multi(bfs, node_limit = NODE_LIMIT, time_limit = None):
+    """
+    Minimises several BFs together, sharing the product terms between them
+    (e.g. the outputs of a decoder or an adder). All the BFs are taken over
+    the union of their variables. Returns the list of the minimised BFs, in
+    the same order.
+
+    The multiple-output primes are found by consensus on the cubes of all the
+    BFs, tagged with the BFs they belong to (see cubes.multi_primes). A tagged
+    prime covers the minterms of all its BFs, so one chart with a column for
+    every (minterm, BF) pair is solved by covering.min_cover. A shared term
+    costs just once, so the total # of distinct terms is minimised (then the #
+    of literals). Finally the terms not needed by a BF are dropped from it.
+
+    If there are too many primes (see CONSENSUS_LIMIT), or more than
+    CHART_LIMIT columns, the BFs are minimised separately with min_sop. Like
+    the chart running out of node_limit or time_limit, the is_optimal() method
+    of the returned BFs then gives False.
+
+    Separately, f = ~a*b + b*c and g = a*~b + a*c need 4 terms. Together they
+    need 3, sharing a*b*c:
+    >>> sorted(min_sop_multi([BF("f = a*b*c + ~a*b")])[0].cover().strings())
+    ['-11', '01-']
+    >>> f, g = min_sop_multi([BF("f = a*b*c + ~a*b"), BF("g = a*b*c + a*~b")])
+    >>> sorted(f.cover().strings()), sorted(g.cover().strings())
+    (['01-', '111'], ['10-', '111'])
+    """
+    variables = sorted(set(var for bf in bfs for var in bf.variables()))
+    n = len(variables)
+
+    covers = [bf.cover_over(variables) for bf in bfs]
+    dcs = [bf._widen(bf.dc_cover(), variables) for bf in bfs]
+    tagged = []
+    for j in range(len(bfs)):
+        tagged += [(cube, 1 << j) for cube in covers[j].union(dcs[j])]
+    primes = multi_primes(tagged, n, CONSENSUS_LIMIT, CONSENSUS_TIME)
+
+    # Giving every (minterm, BF) pair a column in the chart. The don't cares
+    # don't need covering
+    column = {}
+    if primes is not None:
+        for j in range(len(bfs)):
+            for minterm in covers[j].sharp(dcs[j]).minterms():
+                column[(minterm, j)] = len(column)
+                if len(column) > CHART_LIMIT: break
+            if len(column) > CHART_LIMIT: break
+
+    if primes is None or len(column) > CHART_LIMIT:
+        # Too big to solve together
+        rv = []
+        for bf in bfs:
+            bf = bf.min_sop()
+            bf._optimal = False
+            rv.append(bf)
+        return rv
+
+    rows = []
+    for cube, outputs in primes:
+        row = 0
+        for minterm in cube_minterms(cube, n):
+            for j in range(len(bfs)):
+                if outputs >> j & 1 and (minterm, j) in column:
+                    row |= 1 << column[(minterm, j)]
+        rows.append(row)
+
+    # Same costs as in solve_chart: fewer terms, then fewer literals
+    term_cost = n * len(primes) + 1
+    costs = [term_cost + literals(cube, n) for cube, outputs in primes]
+    chosen, optimal = min_cover(rows, (1 << len(column)) - 1, costs, \
+                                node_limit, time_limit)
+
+    rv = []
+    for j in range(len(bfs)):
+        cubes = [primes[i][0] for i in chosen if primes[i][1] >> j & 1]
+        cubes = irredundant(cubes, dcs[j].cubes(), n)
+        bf = BF.from_cover(Cover(cubes, n), variables, "%s_min_sop" \
+                           %bfs[j].name(), dcs[j])
+        bf._optimal = optimal
+        rv.append(bf)
+    return rv
 
 def form_function(epis, vars):
     """
@@ -872,47 +2661,49 @@ def find_ones_pi(pi):
 
 
 # Copying the methods as functions to make the module more user friendly
-def bf_not(bf):
+# The engine of these is picked by the planner, unless it is given (see
+# planner.py)
+def bf_not(bf, engine = None):
     """
     Returns a not version of the boolean function passed in.
     """
-    return bf.bf_not()
+    return bf.bf_not(engine)
 
-def nor(bf1, bf2):
+def nor(bf1, bf2, engine = None):
     """
     Returns a NOR-ed version of the boolean functions passed in.
     """     
-    return bf1.nor(bf2)
+    return bf1.nor(bf2, engine)
 
-def nand(bf1, bf2):
+def nand(bf1, bf2, engine = None):
     """
     Returns a NAND-ed version of the boolean functions passed in.
     """     
-    return bf1.nand(bf2)
+    return bf1.nand(bf2, engine)
 
-def equal(bf1, bf2):
+def equal(bf1, bf2, engine = None):
     """
     Checks if the two BFs are equivalent
     """
-    return bf1 == bf2
+    return bf1.equals(bf2, engine)
     
-def bf_or(bf1, bf2):
+def bf_or(bf1, bf2, engine = None):
     """
     Does the boolean OR operation and returns the resulting function (without 
     simplifying)
     """
-    return bf1 + bf2
+    return bf1._combine("or", bf2, engine)
 
-def bf_and(bf1, bf2):
+def bf_and(bf1, bf2, engine = None):
     """
     Does the boolean AND operation and returns the resulting function (without 
     simplifying)
     """
-    return bf1*bf2
+    return bf1._combine("and", bf2, engine)
     
-def xor(bf1, bf2):
+def xor(bf1, bf2, engine = None):
     """
     Does the boolean XOR operation and returns the resulting function (without 
     simplifying)
     """
-    return bf1%bf2
\ No newline at end of file
+    return bf1._combine("xor", bf2, engine)
\ No newline at end of file
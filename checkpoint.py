@@ -0,0 +1,104 @@
+"""
+The checkpoint module. Saves the state of a long minimisation to a file from
+time to time, so that a later run can resume it after a crash, a reboot or
+Ctrl-C, and end with the same result as if it had never stopped.
+
+The state is made of named parts, saved by the stages of the minimisation
+as they go (see BF.min_sop):
+- "qm"    : the current implicant level and the primes found so far (see
+            qm.qm_primes)
+- "primes": all the primes, once they are found
+- "search": the frontier of the covering search, and the best cover found
+            so far (see covering.min_cover)
+
+The file is compressed JSON. It also holds a key identifying the function,
+so that the checkpoint of a function is never resumed for another one. It
+is written to a temporary file first, which then replaces the old one, so a
+crash while saving leaves the previous checkpoint intact.
+"""
+
+import gzip, json, os, time
+
+# The # of seconds between 2 saves of a stage (when it's due)
+INTERVAL = 60
+
+class CheckpointError(Exception):
+    """
+    Handles the exceptions concerning checkpoints that can't be resumed.
+    """
+    pass
+
+class Checkpoint:
+    """
+    The checkpoint file of one function.
+
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), "f.ckpt")
+    >>> ck = Checkpoint(path, (3, "e8"))
+    >>> ck.load() is None
+    True
+    >>> ck.save(primes = [3, 12])
+    >>> ck.save(search = {"nodes": 10})
+    >>> Checkpoint(path, (3, "e8")).load() == {"primes": [3, 12], \
+                                               "search": {"nodes": 10}}
+    True
+    >>> try: Checkpoint(path, (3, "e9")).load()
+    ... except CheckpointError: print("Not resumed")
+    Not resumed
+    """
+
+    def __init__(self, path, key, interval = INTERVAL):
+        self.path = path
+        # As it comes back from JSON (tuples become lists)
+        self.key = json.loads(json.dumps(key))
+        self.interval = interval
+        self.state = {}
+        self._saved = time.time()
+
+    def load(self):
+        """
+        Reads the saved state (a dictionary of parts). Returns None if there
+        is no checkpoint yet. Raises CheckpointError if the file is of
+        another function, or isn't a checkpoint.
+        """
+        if not os.path.exists(self.path): return None
+        try:
+            with gzip.open(self.path, "rt") as stream:
+                data = json.load(stream)
+            key, state = data["key"], data["state"]
+        except (OSError, ValueError, KeyError, TypeError):
+            raise CheckpointError("%s isn't a checkpoint" %self.path)
+        if key != self.key:
+            raise CheckpointError("The checkpoint %s is for another function" \
+                                  %self.path)
+        self.state = state
+        return state
+
+    def due(self):
+        """
+        Returns True if the last save was more than interval seconds ago.
+        """
+        return time.time() - self._saved >= self.interval
+
+    def save(self, **parts):
+        """
+        Sets the given parts of the state (a part set to None is removed),
+        and writes the whole state to the file.
+        """
+        for name in parts:
+            if parts[name] is None: self.state.pop(name, None)
+            else: self.state[name] = parts[name]
+
+        temp = self.path + ".tmp"
+        with gzip.open(temp, "wt") as stream:
+            json.dump({"key" : self.key, "state" : self.state}, stream, \
+                      separators = (",", ":"))
+        os.replace(temp, self.path)
+        self._saved = time.time()
+
+    def remove(self):
+        """
+        Deletes the file, once the minimisation is over.
+        """
+        if os.path.exists(self.path): os.remove(self.path)
+        self.state = {}
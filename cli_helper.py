@@ -4,7 +4,8 @@ Developed by: Udey Rishi, 2014
 """
 
 from boolfunc import *
-import sys, copy, os
+from pla import *
+import sys, copy, os, sqlite3
 
 class bcolors:
     """
@@ -39,10 +40,21 @@ endc = bcolors.ENDC
 
 # Stores all the created boolean functions mapped to their function name.
 _workspace = {}
+# The NPN index of the workspace, for match: maps the BF names to (the BF, its
+# NPN key), and the NPN keys to the set of BF names having them. Brought up to
+# date lazily, so only the BFs created/replaced since the last match are
+# canonicalised
+_npn_index = {}
+_npn_classes = {}
 # _varspace is just like _workspace, excpet it stores variables used by other BFs
 # as BFs
 _varspace = {}
 
+# The suffixes of the names of the BFs made from others by the minimisation
+# and expansion commands
+RESULT_SUFFIXES = ("_min_sop", "_min_pos", "_min_esop", "_min_expand", \
+                   "_max_expand")
+
 # Internal functions
 def printc(text, colour = output, term = "\n"):
     """
@@ -72,15 +84,18 @@ def execute(command, args):
     func = command_list[command] 
 
     if len(args.split()) not in arg_len[command] and \
-        command not in ["def", "equal", "or", "and", "xor", "nor", "nand"]:
+        command not in ["def", "equal", "or", "and", "xor", "nor", "nand", \
+                        "save", "minimise"]:
         # These commands don't have a fixed acceptable arguement length 
         printc("Invalid Syntax. Too many or too few arguments.", fail)
 
-    elif len(args) > 0:
-        func(args)
-    
     else:
-        func()
+        # Any command can need more memory than the budget allows
+        try:
+            if len(args) > 0: func(args)
+            else: func()
+        except MemoryBudgetError as error:
+            printc("%s. See help memory." %error, fail)
 
 def operator(args):
     """
@@ -266,6 +281,9 @@ def create_BF(function):
         function = "%s%s = %s" %(func_name, func_vars if (len(func_vars) > 1) \
                    else ("(%s)" %func_vars[0]), func_exp)
         function = function.replace("'", "")
+        if not vars_used:
+            # Keeping the don't cares. They are over the same variables
+            function += func._dc_clause()
         func = BF(function)
 
         if not test:
@@ -323,7 +341,9 @@ def create_BF(function):
         func._name = func_name # Changing the name of the BF
         _workspace[func_name] = func # Adding to workspace
         printc(func, blue) # Displaying the output as a confirmation
-    
+
+    except MemoryBudgetError as error:
+        printc("%s. See help memory." %error, fail)
     except:
         printc("Please check the syntax.", fail)
     
@@ -498,6 +518,16 @@ def maxterms_l(name):
     else:
         printc("BF '%s'does not exist in the workspace" %name, fail)
          
+def dont_cares(name):
+    """
+    Given a BF, returns the don't cares.
+    """
+    if name in _workspace:
+        dcs = _workspace[name].dont_cares()
+        printc(", ".join(str(i) for i in dcs) if dcs else "None")
+    else:
+        printc("BF '%s'does not exist in the workspace" %name, fail)
+
 def BF_variables(name):
     """
     Given a BF name, returns the variables used in it.
@@ -525,16 +555,42 @@ def truth_table(name):
         variables = variables[:-1] # Removing the extra -
         printc("%s : Value" %variables, blue)
 
-        # Generating the table
-        table = _workspace[name].truthtable()
-        # For sorting the result
-        table_keys = list(table.keys())
-        table_keys.sort(key = lambda x: int(x,2))
-        for i in table_keys:
-            printc("%s : %s" %(i, table[i]))
+        # Printing the rows as they are made, so that the tt of a big BF
+        # doesn't have to fit in the memory
+        for row, value in _workspace[name].iter_truthtable():
+            printc("%s : %s" %(row, value))
     else:
         printc("BF '%s'does not exist in the workspace" %name, fail)
          
+def spectrum(args):
+    """
+    Prints the influence of every variable of the BF, its average
+    sensitivity and its correlation immunity (see BF.influence). With walsh
+    or autocorrelation as the second argument, prints the nonzero values of
+    that instead.
+    """
+    arg_list = args.split()
+    name = arg_list[0]
+    if name not in _workspace:
+        printc("%s is not a BF in workspace" %name, fail)
+        return
+    func = _workspace[name]
+
+    if len(arg_list) == 1:
+        influence = func.influence()
+        for var in func.variables():
+            printc("%s : %.4g" %(var, influence[var]))
+        printc("Average sensitivity: %.4g" %sum(influence.values()), blue)
+        printc("Correlation immunity: %d" %func.correlation_immunity(), blue)
+    elif arg_list[1] in ["walsh", "autocorrelation"]:
+        values = func.walsh_spectrum() if arg_list[1] == "walsh" else \
+                 func.autocorrelation()
+        n = len(func.variables())
+        for i in range(len(values)):
+            if values[i]: printc("%s : %d" %(bin_conv(i, n), values[i]))
+    else:
+        printc("Invalid Syntax. See help spectrum.", fail)
+
 # Operations
 def equal(args, i = None):
     """
@@ -707,18 +763,222 @@ def sub(args):
             printc("%s does not exist in the truthtable of %s" \
                   %(tt_value,function), fail)    
 
-def minimise(function):
+def edit(args):
     """
-    Returns the minimised sop form of the function.
+    Sets rows of a BF to 1, 0 or don't care: the options on=<rows>,
+    off=<rows> and dc=<rows>, rows being comma separated minterm #s. The BF
+    is replaced in the workspace by the edited one, which starts its
+    minimisation from the results of the old one (see BF.edit).
     """
-    if function.split()[0] in _workspace:
-        # Find the min BF, and add it to the workspace
-        rv = _workspace[function.split()[0]].min_sop()
-        create_BF(rv._print())
+    arg_list = args.split()
+    name = arg_list[0]
+    if name not in _workspace:
+        printc("%s is not a BF in workspace" %name, fail)
+        return
+
+    rows = {"on" : [], "off" : [], "dc" : []}
+    try:
+        for arg in arg_list[1:]:
+            key, value = arg.split("=")
+            rows[key] += [int(i) for i in value.split(",") if i]
+    except (ValueError, KeyError):
+        printc("Invalid option %s. Use on=, off= or dc=." %arg, fail)
+        return
+
+    try:
+        func = _workspace[name].edit(**rows)
+    except InvalidBooleanFunctionError as error:
+        printc(error, fail)
+        return
+    _workspace[name] = func
+    printc(func, blue)
+
+def _limits(arg_list):
+    """
+    Helper for minimise and minimise_all. Removes the options time=<seconds>,
+    implicants=<#> and checkpoint=<file> from arg_list, and returns them as
+    the keyword arguments of min_sop. Returns None if an option is invalid.
+    """
+    limits = {}
+    names = {'time' : ('time_budget', float), \
+             'implicants' : ('max_implicants', int), \
+             'checkpoint' : ('checkpoint', str)}
+    for arg in [i for i in arg_list if "=" in i]:
+        arg_list.remove(arg)
+        option, value = arg.split("=", 1)
+        if option not in names: return None
+        keyword, kind = names[option]
+        try:
+            limits[keyword] = kind(value)
+        except ValueError:
+            return None
+        if kind != str and limits[keyword] < 0: return None
+    return limits
+
+def minimise(args):
+    """
+    Returns the minimised sop form of the function(s). An optional last
+    argument picks the method: qm, parallel, external or espresso (by default
+    the planner picks it, see plan).
+    Several functions are minimised at the same time (see _minimise_many).
+    The options time=<seconds> and implicants=<#> limit the search, and
+    checkpoint=<file> saves its progress (see BF.min_sop).
+    """
+    arg_list = args.split()
+    limits = _limits(arg_list)
+    method = None
+    if len(arg_list) > 1 and arg_list[-1] in ['qm', 'parallel', 'external', \
+                                              'espresso']:
+        method = arg_list.pop()
+    if len(arg_list) == 0 or limits is None:
+        printc("Invalid Syntax. Too many or too few arguments.", fail)
+        return
+    if len(arg_list) > 1:
+        if 'checkpoint' in limits:
+            printc("A checkpoint is for a single BF.", fail)
+            return
+        _minimise_many(arg_list, method, limits)
+        return
+    function = arg_list[0]
+
+    if function in _workspace:
+        # Find the min BF, and add it to the workspace. Ctrl-C stops the
+        # search, giving the best result found so far
+        try:
+            rv = _workspace[function].min_sop(method, **limits)
+            create_BF(rv._print())
+            if not rv.is_optimal():
+                printc("Note: the result is not proven to be the minimum.", blue)
+        except InvalidBooleanFunctionError as error:
+            printc(error, fail)
 
     else:
-        printc("%s is not a BF in workspace" %function.strip(), fail)
+        printc("%s is not a BF in workspace" %function, fail)
 
+
+def minimise_all(args = ""):
+    """
+    Minimises every BF in the workspace, except the results of the
+    minimisation commands (named ..._min_sop, ..._min_pos, see
+    RESULT_SUFFIXES) and the BFs whose ..._min_sop in the workspace is still
+    equal to them (not left over from before edit or load replaced them). An
+    optional argument picks the method, and the options of minimise can be
+    given too.
+    """
+    arg_list = args.split()
+    limits = _limits(arg_list)
+    if len(arg_list) > 1 or limits is None or 'checkpoint' in limits:
+        printc("Invalid Syntax. Too many or too few arguments.", fail)
+        return
+    method = arg_list[0] if arg_list else None
+    names = [i for i in sorted(_workspace) if not i.endswith(RESULT_SUFFIXES) \
+             and not _minimised(i)]
+    if not names:
+        printc("Nothing to minimise.")
+        return
+    _minimise_many(names, method, limits)
+
+def _minimised(name):
+    """
+    Helper for minimise_all. Returns True if the ..._min_sop of the BF name
+    is in the workspace, and is the same function as the BF.
+    """
+    result = _workspace.get("%s_min_sop" %name)
+    if result is None: return False
+    try:
+        return result == _workspace[name]
+    except MemoryBudgetError:
+        # Can't tell: minimised again
+        return False
+
+def _minimise_many(names, method, limits):
+    """
+    Helper for minimise and minimise_all. Minimises the BFs on all the cores
+    (see min_sop_many), printing every result as soon as it's found. A BF
+    failing (or crashing its process) is reported, and the others go on.
+    """
+    for name in names:
+        if name not in _workspace:
+            printc("%s is not a BF in workspace" %name, fail)
+            return
+
+    by_id = {id(_workspace[i]) : i for i in names}
+    try:
+        for func, rv in min_sop_many([_workspace[i] for i in names], method, \
+                                     **limits):
+            name = by_id[id(func)]
+            if isinstance(rv, Exception):
+                printc("%s: %s" %(name, rv if str(rv) else \
+                                  type(rv).__name__), fail)
+                continue
+            create_BF(rv._print())
+            if not rv.is_optimal():
+                printc("Note: %s_min_sop is not proven to be the minimum." \
+                       %name, blue)
+    except InvalidBooleanFunctionError as error:
+        printc(error, fail)
+
+def minimise_pos(args):
+    """
+    Returns the minimised pos form of the function. An optional second
+    argument picks the method: qm or espresso (by default the planner picks
+    it, see plan).
+    """
+    arg_list = args.split()
+    function = arg_list[0]
+    method = arg_list[1] if len(arg_list) > 1 else None
+
+    if function in _workspace:
+        try:
+            rv = _workspace[function].min_pos(method)
+            create_BF(rv._print())
+            if not rv.is_optimal():
+                printc("Note: the result is not proven to be the minimum.", blue)
+        except InvalidBooleanFunctionError as error:
+            printc(error, fail)
+
+    else:
+        printc("%s is not a BF in workspace" %function, fail)
+
+def minimise_esop(function):
+    """
+    Returns a small exclusive-or sum of products of the function (see
+    BF.min_esop).
+    """
+    function = function.strip()
+    if function in _workspace:
+        try:
+            create_BF(_workspace[function].min_esop()._print())
+            printc("Note: the result is not proven to be the minimum.", blue)
+        except InvalidBooleanFunctionError as error:
+            printc(error, fail)
+
+    else:
+        printc("%s is not a BF in workspace" %function, fail)
+
+def minimise_both(args):
+    """
+    Returns both the minimised sop and pos forms of the function, and tells
+    which one is cheaper. An optional second argument picks the method.
+    """
+    arg_list = args.split()
+    function = arg_list[0]
+    method = arg_list[1] if len(arg_list) > 1 else None
+
+    if function in _workspace:
+        try:
+            sop, pos, best = _workspace[function].min_both(method)
+            create_BF(sop._print())
+            create_BF(pos._print())
+            printc("%s is cheaper." %("SOP" if best is sop else "POS"), blue)
+            if not sop.is_optimal() or not pos.is_optimal():
+                printc("Note: the results are not proven to be the minimum.", \
+                       blue)
+        except InvalidBooleanFunctionError as error:
+            printc(error, fail)
+
+    else:
+        printc("%s is not a BF in workspace" %function, fail)
          
 def num_ones(arg):
     """
@@ -768,7 +1028,219 @@ def binary(arg):
         printc(bin_conv(int(number, int(base)), int(bits)))
     except ValueError:
         printc("Value is not a number!", fail)       
+
+# PLA files
+def load(path):
+    """
+    Loads the BFs (one per output) from a PLA file into the workspace.
+    """
+    try:
+        bfs = load_pla(path).bfs()
+    except (IOError, ValueError, PLAError) as error:
+        printc(error, fail)
+        return
+
+    for func in bfs:
+        func_name = func.name()
+        if func_name in _varspace:
+            printc("%s is a defined variable, and can't be loaded as a BF." \
+                   %func_name, fail)
+            continue
+
+        for var in func.variables():
+            if var not in _varspace and var not in _workspace:
+                _varspace[var] = BF(var, var) # Creating x = x style BF
+
+        if func_name in _workspace:
+            printc("Replacing %s in workspace." %func_name, blue)
+        _workspace[func_name] = func
+
+        # The expression can be huge, so just a summary is shown
+        printc("%s: %d variables, %d cubes" %(func_name, \
+               len(func.variables()), len(func.cover())))
+
+def save(args = ""):
+    """
+    Saves BFs from the workspace to a PLA file.
+
+    arg1 = path, arg2... = BF names
+    """
+    arg_list = args.split()
+    if len(arg_list) < 2:
+        printc("Invalid Syntax. Too many or too few arguments.", fail)
+        return
+
+    path = arg_list[0]
+    for name in arg_list[1:]:
+        if name not in _workspace:
+            printc("%s is not a BF in workspace" %name, fail)
+            return
+
+    try:
+        save_pla(path, [_workspace[name] for name in arg_list[1:]])
+        printc("Saved to %s" %path, blue)
+    except IOError as error:
+        printc(error, fail)
          
+# NPN matching
+def _npn_key(func):
+    """
+    Returns the NPN key of the BF: (# of variables, canonical tt), see
+    BF.npn_canonical. None if it has too many variables.
+    """
+    try:
+        return (len(func.variables()), func.npn_canonical()[0])
+    except InvalidBooleanFunctionError:
+        return None
+
+def _update_npn_index():
+    """
+    Brings the NPN index up to date with the workspace.
+    """
+    for name in list(_npn_index):
+        func, key = _npn_index[name]
+        if _workspace.get(name) is not func:
+            # Deleted, renamed or replaced
+            del _npn_index[name]
+            _npn_classes[key].discard(name)
+            if not _npn_classes[key]: del _npn_classes[key]
+
+    for name in _workspace:
+        if name not in _npn_index:
+            key = _npn_key(_workspace[name])
+            _npn_index[name] = (_workspace[name], key)
+            _npn_classes.setdefault(key, set()).add(name)
+
+def match(name):
+    """
+    Returns the BFs in the workspace that are the same as the given one up to
+    permuting and negating the inputs and negating the output.
+    """
+    if name not in _workspace:
+        printc("%s is not a BF in workspace" %name, fail)
+        return
+
+    _update_npn_index()
+    key = _npn_index[name][1]
+    if key is None:
+        printc("%s has too many variables." %name, fail)
+        return
+    matches = sorted(_npn_classes[key] - {name})
+    printc(", ".join(matches) if matches else "None")
+
+def classes(args = ""):
+    """
+    Groups the BFs in the workspace into classes of equal functions, or of
+    NPN equivalent ones (arg1 = npn). Prints the classes with more than one
+    BF.
+    """
+    if args.strip() not in ["", "npn"]:
+        printc("Invalid Syntax. See help classes.", fail)
+        return
+
+    names = sorted(_workspace)
+    try:
+        found = equivalence_classes([_workspace[i] for i in names], \
+                                    args.strip() == "npn")
+    except InvalidBooleanFunctionError as error:
+        printc(error, fail)
+        return
+
+    # The BFs are grouped as objects; their names are looked up by identity
+    name_of = {id(_workspace[i]) : i for i in names}
+    found = [c for c in found if len(c) > 1]
+    for c in found:
+        printc(", ".join(name_of[id(i)] for i in c))
+    if not found: printc("No two BFs are equivalent.")
+
+# Disk cache
+def cache(args = ""):
+    """
+    Manages the disk cache of results (see diskcache.py).
+
+    No args: shows its status, on [path]: uses the cache at path, off: stops
+    using it, clear: empties it.
+    """
+    arg_list = args.split()
+    current = disk_cache()
+
+    if arg_list == []:
+        if current is None: printc("The disk cache is off.")
+        else:
+            printc("%s: %d entries, %d/%d bytes" %(current.path, len(current), \
+                   current.size(), current.max_bytes))
+    elif arg_list[0] == "on":
+        path = arg_list[1] if len(arg_list) > 1 else DEFAULT_PATH
+        try:
+            use_disk_cache(path)
+            printc("Using the disk cache at %s" %path, blue)
+        except sqlite3.Error as error:
+            printc("Can't use the disk cache at %s: %s" %(path, error), fail)
+    elif arg_list[0] == "off" and len(arg_list) == 1:
+        use_disk_cache(None)
+        printc("The disk cache is off.", blue)
+    elif arg_list[0] == "clear" and len(arg_list) == 1:
+        if current is not None: current.clear()
+        printc("The disk cache is empty.", blue)
+    else:
+        printc("Invalid Syntax. See help cache.", fail)
+
+def plan(args = ""):
+    """
+    Shows or steers the engine planner (see planner.py).
+
+    No args: shows the overrides and the last decisions, <op> <engine>: uses
+    engine for op from now on, <op> auto: lets the planner pick again, clear:
+    forgets the decisions.
+    """
+    arg_list = args.split()
+    current = planner()
+
+    if arg_list == []:
+        for op, engine in sorted(current.overrides().items()):
+            printc("%s: %s (override)" %(op, engine), blue)
+        for decision in current.decisions(10):
+            printc(decision)
+    elif arg_list == ["clear"]:
+        current.clear()
+        printc("The planner log is empty.", blue)
+    elif len(arg_list) == 2:
+        op, engine = arg_list
+        try:
+            current.override(op, None if engine == "auto" else engine)
+        except PlanError as error:
+            printc(error, fail)
+            return
+        printc("%s: %s" %(op, engine), blue)
+    else:
+        printc("Invalid Syntax. See help plan.", fail)
+
+def memory(args = ""):
+    """
+    Shows or sets the memory budget (see memory.py).
+
+    No args: shows the limits and what the BFs hold, operation/session
+    <size>: sets a limit (e.g. 512M, 2G), operation/session off: removes it.
+    """
+    arg_list = args.split()
+    budget = memory_budget()
+
+    if arg_list == []:
+        printc("Per operation: %s, per session: %s, held by the BFs: %s" \
+               %(format_bytes(budget.operation), format_bytes(budget.session), \
+                 format_bytes(budget.used())))
+    elif len(arg_list) == 2 and arg_list[0] in ["operation", "session"]:
+        try:
+            size = None if arg_list[1] == "off" else parse_bytes(arg_list[1])
+        except ValueError:
+            printc("Invalid size %s. e.g. 512M, 2G or off." %arg_list[1], fail)
+            return
+        setattr(budget, arg_list[0], size)
+        printc("%s budget: %s" %(arg_list[0].capitalize(), \
+                                 format_bytes(size)), blue)
+    else:
+        printc("Invalid Syntax. See help memory.", fail)
+
 # DigiCAD CLI Variables:
 
 # Contains all the commands as objects
@@ -791,8 +1263,12 @@ command_list = { # Basic DigiCAD commands
                 'maxterms' : maxterms, 
                 'mintermsl' : minterms_l,
                 'maxtermsl' : maxterms_l, 
+                'dont_cares' : dont_cares,
+                'match' : match,
+                'classes' : classes,
                 'variables' : BF_variables,
                 'truthtable' : truth_table, 
+                'spectrum' : spectrum,
                 # Operations
                 'equal': equal, 
                 'or' : OR, 
@@ -806,10 +1282,21 @@ command_list = { # Basic DigiCAD commands
                 'min_exp' : min_exp,
                 'max_exp' : max_exp, 
                 'sub' : sub,
+                'edit' : edit,
                 'minimise' : minimise, 
+                'minimise_all' : minimise_all,
+                'minimise_pos' : minimise_pos,
+                'minimise_both' : minimise_both,
+                'minimise_esop' : minimise_esop,
                 'num_ones' : num_ones, 
                 'num_zeros' : num_zeros,
-                'binary' : binary
+                'binary' : binary,
+                # PLA files
+                'load' : load,
+                'save' : save,
+                'cache' : cache,
+                'plan' : plan,
+                'memory' : memory
                 } 
 
 # Stores how many arguments a command expects
@@ -830,8 +1317,12 @@ arg_len = {
             'maxterms' : [1], 
             'mintermsl' : [1],
             'maxtermsl' : [1], 
+            'dont_cares' : [1],
+            'match' : [1],
+            'classes' : [0, 1],
             'variables' : [1],
             'truthtable' : [1], 
+            'spectrum' : [1, 2],
             'equal': [], # don't care 
             'or' : [], # don't care ]
             'and' : [], # don't care  
@@ -843,10 +1334,20 @@ arg_len = {
             'min_exp' : [1],
             'max_exp' : [1], 
             'sub' : [2],
-            'minimise' : [1], 
+            'edit' : [2, 3, 4],
+            'minimise' : [], # don't care
+            'minimise_all' : [0, 1, 2, 3],
+            'minimise_pos' : [1, 2],
+            'minimise_both' : [1, 2],
+            'minimise_esop' : [1],
             'num_ones' : [1,2], 
             'num_zeros' : [2,3],
-            'binary' : [2,3]
+            'binary' : [2,3],
+            'load' : [1],
+            'save' : [], # don't care
+            'cache' : [0, 1, 2],
+            'plan' : [0, 1, 2],
+            'memory' : [0, 2]
         }
 
 # Contains the line numbers of the help documentation
@@ -856,30 +1357,44 @@ help_dict = {
             'help' : (43, 49),
             'workspace' : (52, 54),
             'gui' : (57, 62),
-            'def' : (65, 77),
-            'rename' : (241, 245),
-            'expression' : (80, 86), 
-            'display_BF' : (89,92),
-            'del' : (95,99),
-            'minterms' : (102,106),
-            'maxterms' : (109,113), 
-            'mintermsl' : (116,121),
-            'maxtermsl' : (124,129),
-            'variables' : (132,136),
-            'truthtable' : (139, 143), 
-            'equal': (146,151), 
-            'or' : (154,158),
-            'and' : (161,165),
-            'xor' : (168,172),
-            '~' : (175, 180),
-            'not' : (175,180), 
-            'nor' : (183,185),
-            'nand' : (188,190), 
-            'min_exp' : (193,195),
-            'max_exp' : (198,200), 
-            'sub' : (203,207),
-            'minimise' : (210,216), 
-            'num_ones' : (219,223), 
-            'num_zeros' : (226,231),
-            'binary' : (234,239)
+            'def' : (65, 81),
+            'rename' : (309, 313),
+            'expression' : (84, 90), 
+            'display_BF' : (93, 96),
+            'del' : (99, 103),
+            'minterms' : (106, 110),
+            'maxterms' : (113, 117), 
+            'mintermsl' : (120, 125),
+            'maxtermsl' : (128, 133),
+            'dont_cares' : (336, 340),
+            'match' : (343, 350),
+            'classes' : (368, 378),
+            'edit' : (381, 393),
+            'cache' : (353, 365),
+            'variables' : (136, 140),
+            'truthtable' : (143, 147), 
+            'equal': (150, 155), 
+            'or' : (158, 162),
+            'and' : (165, 169),
+            'xor' : (172, 176),
+            '~' : (179, 184),
+            'not' : (179, 184), 
+            'nor' : (187, 189),
+            'nand' : (192, 194), 
+            'min_exp' : (197, 199),
+            'max_exp' : (202, 204), 
+            'sub' : (207, 211),
+            'minimise' : (214, 249), 
+            'minimise_all' : (252, 264),
+            'minimise_pos' : (266, 273),
+            'minimise_both' : (276, 284),
+            'num_ones' : (287, 291), 
+            'num_zeros' : (294, 299),
+            'binary' : (302, 307),
+            'load' : (316, 324),
+            'save' : (326, 333),
+            'plan' : (396, 409),
+            'memory' : (412, 427),
+            'minimise_esop' : (430, 442),
+            'spectrum' : (445, 461)
         }
@@ -0,0 +1,403 @@
+"""
+The covering module. Solves the unate covering problem that shows up in the
+second stage of two-level minimisation (the prime implicant chart): pick the
+cheapest set of rows (prime implicants) such that every column (minterm) is
+covered by at least one of the picked rows.
+
+The chart is stored as bitsets. rows[i] is an integer whose j'th bit is set
+iff row i covers column j. This makes the reductions below a handful of
+integer ANDs/ORs instead of list scans.
+
+Solving is done in two steps:
+1. The chart is reduced to its cyclic core by iterating the essential row,
+   row dominance, and column dominance reductions till nothing changes.
+2. The cyclic core is solved exactly by branch-and-bound. The lower bound at
+   every node comes from a maximal independent set of columns (columns that
+   share no rows need a different row each).
+
+The search is given a node budget and an optional time budget. If any of them
+is exceeded, the best cover found so far is returned. This is never worse than
+the greedy cover, which is computed first and used as the initial solution.
+
+A Budget shares one deadline (and a limit on the # of implicants) among all
+the stages of a minimisation. A search given a Budget can also be stopped by
+Ctrl-C, returning the best cover found so far as well.
+"""
+
+import time
+
+# Default number of branch-and-bound nodes explored before giving up on
+# proving optimality
+NODE_LIMIT = 100000
+
+class CoverError(Exception):
+    """
+    Handles the exceptions concerning covering charts that can't be covered.
+    """
+    pass
+
+class Budget:
+    """
+    The limits of an anytime minimisation: time_budget seconds from now, and
+    at most max_implicants implicants generated. Both optional. Every stage
+    of the minimisation checks them, and sets cut to True if it had to stop
+    early (or was interrupted by Ctrl-C): its result is then valid, but not
+    the best it could have found.
+
+    >>> budget = Budget(time_budget = 0, max_implicants = 10)
+    >>> budget.expired(), budget.too_many(11), budget.cut
+    (True, True, False)
+    """
+
+    def __init__(self, time_budget = None, max_implicants = None):
+        self.deadline = time.time() + time_budget if time_budget is not None \
+                        else None
+        self.max_implicants = max_implicants
+        self.cut = False
+
+    def left(self):
+        """
+        Returns the # of seconds left, or None if there's no time budget.
+        """
+        if self.deadline is None: return None
+        return max(0, self.deadline - time.time())
+
+    def expired(self):
+        """
+        Returns True if the time budget has run out.
+        """
+        return self.deadline is not None and time.time() > self.deadline
+
+    def too_many(self, implicants):
+        """
+        Returns True if that many implicants are over the limit.
+        """
+        return self.max_implicants is not None and \
+               implicants > self.max_implicants
+
+    def stop(self):
+        """
+        Makes the budget run out now (e.g. on Ctrl-C): the stages left only
+        do their cheapest work, like the greedy cover.
+        """
+        self.deadline = time.time()
+        self.cut = True
+
+def bits(n):
+    """
+    Given a bitset n, returns the list of the indices of the set bits in an
+    increasing order.
+
+    >>> bits(0)
+    []
+    >>> bits(10)
+    [1, 3]
+    """
+    rv = []
+    while n:
+        low = n & -n
+        rv.append(low.bit_length() - 1)
+        n ^= low
+    return rv
+
+def greedy_cover(rows, columns, costs = None):
+    """
+    Finds a cover of the columns (a bitset) using the rows greedily, by
+    repeatedly picking the row covering the most uncovered columns per unit
+    cost. Returns a sorted list of the row indices picked.
+
+    Raises CoverError if some column is not covered by any of the rows.
+
+    >>> greedy_cover([0b0011, 0b0110, 0b1100], 0b1111)
+    [0, 2]
+    """
+    if costs is None: costs = [1] * len(rows)
+
+    chosen = []
+    left = columns
+    while left:
+        best = None
+        best_gain = 0
+        for i in range(len(rows)):
+            gain = bin(rows[i] & left).count("1")
+            if gain == 0: continue
+            # Comparing gain/cost without the floating point division. Ties go
+            # to the cheaper row
+            if best is None or gain * costs[best] > best_gain * costs[i] or \
+               (gain * costs[best] == best_gain * costs[i] and \
+                costs[i] < costs[best]):
+                best = i
+                best_gain = gain
+
+        if best is None:
+            raise CoverError("Column(s) %s can't be covered" %bits(left))
+
+        chosen.append(best)
+        left &= ~rows[best]
+
+    # A later pick may have covered everything an earlier pick did
+    return sorted(_drop_redundant(rows, chosen, columns, costs))
+
+def _drop_redundant(rows, chosen, columns, costs):
+    """
+    Removes the rows from chosen that are not needed to cover the columns.
+    Tries to remove the most expensive rows first.
+    """
+    chosen = sorted(chosen, key = lambda x: (-costs[x], x))
+    i = 0
+    while i < len(chosen):
+        rest = 0
+        for j in chosen:
+            if j != chosen[i]: rest |= rows[j]
+        if columns & ~rest == 0:
+            chosen.pop(i)
+        else:
+            i += 1
+    return chosen
+
+def _column_rows(rows, active, remaining):
+    """
+    Transposes the chart. Returns a dictionary mapping every column in
+    remaining to a bitset of the active rows covering it.
+    """
+    col_rows = {}
+    for i in active:
+        for c in bits(rows[i] & remaining):
+            col_rows[c] = col_rows.get(c, 0) | (1 << i)
+    return col_rows
+
+def _reduce(rows, costs, active, remaining, chosen):
+    """
+    Applies the essential row, row dominance and column dominance reductions
+    till the chart stops changing (i.e. the cyclic core is reached).
+
+    Returns the reduced (active, remaining, chosen), or None if some column
+    can't be covered by the active rows anymore.
+    """
+    active = list(active)
+    chosen = list(chosen)
+
+    changed = True
+    while changed and remaining:
+        changed = False
+
+        col_rows = _column_rows(rows, active, remaining)
+        if len(col_rows) != bin(remaining).count("1"):
+            # Some remaining column lost all its rows
+            return None
+
+        # Essential rows: the only row covering some column
+        essentials = set()
+        for c in col_rows:
+            if col_rows[c] & (col_rows[c] - 1) == 0:
+                essentials.add(col_rows[c].bit_length() - 1)
+        if essentials:
+            for i in essentials:
+                chosen.append(i)
+                remaining &= ~rows[i]
+            active = [i for i in active if i not in essentials]
+            changed = True
+            continue
+
+        # Row dominance: row i can go if some other row covers everything
+        # it covers (of what is remaining) at no extra cost
+        useful = [(rows[i] & remaining, i) for i in active if rows[i] & remaining]
+        kept = []
+        for ri, i in useful:
+            dominated = False
+            for rj, j in useful:
+                if j == i or ri & ~rj: continue
+                if costs[j] < costs[i] or (costs[j] == costs[i] and \
+                   (rj != ri or j < i)):
+                    dominated = True
+                    break
+            if not dominated: kept.append(i)
+        if len(kept) != len(active):
+            active = kept
+            changed = True
+            continue
+
+        # Column dominance: if every row covering column d also covers c,
+        # then covering d covers c. So c can be ignored
+        by_rows = {}
+        for c in col_rows:
+            # Identical columns: keep just one of them
+            if col_rows[c] in by_rows: remaining &= ~(1 << c)
+            else: by_rows[col_rows[c]] = c
+        distinct = sorted(by_rows, key = lambda x: bin(x).count("1"))
+        for k in range(len(distinct)):
+            for l in range(k):
+                if distinct[l] & ~distinct[k] == 0 and \
+                   remaining >> by_rows[distinct[l]] & 1:
+                    remaining &= ~(1 << by_rows[distinct[k]])
+                    break
+        if bin(remaining).count("1") != len(col_rows):
+            changed = True
+
+    return active, remaining, chosen
+
+def _lower_bound(rows, costs, active, remaining):
+    """
+    Finds a lower bound on the cost of covering the remaining columns.
+    Columns that share no rows (an independent set) need different rows, so
+    the sum of their cheapest rows' costs is a lower bound.
+    """
+    col_rows = _column_rows(rows, active, remaining)
+    taken = 0
+    bound = 0
+    for c in sorted(col_rows, key = lambda x: (bin(col_rows[x]).count("1"), x)):
+        if col_rows[c] & taken == 0:
+            taken |= col_rows[c]
+            bound += min(costs[i] for i in bits(col_rows[c]))
+    return bound
+
+def min_cover(rows, columns, costs = None, node_limit = NODE_LIMIT, \
+              time_limit = None, budget = None, checkpoint = None, \
+              initial = None):
+    """
+    Finds a minimum cost cover of the columns (a bitset) using the rows (list
+    of bitsets). costs[i] is the cost of picking row i (1 by default).
+
+    Returns (sorted list of the row indices picked, optimal), where optimal is
+    False iff the search ran out of its node_limit or time_limit (seconds)
+    before proving the answer optimal.
+
+    With a budget (see Budget), its deadline applies too, and Ctrl-C stops
+    the search instead of raising KeyboardInterrupt. budget.cut is set if
+    either of them cut the search short:
+    >>> budget = Budget(time_budget = 0)
+    >>> min_cover([0b011, 0b110, 0b100, 0b001], 0b111, budget = budget)
+    ([0, 1], False)
+    >>> budget.cut
+    True
+
+    With a checkpoint (see checkpoint.py), the search frontier, the best
+    cover so far and the # of nodes explored are saved as its "search" part
+    when a save is due, and when the search stops early. If the checkpoint
+    holds a "search" part, the search resumes from it, and ends as it would
+    have without stopping.
+
+    initial is a cover (list of row indices) known beforehand, e.g. a
+    repaired old cover. It's the starting point instead of the greedy cover
+    if it's cheaper, so the search prunes more from the start:
+    >>> rows = [0b01110, 0b01101, 0b01011, 0b11100]
+    >>> min_cover(rows, 0b11111, node_limit = 0)
+    ([0, 1, 3], False)
+    >>> min_cover(rows, 0b11111, node_limit = 0, initial = [3, 2])
+    ([2, 3], False)
+
+    Raises CoverError if some column is not covered by any of the rows.
+
+    The cyclic chart below has no essential rows and no dominance; both
+    3 row covers are found by branching:
+    >>> min_cover([0b000011, 0b000110, 0b001100, 0b011000, 0b110000, \
+                   0b100001], 0b111111)
+    ([0, 2, 4], True)
+
+    >>> min_cover([0b0111, 0b0001, 0b0110, 0b1000], 0b1111, [3, 1, 1, 1])
+    ([1, 2, 3], True)
+
+    >>> min_cover([0b01], 0b11)
+    Traceback (most recent call last):
+    ...
+    covering.CoverError: Column(s) [1] can't be covered
+    """
+    if costs is None: costs = [1] * len(rows)
+
+    if columns == 0:
+        return [], True
+
+    # Depth first search with an explicit stack. A node is the active rows,
+    # the remaining columns and the rows chosen so far
+    if checkpoint is not None and "search" in checkpoint.state:
+        saved = checkpoint.state["search"]
+        stack = [tuple(i) for i in saved["stack"]]
+        best = saved["best"]
+        nodes = saved["nodes"]
+    else:
+        # The greedy cover is the starting point (and the fallback)
+        best = greedy_cover(rows, columns, costs)
+        if initial is not None:
+            covered = 0
+            for i in initial: covered |= rows[i]
+            if columns & ~covered == 0 and sum(costs[i] for i in initial) < \
+               sum(costs[i] for i in best):
+                best = sorted(set(initial))
+        stack = [(list(range(len(rows))), columns, [])]
+        nodes = 0
+    best_cost = sum(costs[i] for i in best)
+
+    deadline = time.time() + time_limit if time_limit is not None else None
+    if budget is not None and budget.deadline is not None:
+        deadline = budget.deadline if deadline is None else \
+                   min(deadline, budget.deadline)
+    optimal = True
+
+    def save():
+        checkpoint.save(search = {"stack" : stack, "best" : best, \
+                                  "nodes" : nodes})
+
+    try:
+        while stack:
+            if nodes >= node_limit or (deadline is not None and \
+                                       time.time() > deadline):
+                optimal = False
+                if checkpoint is not None: save()
+                break
+            if checkpoint is not None and checkpoint.due(): save()
+
+            # The node stays on the stack till it's done, and is replaced by
+            # its children (and counted) without a call in between, so that
+            # Ctrl-C never leaves it half done for the checkpoint
+            reduced = _reduce(rows, costs, *stack[-1])
+            if reduced is None:
+                del stack[-1]
+                nodes += 1
+                continue
+            active, remaining, chosen = reduced
+            cost = sum(costs[i] for i in chosen)
+
+            if remaining == 0:
+                if cost < best_cost:
+                    best, best_cost = sorted(chosen), cost
+                del stack[-1]
+                nodes += 1
+                continue
+
+            if cost + _lower_bound(rows, costs, active, remaining) >= \
+               best_cost:
+                # This branch can't do better
+                del stack[-1]
+                nodes += 1
+                continue
+
+            # Branching on the column with the fewest rows covering it. The
+            # k'th child picks the k'th row and drops rows 0..k-1, so no
+            # cover is explored twice
+            col_rows = _column_rows(rows, active, remaining)
+            column = min(col_rows, key = lambda x: \
+                         (bin(col_rows[x]).count("1"), x))
+            choices = sorted(bits(col_rows[column]), key = lambda x: \
+                             (-bin(rows[x] & remaining).count("1"), \
+                              costs[x], x))
+
+            children = []
+            dropped = set()
+            for i in choices:
+                children.append(([j for j in active if j != i and \
+                                  j not in dropped], remaining & ~rows[i], \
+                                 chosen + [i]))
+                dropped.add(i)
+            # Reversed, so that the most promising child is popped first
+            children.reverse()
+            stack[-1:] = children
+            nodes += 1
+    except KeyboardInterrupt:
+        if checkpoint is not None: save()
+        # Only an anytime search (with a budget) is stopped quietly
+        if budget is None: raise
+        budget.stop()
+        optimal = False
+    if not optimal and budget is not None and budget.expired():
+        budget.cut = True
+    return best, optimal
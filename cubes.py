@@ -0,0 +1,959 @@
+"""
+The cubes module. Provides the cube calculus used by the cover based
+algorithms (e.g. espresso.py).
+
+A cube (product term) over n variables is stored in the positional-cube
+notation, packed into a single int. Every variable gets 2 bits:
+    01 : the variable appears complemented   (PI string character '0')
+    10 : the variable appears uncomplemented (PI string character '1')
+    11 : the variable does not appear        (PI string character '-')
+    00 : no value is allowed, i.e. the cube is empty
+
+The variable at index i of the PI string (e.g. '10-1') is stored in the 2 bits
+starting at 2*(n-1-i). So bit position p of a minterm (as stored in BF) maps
+to the 2 bits starting at 2*p.
+
+With this, the cube operations become bitwise operations:
+intersection is AND, supercube is OR, and a is contained in b iff a & ~b == 0.
+
+A cover is a list of cubes, representing their OR.
+"""
+
+import time
+
+# Caches the masks made by lows, as they are needed in almost every operation
+_lows = {}
+
+def lows(n):
+    """
+    Returns the mask with the lower bit of every variable set (0101...01).
+
+    >>> bin(lows(3))
+    '0b10101'
+    """
+    if n not in _lows:
+        _lows[n] = int("01" * n, 2) if n else 0
+    return _lows[n]
+
+def full(n):
+    """
+    Returns the universal cube (all variables absent) over n variables.
+
+    >>> cube_to_string(full(3), 3)
+    '---'
+    """
+    return (1 << (2 * n)) - 1
+
+def cube_from_string(pi):
+    """
+    Converts a PI string (e.g. '10-1') into a cube.
+
+    >>> bin(cube_from_string('10-'))
+    '0b100111'
+    """
+    rv = 0
+    for c in pi:
+        rv <<= 2
+        if c == "0": rv |= 1
+        elif c == "1": rv |= 2
+        else: rv |= 3
+    return rv
+
+def cube_to_string(cube, n):
+    """
+    Converts a cube back into its PI string.
+
+    >>> cube_to_string(cube_from_string('10-1'), 4)
+    '10-1'
+    """
+    rv = ""
+    for p in range(n - 1, -1, -1):
+        rv += "?01-"[(cube >> (2 * p)) & 3]
+    return rv
+
+def minterm_cube(minterm, n):
+    """
+    Converts a numerical minterm into the cube containing just that minterm.
+
+    >>> cube_to_string(minterm_cube(5, 4), 4)
+    '0101'
+    """
+    rv = 0
+    for p in range(n):
+        rv |= (2 if (minterm >> p) & 1 else 1) << (2 * p)
+    return rv
+
+def is_empty(cube, n):
+    """
+    Checks if some variable of the cube has no allowed value.
+
+    >>> is_empty(cube_from_string('1-0'), 3)
+    False
+    >>> is_empty(cube_from_string('1-0') & cube_from_string('0--'), 3)
+    True
+    """
+    mask = lows(n)
+    return ((cube | (cube >> 1)) & mask) != mask
+
+def intersect(a, b, n):
+    """
+    Returns the intersection of the cubes a and b, None if it is empty.
+
+    >>> cube_to_string(intersect(cube_from_string('1--'), \
+                                 cube_from_string('-0-'), 3), 3)
+    '10-'
+    >>> intersect(cube_from_string('1--'), cube_from_string('0--'), 3)
+    """
+    rv = a & b
+    if is_empty(rv, n): return None
+    return rv
+
+def contains(a, b):
+    """
+    Checks if cube a contains cube b.
+
+    >>> contains(cube_from_string('1--'), cube_from_string('10-'))
+    True
+    >>> contains(cube_from_string('10-'), cube_from_string('1--'))
+    False
+    """
+    return b & ~a == 0
+
+def distance(a, b, n):
+    """
+    Returns the number of variables in which the cubes a and b conflict.
+
+    >>> distance(cube_from_string('10-'), cube_from_string('01-'), 3)
+    2
+    """
+    c = a & b
+    return n - bin((c | (c >> 1)) & lows(n)).count("1")
+
+def consensus(a, b, n):
+    """
+    Returns the consensus of the cubes a and b (the biggest cube contained in
+    a + b, that has a part in both of them), or None if they are not at a
+    distance of exactly 1.
+
+    >>> cube_to_string(consensus(cube_from_string('1-0'), \
+                                 cube_from_string('-11'), 3), 3)
+    '11-'
+    """
+    c = a & b
+    empty = ~(c | (c >> 1)) & lows(n)
+    if empty == 0 or empty & (empty - 1): return None
+    return c | empty | (empty << 1)
+
+def cofactor(cube, d, n):
+    """
+    Returns the cofactor of the cube w.r.t. the cube d, None if they don't
+    intersect.
+
+    >>> cube_to_string(cofactor(cube_from_string('10-'), \
+                                cube_from_string('1--'), 3), 3)
+    '-0-'
+    """
+    if is_empty(cube & d, n): return None
+    return cube | (full(n) & ~d)
+
+def cover_cofactor(cover, d, n):
+    """
+    Returns the cofactor of the cover w.r.t. the cube d.
+    """
+    rv = []
+    for cube in cover:
+        c = cofactor(cube, d, n)
+        if c is not None: rv.append(c)
+    return rv
+
+def supercube(cover):
+    """
+    Returns the smallest cube containing all the cubes of the cover.
+    """
+    rv = 0
+    for cube in cover:
+        rv |= cube
+    return rv
+
+def literals(cube, n):
+    """
+    Returns the number of literals in the cube.
+
+    >>> literals(cube_from_string('1-0-'), 4)
+    2
+    """
+    return n - bin(cube & (cube >> 1) & lows(n)).count("1")
+
+def cost(cover, n):
+    """
+    Returns the cost of a cover as (# of cubes, # of literals).
+    """
+    return (len(cover), sum(literals(cube, n) for cube in cover))
+
+def single_cube_containment(cover):
+    """
+    Removes the cubes that are contained in some other cube of the cover (and
+    the duplicates).
+
+    >>> single_cube_containment([cube_from_string(i) for i in \
+                                 ['10-', '1--', '1--', '0-1']]) == \
+        [cube_from_string('1--'), cube_from_string('0-1')]
+    True
+    """
+    # Bigger cubes first, so they are kept
+    ordered = sorted(set(cover), key = lambda x: -bin(x).count("1"))
+    rv = []
+    for cube in ordered:
+        for kept in rv:
+            if cube & ~kept == 0: break
+        else:
+            rv.append(cube)
+    return rv
+
+def _literal_counts(cover, n):
+    """
+    Returns two lists (zeros, ones) counting, for every variable (bit position),
+    the cubes in which it appears complemented/uncomplemented.
+    """
+    zeros = [0] * n
+    ones = [0] * n
+    mask = lows(n)
+    for cube in cover:
+        # Bits set at the lower bit of the complemented/uncomplemented
+        # variables. Only the literals are visited, not all the n variables
+        for lits, counts in ((cube & ~(cube >> 1) & mask, zeros), \
+                             ((cube >> 1) & ~cube & mask, ones)):
+            while lits:
+                low = lits & -lits
+                counts[low.bit_length() >> 1] += 1
+                lits ^= low
+    return zeros, ones
+
+def binate_select(cover, n):
+    """
+    Selects the splitting variable (bit position) for the recursive
+    algorithms: the most binate variable, i.e. the one appearing in both
+    phases in the most cubes. Returns None if the cover is unate.
+    """
+    zeros, ones = _literal_counts(cover, n)
+    best = None
+    for p in range(n):
+        if zeros[p] and ones[p]:
+            if best is None or zeros[p] + ones[p] > zeros[best] + ones[best]:
+                best = p
+    return best
+
+def _split_var(cover, n):
+    """
+    Selects the variable to split on: the most binate one, else the one with
+    the most literals. Returns None if no cube has a literal.
+    """
+    p = binate_select(cover, n)
+    if p is not None: return p
+    zeros, ones = _literal_counts(cover, n)
+    best = None
+    for p in range(n):
+        if zeros[p] + ones[p] and (best is None or \
+           zeros[p] + ones[p] > zeros[best] + ones[best]):
+            best = p
+    return best
+
+def _var_cubes(p, n):
+    """
+    Returns the 2 cubes x' and x for the variable at bit position p.
+    """
+    rest = full(n) & ~(3 << (2 * p))
+    return rest | (1 << (2 * p)), rest | (2 << (2 * p))
+
+def _unate_reduce(cover, n):
+    """
+    Unate reduction for the tautology check. A variable appearing in only one
+    phase can be set to the other phase: the cubes having it vanish, and the
+    rest are unchanged. So the cover is a tautology iff the cubes with none of
+    its unate variables are. Returns those cubes.
+    """
+    zeros, ones = _literal_counts(cover, n)
+    unate = 0
+    for p in range(n):
+        if zeros[p] + ones[p] and not (zeros[p] and ones[p]):
+            unate |= 3 << (2 * p)
+    if not unate: return cover
+    # Cubes that are '-' (11) in all the unate variables
+    return [cube for cube in cover if cube & unate == unate]
+
+def tautology(cover, n):
+    """
+    Checks if the cover is a tautology (i.e. evaluates to 1 everywhere), using
+    the unate recursive paradigm:
+    1. Leaves: the empty cover isn't a tautology, a cover with the universal
+       cube is, and so is none whose cubes hold less than 2^n minterms in all.
+    2. Unate reduction: the cubes with a unate variable are dropped (see
+       _unate_reduce). A unate cover is then left with the universal cube or
+       nothing.
+    3. The cover is split on the most binate variable, and both cofactors must
+       be tautologies.
+
+    >>> tautology([cube_from_string(i) for i in ['1-', '0-']], 2)
+    True
+    >>> tautology([cube_from_string(i) for i in ['1-', '01']], 2)
+    False
+    >>> tautology([cube_from_string(i) for i in ['1--', '01-', '001', '000']], 3)
+    True
+    >>> tautology([cube_from_string(i) for i in ['11-', '0-1', '-00', '1-1']], 3)
+    False
+    """
+    universe = full(n)
+    while True:
+        if not cover: return False
+        if universe in cover: return True
+
+        # Volume check: together the cubes must have at least 2^n minterms.
+        # A cube with k literals has 2^(n - k) of them
+        volume = 0
+        for cube in cover:
+            volume += 1 << (n - literals(cube, n))
+        if volume < 1 << n: return False
+
+        reduced = _unate_reduce(cover, n)
+        if len(reduced) == len(cover): break
+        cover = reduced
+
+    p = binate_select(cover, n)
+    if p is None: return False # Unreachable: a unate cover is reduced
+
+    for half in _var_cubes(p, n):
+        if not tautology(cover_cofactor(cover, half, n), n): return False
+    return True
+
+def covers(cover, cube, n):
+    """
+    Checks if the cover contains the cube entirely, i.e. if the cofactor of
+    the cover w.r.t. the cube is a tautology.
+
+    >>> covers([cube_from_string(i) for i in ['1-', '01']], \
+               cube_from_string('-1'), 2)
+    True
+    >>> covers([cube_from_string(i) for i in ['1-', '01']], \
+               cube_from_string('0-'), 2)
+    False
+    """
+    if any(cube & ~i == 0 for i in cover): return True # Single cube check
+    return tautology(cover_cofactor(cover, cube, n), n)
+
+def sharp(a, b, n):
+    """
+    Returns a # b, i.e. the part of cube a that is not in cube b, as a cover.
+
+    >>> [cube_to_string(i, 3) for i in sharp(full(3), \
+                                             cube_from_string('11-'), 3)]
+    ['-0-', '0--']
+    """
+    if is_empty(a & b, n): return [a]
+    rv = []
+    for p in range(n):
+        field = (a >> (2 * p)) & 3
+        rest = field & ~(b >> (2 * p)) & 3
+        if rest:
+            rv.append(a & ~(3 << (2 * p)) | (rest << (2 * p)))
+    return rv
+
+def disjoint_sharp(a, b, n):
+    """
+    Returns a # b as a cover of disjoint cubes (unlike sharp, whose cubes
+    overlap): every piece takes the part of a outside b in one variable, and
+    the part inside b in the variables before it.
+
+    >>> [cube_to_string(i, 3) for i in disjoint_sharp(full(3), \
+                                                      cube_from_string('11-'), 3)]
+    ['-0-', '01-']
+    """
+    if is_empty(a & b, n): return [a]
+    rv = []
+    for p in range(n):
+        field = (a >> (2 * p)) & 3
+        inside = field & (b >> (2 * p)) & 3
+        if field & ~inside:
+            rv.append(a & ~(3 << (2 * p)) | ((field & ~inside) << (2 * p)))
+            a = a & ~(3 << (2 * p)) | (inside << (2 * p))
+    return rv
+
+def sccc(cover, n):
+    """
+    Returns the smallest cube containing the complement of the cover, None if
+    the complement is empty. Cheaper than finding the complement itself.
+
+    >>> cube_to_string(sccc([cube_from_string('1-'), cube_from_string('01')], \
+                            2), 2)
+    '00'
+    >>> sccc([cube_from_string('1-'), cube_from_string('0-')], 2)
+    """
+    universe = full(n)
+    if not cover: return universe
+    for cube in cover:
+        if cube == universe: return None
+    if len(cover) == 1: return supercube(sharp(universe, cover[0], n))
+
+    p = _split_var(cover, n)
+    rv = 0
+    for half in _var_cubes(p, n):
+        part = sccc(cover_cofactor(cover, half, n), n)
+        if part is not None: rv |= part & half
+    return rv if rv else None
+
+def complement(cover, n):
+    """
+    Returns the complement of the cover, as a cover. Uses Shannon expansion
+    on the most binate variable, and De Morgan's law for single cube covers.
+
+    >>> sorted(cube_to_string(i, 2) for i in \
+               complement([cube_from_string('11')], 2))
+    ['-0', '0-']
+    >>> complement([full(2)], 2)
+    []
+    """
+    universe = full(n)
+    if not cover: return [universe]
+    for cube in cover:
+        if cube == universe: return []
+    if len(cover) == 1: return sharp(universe, cover[0], n)
+
+    p = _split_var(cover, n)
+    rv = []
+    for half in _var_cubes(p, n):
+        for cube in complement(cover_cofactor(cover, half, n), n):
+            rv.append(cube & half)
+
+    # Merging the 2 halves where they only differ in the split variable
+    merged = {}
+    for cube in rv:
+        key = cube | (3 << (2 * p))
+        merged[key] = merged.get(key, 0) | cube
+    return single_cube_containment(list(merged.values()))
+
+def widen(cube, columns, m, n):
+    """
+    Moves a cube over m variables into a cover over n >= m variables. The ith
+    variable (PI string index) goes to the index columns[i]; the other
+    variables are absent.
+
+    >>> cube_to_string(widen(cube_from_string('10'), [2, 0], 2, 3), 3)
+    '0-1'
+    """
+    rv = full(n)
+    for i in range(m):
+        field = (cube >> (2 * (m - 1 - i))) & 3
+        p = n - 1 - columns[i]
+        rv &= ~(3 << (2 * p)) | (field << (2 * p))
+    return rv
+
+def cube_minterms(cube, n):
+    """
+    Returns the list of the numerical minterms contained in the cube.
+
+    >>> cube_minterms(cube_from_string('1-0'), 3)
+    [4, 6]
+    """
+    # The base minterm has a 1 wherever the cube has an uncomplemented literal.
+    # The free variables then run through all their values
+    base = 0
+    free = []
+    for p in range(n):
+        field = (cube >> (2 * p)) & 3
+        if field == 2: base |= 1 << p
+        elif field == 3: free.append(p)
+
+    rv = []
+    for i in range(1 << len(free)):
+        minterm = base
+        for j in range(len(free)):
+            if (i >> j) & 1: minterm |= 1 << free[j]
+        rv.append(minterm)
+    return rv
+
+class Cover:
+    """
+    A sum-of-products cover over n variables: a list of cubes (see the module
+    docstring for the cube format). The operations work on the cubes, so
+    their cost depends on the size of the cover rather than on 2^n.
+
+    >>> a = Cover.from_strings(['1-'], 2)
+    >>> b = Cover.from_strings(['-1'], 2)
+    >>> a.union(b)
+    Cover(['1-', '-1'])
+    >>> a.intersect(b)
+    Cover(['11'])
+    >>> a.sharp(b)
+    Cover(['10'])
+    >>> a.union(b).complement()
+    Cover(['00'])
+    >>> a.union(b).cofactor(cube_from_string('0-'))
+    Cover(['-1'])
+    >>> a.union(b).contains(Cover.from_strings(['11', '01'], 2))
+    True
+    >>> a.union(b).equivalent(Cover.from_strings(['-1', '10'], 2))
+    True
+    >>> a.union(a.complement()).is_tautology()
+    True
+    """
+
+    def __init__(self, cubes, n):
+        self._cubes = list(cubes)
+        self._n = n
+
+    @staticmethod
+    def from_strings(pis, n):
+        """
+        Creates a cover from a list of PI strings (e.g. ['10-', '-11']).
+        """
+        return Cover([cube_from_string(i) for i in pis], n)
+
+    @staticmethod
+    def from_minterms(minterms, n):
+        """
+        Creates a cover from a list of numerical minterms.
+        """
+        return Cover([minterm_cube(i, n) for i in minterms], n)
+
+    def cubes(self):
+        """
+        Returns a copy of the list of cubes.
+        """
+        return list(self._cubes)
+
+    def num_vars(self):
+        """
+        Returns the number of variables the cover is defined over.
+        """
+        return self._n
+
+    def strings(self):
+        """
+        Returns the cubes as a list of PI strings.
+        """
+        return [cube_to_string(i, self._n) for i in self._cubes]
+
+    def __len__(self):
+        return len(self._cubes)
+
+    def __iter__(self):
+        return iter(self._cubes)
+
+    def __repr__(self):
+        return "Cover(%s)" %self.strings()
+
+    def union(self, other):
+        """
+        Returns the OR of the 2 covers.
+        """
+        return Cover(single_cube_containment(self._cubes + other._cubes), \
+                     self._n)
+
+    def intersect(self, other):
+        """
+        Returns the AND of the 2 covers (the pairwise intersection of cubes).
+        """
+        rv = []
+        for a in self._cubes:
+            for b in other._cubes:
+                if not is_empty(a & b, self._n): rv.append(a & b)
+        return Cover(single_cube_containment(rv), self._n)
+
+    def complement(self):
+        """
+        Returns the complement (NOT) of the cover.
+        """
+        return Cover(complement(self._cubes, self._n), self._n)
+
+    def sharp(self, other):
+        """
+        Returns self # other: the part of self not covered by other.
+        """
+        n = self._n
+        rv = self._cubes
+        for b in other._cubes:
+            # Only the cubes meeting b change, so only their pieces need the
+            # containment check (against each other)
+            kept = []
+            pieces = []
+            for a in rv:
+                if is_empty(a & b, n): kept.append(a)
+                else: pieces += sharp(a, b, n)
+            if len(kept) < len(rv):
+                rv = kept + single_cube_containment(pieces)
+        return Cover(rv, n)
+
+    def cofactor(self, cube):
+        """
+        Returns the cofactor of the cover w.r.t. the cube.
+        """
+        return Cover(cover_cofactor(self._cubes, cube, self._n), self._n)
+
+    def is_tautology(self):
+        """
+        Checks if the cover is 1 everywhere (see tautology).
+        """
+        return tautology(self._cubes, self._n)
+
+    def covers(self, cube):
+        """
+        Checks if the cover contains the cube entirely.
+        """
+        return covers(self._cubes, cube, self._n)
+
+    def contains(self, other):
+        """
+        Checks if the cover contains other, which can be a cube or a cover.
+        """
+        if isinstance(other, Cover):
+            return all(covers(self._cubes, i, self._n) for i in other._cubes)
+        return covers(self._cubes, other, self._n)
+
+    def equivalent(self, other):
+        """
+        Checks if the 2 covers represent the same function, by containment
+        both ways. No truth table is made.
+        """
+        return self._n == other._n and self.contains(other) and \
+               other.contains(self)
+
+    def primes(self, max_primes = None, time_limit = None):
+        """
+        Returns the cover of all the prime implicants, found by iterated
+        consensus: the consensus of every pair of cubes is added unless some
+        cube already contains it, and the cubes it contains are dropped. When
+        no new cube can be added, the remaining cubes are the primes.
+        Works on the cubes only; the minterms are never listed.
+
+        The # of primes can still be exponential in the # of cubes. Returns
+        None if more than max_primes cubes are held at once, or if it takes
+        more than time_limit seconds.
+
+        >>> sorted(Cover.from_strings(['1-0', '-11', '0-1'], 3).primes().strings())
+        ['-11', '0-1', '1-0', '11-']
+        >>> Cover.from_strings(['1-0', '-11', '0-1'], 3).primes(max_primes = 3)
+        """
+        n = self._n
+        deadline = time.time() + time_limit if time_limit is not None else None
+        primes = single_cube_containment(self._cubes)
+        new = list(primes)
+        while new:
+            found = []
+            for a in new:
+                for b in primes:
+                    c = consensus(a, b, n)
+                    if c is None: continue
+                    if any(c & ~i == 0 for i in primes) or \
+                       any(c & ~i == 0 for i in found): continue
+                    found = [i for i in found if i & ~c] + [c]
+
+                    # Checking the limits
+                    if max_primes is not None and \
+                       len(primes) + len(found) > max_primes:
+                        return None
+                if deadline is not None and time.time() > deadline:
+                    return None
+
+            # Single cube containment against the old primes
+            primes = [i for i in primes if all(i & ~c for c in found)] + found
+            new = found
+        return Cover(primes, n)
+
+    def count(self):
+        """
+        Returns the # of minterms of the cover, without listing them: the
+        cubes are made disjoint (see disjoint_sharp), and their sizes added.
+
+        >>> Cover.from_strings(['1-0', '-11', '0-1'], 3).count()
+        5
+        """
+        n = self._n
+        disjoint = []
+        for cube in self._cubes:
+            parts = [cube]
+            for d in disjoint:
+                parts = [j for i in parts for j in disjoint_sharp(i, d, n)]
+                if not parts: break
+            disjoint += parts
+        return sum(2 ** (n - literals(i, n)) for i in disjoint)
+
+    def packed(self, low = None, high = 0):
+        """
+        Returns the packed tt of the cover: an int whose ith bit is 1 iff the
+        minterm i is in the cover. A small cube sets its bits one by one; a
+        big one is made a variable at a time, the tt so far being copied to
+        where the variable is 1 (if free) or moved there (if uncomplemented),
+        so the minterms are never listed.
+
+        With low, only the rows whose minterm >> low is high are made: the
+        packed tt of the cover with the variables above position low set to
+        the bits of high, over the low positions.
+
+        >>> bin(Cover.from_strings(['1-0', '-11'], 3).packed())
+        '0b11011000'
+        >>> bin(Cover.from_strings(['1-0', '-11'], 3).packed(2, 1))
+        '0b1101'
+        """
+        n = self._n
+        if low is None: low = n
+        rv = 0
+        for cube in self._cubes:
+            # The cube must allow the values of high
+            if any(not (cube >> (2 * p)) & (2 if (high >> (p - low)) & 1 \
+                                            else 1) for p in range(low, n)):
+                continue
+            cube &= (1 << (2 * low)) - 1
+            free = low - literals(cube, low)
+            if 2 ** free <= 2 ** low // 64:
+                for i in cube_minterms(cube, low): rv |= 1 << i
+                continue
+            table = 1
+            for p in range(low):
+                field = (cube >> (2 * p)) & 3
+                if field == 2: table <<= 2 ** p
+                elif field == 3: table |= table << 2 ** p
+            rv |= table
+        return rv
+
+    def minterms(self):
+        """
+        Returns a sorted list of the numerical minterms of the cover.
+        Enumerates every minterm, so use it only for small covers.
+        """
+        rv = set()
+        for cube in self._cubes:
+            rv.update(cube_minterms(cube, self._n))
+        return sorted(rv)
+
+def multi_primes(cover, n, max_primes = None, time_limit = None):
+    """
+    Finds the multiple-output prime implicants of several functions over the
+    same n variables. cover is a list of tagged cubes (cube, outputs), where
+    outputs is the bitset of the functions the cube is an implicant of.
+
+    A tagged cube is a cube of the characteristic function, with the outputs
+    as one more (multi-valued) variable. So the iterated consensus of
+    Cover.primes works on them too, with 2 kinds of consensus:
+    - the cubes are at a distance 1 and share an output: the usual consensus,
+      for the shared outputs.
+    - the cubes intersect: their intersection, for the outputs of both.
+    (cube, outputs) contains (cube2, outputs2) if both parts contain the other's.
+
+    Returns the list of tagged primes, or None if the limits are exceeded (see
+    Cover.primes).
+
+    >>> f = [(cube_from_string('11-'), 1), (cube_from_string('1-1'), 2)]
+    >>> sorted((cube_to_string(c, 3), m) for c, m in multi_primes(f, 3))
+    [('1-1', 2), ('11-', 1), ('111', 3)]
+    """
+    # Every tagged cube is packed into one integer, with the outputs above the
+    # cube's 2n bits. Then containment is a single AND, as for plain cubes
+    shift = 2 * n
+    mask = full(n)
+
+    deadline = time.time() + time_limit if time_limit is not None else None
+
+    # Starting from the primes of every function makes far fewer rounds
+    functions = {}
+    for cube, outputs in cover:
+        if is_empty(cube, n): continue
+        for j in range(outputs.bit_length()):
+            if outputs >> j & 1: functions.setdefault(j, []).append(cube)
+    primes = []
+    for j in functions:
+        single = Cover(functions[j], n).primes(max_primes, time_limit)
+        if single is None: return None
+        primes += [cube | (1 << (j + shift)) for cube in single]
+    primes = single_cube_containment(primes)
+
+    new = list(primes)
+    while new:
+        found = []
+        for a in new:
+            for b in primes:
+                d = distance(a & mask, b & mask, n)
+                if d == 0: c = (a & b & mask) | ((a | b) & ~mask)
+                elif d == 1 and a & b & ~mask:
+                    c = consensus(a & mask, b & mask, n) | (a & b & ~mask)
+                else: continue
+                if any(c & ~i == 0 for i in primes) or \
+                   any(c & ~i == 0 for i in found): continue
+                found = [i for i in found if i & ~c] + [c]
+
+                # Checking the limits
+                if max_primes is not None and \
+                   len(primes) + len(found) > max_primes:
+                    return None
+            if deadline is not None and time.time() > deadline:
+                return None
+
+        # Containment against the old primes
+        primes = [i for i in primes if all(i & ~c for c in found)] + found
+        new = found
+    return [(i & mask, i >> shift) for i in primes]
+
+def primes_through(minterm, inside, n):
+    """
+    Returns the primes containing the minterm of a function over n variables,
+    given as the predicate inside(minterm). Only the implicants containing
+    the minterm are visited, so the cost depends on them, not on 2^n.
+
+    >>> f = lambda m: m in [1, 3, 5, 7, 6]
+    >>> sorted(cube_to_string(i, 3) for i in primes_through(7, f, 3))
+    ['--1', '11-']
+    """
+    found = []
+
+    # Every implicant is reached once, by freeing its variables in the
+    # increasing order of position. points are its minterms
+    def grow(cube, points, start):
+        maximal = True
+        for p in range(n):
+            if (cube >> (2 * p)) & 3 == 3: continue
+            moved = [m ^ (1 << p) for m in points]
+            if all(inside(m) for m in moved):
+                maximal = False
+                if p >= start:
+                    grow(cube | (3 << (2 * p)), points + moved, p + 1)
+        if maximal: found.append(cube)
+
+    grow(minterm_cube(minterm, n), [minterm], 0)
+    return found
+
+def update_primes(primes, added, removed, inside, n):
+    """
+    Returns the primes of a function over n variables after some of its
+    minterms are removed, and others added. primes are the primes before,
+    inside(minterm) tells if a minterm is in the function after.
+
+    Only the primes touching the changed minterms are worked on:
+    - A prime having a removed minterm isn't an implicant anymore. The
+      biggest cubes in it without the removed minterms (its sharp with them)
+      are, and every new prime inside it is one of them.
+    - Every new prime not inside an old prime has an added minterm, so the
+      primes through the added minterms are the rest (see primes_through).
+      The old primes inside them aren't primes anymore.
+
+    >>> primes = [cube_from_string(i) for i in ['--1', '11-']]
+    >>> f = lambda m: m in [1, 3, 5, 7, 6, 2]
+    >>> sorted(cube_to_string(i, 3) for i in \
+               update_primes(primes, [2], [], f, 3))
+    ['--1', '-1-']
+    >>> f = lambda m: m in [1, 5, 7, 6]
+    >>> sorted(cube_to_string(i, 3) for i in \
+               update_primes(primes, [], [3], f, 3))
+    ['-01', '1-1', '11-']
+    """
+    if removed:
+        cubes = [minterm_cube(m, n) for m in removed]
+        kept = []
+        for prime in primes:
+            parts = [prime]
+            for cube in cubes:
+                parts = [j for i in parts for j in sharp(i, cube, n)]
+            kept += parts
+        primes = single_cube_containment(kept)
+    if added:
+        new = []
+        for m in added:
+            new += primes_through(m, inside, n)
+        primes = single_cube_containment(primes + new)
+    return primes
+
+def _tokenize(expression):
+    """
+    Splits an expression into variable names and the symbols ( ) + * ~.
+    Returns None if it contains any other symbol.
+
+    >>> _tokenize("a1*~b + (c)")
+    ['a1', '*', '~', 'b', '+', '(', 'c', ')']
+    >>> _tokenize("a % b")
+    """
+    tokens = []
+    name = ""
+    for c in expression + " ":
+        if c.isalnum() or c == "_":
+            name += c
+            continue
+        if name:
+            tokens.append(name)
+            name = ""
+        if c in "()+*~": tokens.append(c)
+        elif not c.isspace(): return None
+    return tokens
+
+def expression_cover(expression, variables):
+    """
+    Builds the cover of an expression made of the variables, the constants
+    0 and 1, and the symbols + (OR), * (AND), ~ (NOT) and brackets. The ith variable is the ith
+    character of the PI strings. Returns None if the expression uses any other
+    symbol (e.g. XOR), so the caller can fall back to the truth table.
+
+    The priorities are the same as in the truth table: ~ before * before +.
+
+    >>> expression_cover("a*~b + c", ['a', 'b', 'c'])
+    Cover(['--1', '10-'])
+    >>> expression_cover("~(a*b)", ['a', 'b'])
+    Cover(['-0', '0-'])
+    >>> expression_cover("a * 0 + 1", ['a', 'b'])
+    Cover(['--'])
+    >>> expression_cover("a % b", ['a', 'b'])
+    """
+    tokens = _tokenize(expression)
+    if not tokens: return None
+
+    n = len(variables)
+    position = {}
+    for i in range(n):
+        position[variables[i]] = n - 1 - i
+
+    # Recursive descent over the tokens. pos is a list so that the nested
+    # functions can move it
+    pos = [0]
+
+    def peek():
+        return tokens[pos[0]] if pos[0] < len(tokens) else None
+
+    def factor():
+        token = peek()
+        pos[0] += 1
+        if token == "~":
+            rv = factor()
+            return rv if rv is None else rv.complement()
+        elif token == "(":
+            rv = expr()
+            if rv is None or peek() != ")": return None
+            pos[0] += 1
+            return rv
+        elif token in position:
+            p = position[token]
+            return Cover([full(n) & ~(1 << (2 * p))], n)
+        elif token == "0":
+            return Cover([], n)
+        elif token == "1":
+            return Cover([full(n)], n)
+        return None
+
+    def term():
+        rv = factor()
+        while rv is not None and peek() == "*":
+            pos[0] += 1
+            other = factor()
+            rv = None if other is None else rv.intersect(other)
+        return rv
+
+    def expr():
+        rv = term()
+        if rv is None or peek() != "+": return rv
+        # The terms are collected first, and checked for containment once;
+        # a union per term would make long sums quadratic
+        cubes = rv.cubes()
+        while peek() == "+":
+            pos[0] += 1
+            other = term()
+            if other is None: return None
+            cubes += other.cubes()
+        return Cover(single_cube_containment(cubes), n)
+
+    rv = expr()
+    if pos[0] != len(tokens): return None
+    return rv
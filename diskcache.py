@@ -0,0 +1,133 @@
+"""
+The diskcache module. A persistent cache of the expensive results (truth
+tables, prime implicants, minimum covers), kept in an sqlite database so that
+they survive restarting the CLI.
+
+The entries are keyed by a kind (e.g. "min_sop") and a fingerprint of the
+function (see BF._fingerprint), hashed together with VERSION. The values are
+stored as JSON, so only plain data (ints, strings, lists) is stored; cubes
+are stored as ints (see cubes.py).
+
+The database is bounded in size: when the stored values exceed max_bytes,
+the least recently used entries are removed.
+"""
+
+import sqlite3, json, os, hashlib
+
+# Part of every key. Bump it whenever the meaning of a stored value changes:
+# the old entries are then never read, and get evicted as the oldest
+VERSION = 1
+
+# Where the CLI keeps its cache, and the default size bound
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".digicad_cache.sqlite")
+MAX_BYTES = 64 * 2 ** 20
+
+class DiskCache:
+    """
+    An sqlite backed key-value store with LRU eviction.
+
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), "cache.sqlite")
+    >>> cache = DiskCache(path, max_bytes = 300)
+    >>> cache.put("min_sop", ([3, 12], True), 4, 0x8421)
+    >>> cache.get("min_sop", 4, 0x8421)
+    [[3, 12], True]
+    >>> cache.get("min_sop", 4, 0x8420) is None
+    True
+    >>> for i in range(20): cache.put("tt", "%x" %(i << 40), i)
+    >>> len(cache) < 20, cache.get("tt", 19)
+    (True, '130000000000')
+    >>> cache.close()
+    >>> DiskCache(path).get("tt", 19)
+    '130000000000'
+    """
+
+    def __init__(self, path = DEFAULT_PATH, max_bytes = MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT "
+                         "PRIMARY KEY, value TEXT, size INTEGER, used INTEGER)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS lru ON entries (used)")
+
+        # A counter instead of the time, so that the order is exact
+        used, size = self._db.execute("SELECT MAX(used), SUM(size) FROM "
+                                      "entries").fetchone()
+        self._clock = used or 0
+        self._size = size or 0
+
+    def _key(self, kind, parts):
+        """
+        Returns the key string of an entry.
+        """
+        text = "%d:%s:%r" %(VERSION, kind, parts)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, kind, *parts):
+        """
+        Returns the value stored for (kind, *parts), or None if there is none.
+        Marks it as just used. Tuples come back as lists.
+        """
+        key = self._key(kind, parts)
+        row = self._db.execute("SELECT value FROM entries WHERE key = ?", \
+                               (key,)).fetchone()
+        if row is None: return None
+
+        # Written to disk with the next put (or close)
+        self._clock += 1
+        self._db.execute("UPDATE entries SET used = ? WHERE key = ?", \
+                         (self._clock, key))
+        return json.loads(row[0])
+
+    def put(self, kind, value, *parts):
+        """
+        Stores the value for (kind, *parts), evicting the least recently used
+        entries if the cache gets too big.
+        """
+        key = self._key(kind, parts)
+        text = json.dumps(value)
+        size = len(key) + len(text)
+
+        old = self._db.execute("SELECT size FROM entries WHERE key = ?", \
+                               (key,)).fetchone()
+        if old is not None: self._size -= old[0]
+        self._clock += 1
+        self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", \
+                         (key, text, size, self._clock))
+        self._size += size
+
+        if self._size > self.max_bytes:
+            # Oldest first, until it fits (the new entry is the newest)
+            rows = self._db.execute("SELECT key, size FROM entries ORDER BY "
+                                    "used")
+            evicted = []
+            for old_key, old_size in rows:
+                if self._size <= self.max_bytes or old_key == key: break
+                evicted.append((old_key,))
+                self._size -= old_size
+            self._db.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        self._db.commit()
+
+    def clear(self):
+        """
+        Removes every entry.
+        """
+        self._db.execute("DELETE FROM entries")
+        self._db.commit()
+        self._size = 0
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def size(self):
+        """
+        Returns the # of bytes stored (keys and values).
+        """
+        return self._size
+
+    def close(self):
+        """
+        Writes the pending changes and closes the database.
+        """
+        self._db.commit()
+        self._db.close()
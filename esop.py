@@ -0,0 +1,246 @@
+"""
+The esop module. Finds small exclusive-or sums of products (ESOPs): lists
+of cubes (see cubes.py) whose functions are XORed instead of ORed. Parity
+and arithmetic functions are much smaller this way: the n-input parity is n
+cubes as an ESOP, but 2^(n-1) as a sum of products.
+
+An ESOP is made in 2 steps:
+1. pkrm: the pseudo-Kronecker expansion of the packed tt. Every
+   sub-function f is expanded on its highest variable x, with the cofactors
+   f0 and f1 (x = 0 and x = 1), by the cheapest of
+       Shannon          f = ~x*f0 % x*f1
+       positive Davio   f = f0 % x*(f0 % f1)
+       negative Davio   f = f1 % ~x*(f0 % f1)
+   The cheapest (fewest cubes) is found exactly for the sub-functions of up
+   to EXACT_VARS variables, which are memoised. Above that, it is picked by
+   an estimate of the size of the sub-functions, as the exact search grows
+   like 3^n.
+2. exorcism: the cubes are improved by pairing them, as EXORCISM does. Two
+   cubes differing in no variable cancel (c % c = 0), and two differing in
+   one variable merge into one cube, the literals of that variable being
+   XORed (e.g. a*b % a*~b = a, a % a*b = a*~b). Two cubes differing in 2
+   variables are replaced by 2 others of the same function (an exorlink),
+   which is kept if the cubes then merge into fewer (or fewer literals).
+"""
+
+from cubes import *
+import time
+
+# Sub-functions of up to EXACT_VARS variables get the cheapest expansion
+EXACT_VARS = 8
+
+# The most rounds of exorlinks exorcism does (it stops at the first round
+# finding nothing better)
+ROUNDS = 8
+
+# The expansions, in the order they win a tie: the Davio ones have a free
+# variable in half of their cubes
+POSITIVE, NEGATIVE, SHANNON = 0, 1, 2
+
+def ones_table(k):
+    """
+    Returns the packed tt of the constant 1 over k variables.
+    """
+    return (1 << (1 << k)) - 1
+
+def _estimate(table, k):
+    """
+    Helper for pkrm. Estimates the # of cubes of the ESOP of a sub-function
+    of k variables too big to be expanded exactly: a function with few
+    ones, or few zeros (1 % the zeros), is small.
+    """
+    ones = bin(table).count("1")
+    return min(ones, (1 << k) - ones + 1)
+
+def pkrm(table, n):
+    """
+    Returns the cubes of the pseudo-Kronecker expansion of the function
+    whose packed tt (see npn.py) over n variables is table.
+
+    >>> parity = 0b10010110
+    >>> sorted(cube_to_string(i, 3) for i in pkrm(parity, 3))
+    ['--1', '-1-', '1--']
+    >>> len(pkrm(0b11101000, 3)) # The majority
+    3
+    """
+    memo = {}
+
+    def parts(f, k):
+        # The cofactors on the highest variable, and their XOR
+        half = 1 << (k - 1)
+        f0, f1 = f & ((1 << half) - 1), f >> half
+        return f0, f1, f0 ^ f1
+
+    def cost(f, k):
+        # The # of cubes of the expansion of f, and how f is expanded
+        if f == 0: return 0
+        if f == ones_table(k): return 1
+        key = (k, f)
+        if key not in memo:
+            f0, f1, f2 = parts(f, k)
+            if k <= EXACT_VARS:
+                c0, c1, c2 = cost(f0, k - 1), cost(f1, k - 1), cost(f2, k - 1)
+            else:
+                c0, c1, c2 = [_estimate(i, k - 1) for i in (f0, f1, f2)]
+            memo[key] = min((c0 + c2, POSITIVE), (c1 + c2, NEGATIVE), \
+                            (c0 + c1, SHANNON))
+        return memo[key][0]
+
+    def expand(f, k):
+        if f == 0: return []
+        if f == ones_table(k): return [full(k)]
+        cost(f, k)
+        f0, f1, f2 = parts(f, k)
+        kind = memo[(k, f)][1]
+        # The sub-functions, and the field of x in their cubes
+        if kind == POSITIVE: subs = [(f0, 3), (f2, 2)]
+        elif kind == NEGATIVE: subs = [(f1, 3), (f2, 1)]
+        else: subs = [(f0, 1), (f1, 2)]
+        p = 2 * (k - 1)
+        return [cube | field << p for g, field in subs \
+                for cube in expand(g, k - 1)]
+
+    return expand(table, n)
+
+def packed_esop(cubes, n):
+    """
+    Returns the packed tt of the ESOP.
+
+    >>> bin(packed_esop([cube_from_string(i) for i in ['1-', '-1']], 2))
+    '0b110'
+    """
+    rv = 0
+    for cube in cubes: rv ^= Cover([cube], n).packed()
+    return rv
+
+def _set(cube, p, field):
+    """
+    Helper for exorcism. Returns the cube with the variable at position p
+    set to field.
+    """
+    return cube & ~(3 << (2 * p)) | field << (2 * p)
+
+def _add(esop, cube, n, log):
+    """
+    Helper for exorcism. XORs the cube into the set of cubes esop: it
+    cancels with an equal cube, or merges with a cube differing in one
+    variable (and the merged cube goes in the same way). Every cube removed
+    or added is logged as (False/True, cube), so the change can be undone.
+    """
+    while True:
+        if cube in esop:
+            esop.remove(cube)
+            log.append((False, cube))
+            return
+        for p in range(n):
+            field = (cube >> (2 * p)) & 3
+            for other in (1, 2, 3):
+                if other == field: continue
+                partner = _set(cube, p, other)
+                if partner in esop: break
+            else: continue
+            # The literals of the variable are XORed
+            esop.remove(partner)
+            log.append((False, partner))
+            cube = _set(cube, p, field ^ other)
+            break
+        else:
+            esop.add(cube)
+            log.append((True, cube))
+            return
+
+def _undo(esop, log):
+    """
+    Helper for exorcism. Undoes the changes logged by _add.
+    """
+    for added, cube in reversed(log):
+        if added: esop.remove(cube)
+        else: esop.add(cube)
+
+def _exorlinks(a, b, p, q):
+    """
+    Helper for exorcism. Returns the 2 pairs of cubes equal to a % b, for
+    cubes differing in the variables at positions p and q only.
+    """
+    ap, aq = (a >> (2 * p)) & 3, (a >> (2 * q)) & 3
+    bp, bq = (b >> (2 * p)) & 3, (b >> (2 * q)) & 3
+    # ap*aq % bp*bq = (ap % bp)*aq % bp*(aq % bq) = ap*(aq % bq) % (ap % bp)*bq
+    return [(_set(_set(a, p, ap ^ bp), q, aq), \
+             _set(_set(a, p, bp), q, aq ^ bq)),
+            (_set(_set(a, p, ap), q, aq ^ bq), \
+             _set(_set(a, p, ap ^ bp), q, bq))]
+
+def exorcism(cubes, n, rounds = ROUNDS, time_limit = None):
+    """
+    Returns the cubes of a smaller ESOP of the same function as the ESOP
+    cubes over n variables, made by cube pairing (see the module docstring).
+    Stops after time_limit seconds, if given.
+
+    >>> esop = [cube_from_string(i) for i in ['11-', '10-', '0-1', '001']]
+    >>> sorted(cube_to_string(i, 3) for i in exorcism(esop, 3))
+    ['011', '1--']
+    """
+    start = time.time()
+    esop = set()
+    for cube in cubes: _add(esop, cube, n, [])
+
+    for i in range(rounds):
+        improved = False
+        for a in list(esop):
+            if time_limit is not None and time.time() - start > time_limit:
+                break
+            if a in esop and _pair(esop, a, n): improved = True
+        if not improved: break
+    return sorted(esop)
+
+def _pair(esop, a, n):
+    """
+    Helper for exorcism. Tries the exorlinks of the cube a with the cubes of
+    the esop differing from it in 2 variables, until one is kept. Returns
+    True if one was.
+    """
+    for p in range(n):
+        for q in range(p + 1, n):
+            for fp in (1, 2, 3):
+                if fp == (a >> (2 * p)) & 3: continue
+                for fq in (1, 2, 3):
+                    if fq == (a >> (2 * q)) & 3: continue
+                    b = _set(_set(a, p, fp), q, fq)
+                    if b in esop and _exorlink(esop, a, b, p, q, n):
+                        return True
+    return False
+
+def _exorlink(esop, a, b, p, q, n):
+    """
+    Helper for exorcism. Replaces the cubes a and b of the esop (differing
+    at the positions p and q) by an exorlink of them, if the cubes then
+    merge into fewer cubes, or fewer literals. Returns True if it did.
+    """
+    for c, d in _exorlinks(a, b, p, q):
+        log = [(False, a), (False, b)]
+        esop.remove(a)
+        esop.remove(b)
+        _add(esop, c, n, log)
+        _add(esop, d, n, log)
+        cubes = sum(1 if added else -1 for added, cube in log)
+        literal_change = sum((1 if added else -1) * literals(cube, n) \
+                             for added, cube in log)
+        if (cubes, literal_change) < (0, 0): return True
+        _undo(esop, log)
+    return False
+
+def min_esop(table, n, time_limit = None):
+    """
+    Returns the cubes of a small ESOP of the function whose packed tt over n
+    variables is table: its pseudo-Kronecker expansion, improved by
+    exorcism. It's a heuristic: the result isn't always the minimum.
+
+    >>> parity = 0b0110100110010110 # a % b % c % d
+    >>> sorted(cube_to_string(i, 4) for i in min_esop(parity, 4))
+    ['---1', '--1-', '-1--', '1---']
+    >>> table = 0b11111000 # a + b*c
+    >>> esop = min_esop(table, 3)
+    >>> len(esop), packed_esop(esop, 3) == table
+    (2, True)
+    """
+    return exorcism(pkrm(table, n), n, time_limit = time_limit)
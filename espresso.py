@@ -0,0 +1,186 @@
+"""
+The espresso module. A heuristic two-level minimiser in the style of
+ESPRESSO-II. Unlike Quine-McCluskey, it never lists the minterms or all the
+prime implicants; it works on the cube covers (see cubes.py) directly, so its
+runtime depends on the size of the covers rather than on 2^n.
+
+The on-set F is improved by iterating:
+EXPAND      : grow every cube into a prime, without touching the off-set R,
+              and drop the cubes covered by it.
+IRREDUNDANT : drop the cubes covered by the rest of the cover (and the DCs).
+REDUCE      : shrink every cube to the smallest cube that still covers
+              what only it covers, so that the next EXPAND can go elsewhere.
+till the cost (# of cubes, # of literals) stops improving. LAST_GASP then
+reduces every cube independently and tries to expand the results into new
+primes covering more than one of them.
+
+Source: Brayton et al., "Logic Minimization Algorithms for VLSI Synthesis"
+"""
+
+from cubes import *
+
+def expand(F, R, n, G = None):
+    """
+    Expands every cube of F into a prime implicant that doesn't intersect any
+    cube of the off-set R. Cubes contained in an expanded cube are removed.
+
+    If R is None, the raised cubes are instead checked for containment in G
+    (the on-set and the don't cares). This avoids the complement, which can
+    be huge for wide, sparse functions.
+
+    >>> [cube_to_string(i, 2) for i in expand([cube_from_string('11'), \
+         cube_from_string('10')], [cube_from_string('0-')], 2)]
+    ['1-']
+    >>> [cube_to_string(i, 2) for i in expand([cube_from_string('11'), \
+         cube_from_string('10')], None, 2, [cube_from_string('1-')])]
+    ['1-']
+    """
+    # Smaller cubes (more literals) are the hardest to expand; doing the big
+    # cubes first lets them swallow the small ones
+    F = sorted(F, key = lambda x: literals(x, n))
+    done = []
+
+    for cube in F:
+        if any(cube & ~prime == 0 for prime in done):
+            continue # Already covered by an expanded cube
+
+        # The variables that can still be raised, ordered by how likely they
+        # are to be raisable: the # of off-set cubes blocking them, or the
+        # # of on-set cubes where they are absent
+        candidates = []
+        for p in range(n):
+            field = (cube >> (2 * p)) & 3
+            if field != 3:
+                score = 0
+                if R is not None:
+                    for r in R:
+                        if (r >> (2 * p)) & field == 0: score += 1
+                else:
+                    for g in G:
+                        if (g >> (2 * p)) & 3 == 3: score -= 1
+                candidates.append((score, p))
+        candidates.sort()
+
+        for score, p in candidates:
+            raised = cube | (3 << (2 * p))
+            if R is not None:
+                for r in R:
+                    if not is_empty(raised & r, n): break
+                else:
+                    cube = raised
+            elif covers(G, raised, n):
+                cube = raised
+
+        done = [prime for prime in done if prime & ~cube]
+        done.append(cube)
+
+    return done
+
+def irredundant(F, D, n):
+    """
+    Removes the cubes of F that are covered by the rest of F and the don't
+    cares D. The cubes with the most literals are tried first.
+
+    >>> [cube_to_string(i, 2) for i in irredundant([cube_from_string(i) \
+         for i in ['1-', '-1', '11']], [], 2)]
+    ['1-', '-1']
+    """
+    F = list(F)
+    for cube in sorted(F, key = lambda x: -literals(x, n)):
+        rest = [i for i in F if i != cube]
+        if covers(rest + D, cube, n):
+            F = rest
+    return F
+
+def reduce(F, D, n):
+    """
+    Replaces every cube of F by the smallest cube containing the part of it
+    that is not covered by the rest of F and D. Cubes that become empty (i.e.
+    were redundant) are dropped.
+    """
+    F = sorted(F, key = lambda x: literals(x, n))
+    rv = list(F)
+    for i in range(len(rv)):
+        rest = rv[:i] + rv[i + 1:]
+        rest = [c for c in rest if c is not None]
+        uncovered = sccc(cover_cofactor(rest + D, rv[i], n), n)
+        if uncovered is None:
+            rv[i] = None # Fully covered by the others
+        else:
+            rv[i] = rv[i] & uncovered
+    return [c for c in rv if c is not None]
+
+def last_gasp(F, D, R, n, G = None):
+    """
+    Reduces every cube of F independently (against all the others), expands
+    the reduced cubes, and keeps the new primes that cover more than one of
+    the reduced cubes. Returns the improved cover (irredundant).
+    """
+    reduced = []
+    for i in range(len(F)):
+        rest = F[:i] + F[i + 1:]
+        uncovered = sccc(cover_cofactor(rest + D, F[i], n), n)
+        if uncovered is not None:
+            reduced.append(F[i] & uncovered)
+
+    new = []
+    for prime in expand(reduced, R, n, G):
+        if prime in F: continue
+        if sum(1 for c in reduced if c & ~prime == 0) > 1:
+            new.append(prime)
+
+    if not new: return F
+    return irredundant(new + F, D, n)
+
+def espresso(F, D, n, R = None):
+    """
+    Minimises the on-set cover F (with don't care cover D) over n variables.
+    R is the off-set cover. If it is not given, the expansions are checked
+    against F + D instead, so the complement is never computed. Returns the
+    minimised cover.
+
+    >>> sorted(cube_to_string(i, 3) for i in espresso([minterm_cube(m, 3) \
+               for m in [1, 3, 5, 6, 7]], [], 3))
+    ['--1', '11-']
+
+    The don't cares are used for merging, but they are not covered:
+    >>> [cube_to_string(i, 3) for i in espresso([cube_from_string('111')], \
+         [cube_from_string('011')], 3)]
+    ['-11']
+
+    A REDUCE/EXPAND/IRREDUNDANT pass can make the cover worse. Here the first
+    pass costs (5, 11) and the next one (5, 12); the cheaper one is kept:
+    >>> F = [minterm_cube(m, 4) for m in [1, 3, 5, 6, 7, 8, 11, 13, 14]]
+    >>> D = [minterm_cube(m, 4) for m in [0, 15]]
+    >>> first = irredundant(expand(F, None, 4, F + D), D, 4)
+    >>> cost(first, 4), cost(irredundant(expand(reduce(first, D, 4), None, 4, \
+                                                F + D), D, 4), 4)
+    ((5, 11), (5, 12))
+    >>> cost(espresso(F, D, 4), 4)
+    (5, 11)
+    """
+    F = single_cube_containment(F)
+    D = list(D)
+    if not F: return []
+    care = F + D # Everything the result may cover
+    if tautology(care, n): return [full(n)]
+
+    F = expand(F, R, n, care)
+    F = irredundant(F, D, n)
+
+    # F is always the best cover seen so far. A new cover replaces it only
+    # if it is strictly cheaper
+    best = cost(F, n)
+    while True:
+        while True:
+            G = reduce(F, D, n)
+            G = expand(G, R, n, care)
+            G = irredundant(G, D, n)
+            if cost(G, n) >= best: break
+            F, best = G, cost(G, n)
+
+        H = last_gasp(F, D, R, n, care)
+        if cost(H, n) >= best: break
+        F, best = H, cost(H, n)
+
+    return F
@@ -0,0 +1,131 @@
+"""
+The exact4 module. A precomputed table of the exact minimum SOP of every
+Boolean function of up to 4 variables, so that the small functions (most of
+the calls to min_sop) are looked up instead of minimised.
+
+There are 2^16 = 65536 functions of 4 variables. The ith one is the function
+whose minterms are the set bits of i (its 16-bit truth table). Functions of
+fewer variables are looked up as 4 variable functions not depending on the
+extra variables; their minimum covers don't use these variables either.
+
+The table is stored in exact4.bin (LZMA compressed). For every function, in
+order: a byte with the # of cubes k, then the k cubes of its minimum cover,
+one byte each (a 4 variable cube is 8 bits, see cubes.py). Minimum means the
+fewest cubes, then the fewest literals, the same costs as min_sop. Every
+cover was proven minimum by covering.min_cover.
+
+The table can be remade with generate().
+"""
+
+from cubes import *
+from covering import *
+import lzma, os
+
+# The file holding the table
+DATABASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), \
+                        "exact4.bin")
+
+# The loaded table: (the bytes, the offset of every function in them)
+_table = None
+
+def generate(path = DATABASE):
+    """
+    Finds the minimum cover of all the 65536 functions of 4 variables and
+    writes the table to path. Takes a few seconds.
+    """
+    n = 4
+    all_cubes = [cube_from_string(i) for i in _cube_strings(n)]
+
+    # The minterms of every cube, as a 16-bit truth table
+    masks = {}
+    for cube in all_cubes:
+        masks[cube] = sum(1 << i for i in cube_minterms(cube, n))
+
+    data = bytearray()
+    for table in range(2 ** 16):
+        implicants = [c for c in all_cubes if masks[c] & ~table == 0]
+        primes = [c for c in implicants if \
+                  not any(d != c and c & ~d == 0 for d in implicants)]
+
+        # Same costs as in solve_chart: fewer cubes, then fewer literals
+        term_cost = n * len(primes) + 1
+        costs = [term_cost + literals(c, n) for c in primes]
+        chosen, optimal = min_cover([masks[c] for c in primes], table, costs)
+        if not optimal:
+            raise CoverError("Couldn't prove the cover of %d minimum" %table)
+
+        data.append(len(chosen))
+        data += bytes(sorted(primes[i] for i in chosen))
+
+    with open(path, "wb") as stream:
+        stream.write(lzma.compress(bytes(data), preset = 9))
+
+def _cube_strings(n):
+    """
+    Returns the 3^n PI strings over n variables.
+    """
+    rv = [""]
+    for i in range(n):
+        rv = [s + c for s in rv for c in "01-"]
+    return rv
+
+def _load():
+    """
+    Loads the table (once). Returns None if the file is missing.
+    """
+    global _table
+    if _table is None:
+        if not os.path.exists(DATABASE): return None
+        with open(DATABASE, "rb") as stream:
+            data = lzma.decompress(stream.read())
+
+        # Finding where every function starts
+        offsets = []
+        i = 0
+        while i < len(data):
+            offsets.append(i)
+            i += data[i] + 1
+        _table = (data, offsets)
+    return _table
+
+def min_sop4(table):
+    """
+    Returns the minimum cover (list of cubes over 4 variables) of the 4
+    variable function with the 16-bit truth table, or None if the table file
+    is missing.
+
+    >>> [cube_to_string(i, 4) for i in min_sop4(0b1111000011110000)]
+    ['-1--']
+    >>> min_sop4(0)
+    []
+    """
+    loaded = _load()
+    if loaded is None: return None
+    data, offsets = loaded
+    i = offsets[table]
+    return list(data[i + 1:i + 1 + data[i]])
+
+def lookup_min_sop(minterms, n):
+    """
+    Returns the minimum cover (list of cubes over n variables) of the
+    function with the given minterms. Returns None if n > 4, or if the table
+    file is missing.
+
+    Can be used as the leaf solver by anything splitting a function into
+    smaller ones.
+
+    >>> [cube_to_string(i, 3) for i in lookup_min_sop([1, 3, 5, 6, 7], 3)]
+    ['11-', '--1']
+    """
+    if n > 4: return None
+
+    # Repeating the truth table over the extra variables, which are the most
+    # significant ones
+    table = 0
+    for i in minterms: table |= 1 << i
+    for i in range(4 - n):
+        table |= table << (2 ** (n + i))
+
+    cubes = min_sop4(table)
+    if cubes is None: return None
+    return [cube & full(n) for cube in cubes]
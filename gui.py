@@ -128,13 +128,12 @@ def calculate(side=None, mode=None, clear=0):
             elif mode == 4:
                 variable_list[side][mode].set(function[side][counter[side]].max_expand())
                 
-            # Mode 5: Display the simplified function in SOP form.
-            elif mode == 5:
-                variable_list[side][mode].set(function[side][counter[side]].min_sop())
-         
-            # Mode 6: Display the simplified function in POS form.
-            elif mode == 6:
-                variable_list[side][mode].set("Still under development. Try SOP form instead.")
+            # Modes 5 and 6: Display the simplified function in SOP and POS
+            # forms. Both come from one min_both call, so both are displayed.
+            elif mode == 5 or mode == 6:
+                sop, pos, best = function[side][counter[side]].min_both()
+                variable_list[side][5].set(sop)
+                variable_list[side][6].set(pos)
          
             # Mode 7: Display the function negated.
             elif mode == 7:
@@ -0,0 +1,199 @@
+"""
+The memory module. Keeps the operations on BFs within a memory budget, so
+that a BF too big for the machine gives an error (or is handled another
+way) instead of taking all the memory until the system kills the process.
+
+The budget has 2 limits, both in bytes (None for no limit):
+- operation: the most a single operation may allocate (e.g. a truth table)
+- session  : the most the results held by the BFs may take together (the
+             truth tables), the new one included
+
+Before making something big, the operations estimate its size (see the
+*_bytes functions) and check it against the budget (MemoryBudget.check),
+which raises MemoryBudgetError if it doesn't fit. The planner (see
+planner.py) avoids the engines whose estimate doesn't fit, so that most
+operations go another way (the cover, the packed tt, the Q-M levels in
+files) before an error is needed.
+
+The worker processes get a hard limit on their address space (see
+limit_process), so a worker going over it gets a MemoryError instead of
+being killed with the others.
+"""
+
+import weakref
+try:
+    import resource
+except ImportError:
+    # Unix only: the workers aren't limited on other systems
+    resource = None
+
+# Estimated bytes taken by one row of the dict tt of a BF (the bit-string
+# key, the slot and the value), with the minterm or maxterm list it is in
+ROW_BYTES = 160
+
+# Estimated bytes taken by an int in a list (e.g. a minterm)
+TERM_BYTES = 40
+
+# The bytes a worker process may take on top of what it started with, for
+# the interpreter allocating as it goes
+PROCESS_BYTES = 64 * 2 ** 20
+
+# The default budget
+OPERATION_BYTES = 2 * 2 ** 30
+SESSION_BYTES = 4 * 2 ** 30
+
+class MemoryBudgetError(MemoryError):
+    """
+    Handles the exceptions concerning operations that would go over the
+    memory budget.
+    """
+    pass
+
+def table_bytes(n):
+    """
+    Returns the estimated size of the tt of a BF of n variables.
+    """
+    return 2 ** n * ROW_BYTES
+
+def packed_bytes(n):
+    """
+    Returns the estimated size of the packed tt of a BF of n variables.
+    """
+    return 2 ** n // 8 + 32
+
+def terms_bytes(count):
+    """
+    Returns the estimated size of a list of count ints.
+    """
+    return count * TERM_BYTES
+
+def format_bytes(size):
+    """
+    Returns the size (bytes) in the biggest unit it has at least 1 of.
+
+    >>> format_bytes(3 * 2 ** 29), format_bytes(100), format_bytes(None)
+    ('1.5 GB', '100 B', 'no limit')
+    """
+    if size is None: return "no limit"
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB": break
+        size /= 1024
+    return "%.3g %s" %(size, unit)
+
+def parse_bytes(text):
+    """
+    Returns the # of bytes in text: a # with an optional unit (K, M or G, a
+    trailing B is allowed). Raises ValueError if it isn't one.
+
+    >>> parse_bytes("512M"), parse_bytes("2gb"), parse_bytes("1000")
+    (536870912, 2147483648, 1000)
+    """
+    text = text.strip().upper()
+    if text.endswith("B"): text = text[:-1]
+    scale = 1
+    if text and text[-1] in "KMG":
+        scale = 2 ** (10 * ("KMG".index(text[-1]) + 1))
+        text = text[:-1]
+    rv = int(float(text) * scale)
+    if rv < 0: raise ValueError("A size can't be negative")
+    return rv
+
+class MemoryBudget:
+    """
+    The memory budget of the session. Keeps what every owner (an object
+    holding a result, e.g. the cache of a BF) takes, until the owner is
+    garbage collected.
+
+    >>> budget = MemoryBudget(operation = 1000, session = 1500)
+    >>> class Owner: pass
+    >>> a = Owner()
+    >>> budget.check(800, "A table")
+    >>> budget.hold(a, 800)
+    >>> budget.used(), budget.available()
+    (800, 700)
+    >>> budget.check(800, "Another table")
+    Traceback (most recent call last):
+    ...
+    memory.MemoryBudgetError: Another table: about 800 B needed, 700 B of the \
+memory budget left
+    >>> del a
+    >>> budget.used(), budget.fits(800)
+    (0, True)
+    """
+
+    def __init__(self, operation = OPERATION_BYTES, session = SESSION_BYTES):
+        self.operation = operation
+        self.session = session
+        # The bytes held by every owner
+        self._held = weakref.WeakKeyDictionary()
+
+    def used(self):
+        """
+        Returns the bytes held by the live owners.
+        """
+        return sum(self._held.values())
+
+    def available(self):
+        """
+        Returns the most the next operation may allocate (None for no limit).
+        """
+        limits = [i for i in [self.operation, None if self.session is None \
+                  else max(self.session - self.used(), 0)] if i is not None]
+        return min(limits) if limits else None
+
+    def fits(self, size):
+        """
+        Returns True if an operation allocating size bytes is in the budget.
+        """
+        available = self.available()
+        return available is None or size <= available
+
+    def check(self, size, what):
+        """
+        Raises MemoryBudgetError if what (a description of the thing to make,
+        for the message) taking size bytes isn't in the budget.
+        """
+        if not self.fits(size):
+            raise MemoryBudgetError("%s: about %s needed, %s of the " \
+                                    "memory budget left" %(what, \
+                                    format_bytes(size), \
+                                    format_bytes(self.available())))
+
+    def hold(self, owner, size):
+        """
+        Counts size bytes as held by the owner, until it's garbage collected
+        (or hold is called for it again).
+        """
+        self._held[owner] = size
+
+    def worker_bytes(self, workers):
+        """
+        Returns how much each of workers processes may allocate (None for no
+        limit): the budget of an operation, and a share of what's left of the
+        session.
+        """
+        available = self.available()
+        if available is None or self.session is None: return available
+        return min(available, max(self.session - self.used(), 0) // workers)
+
+def limit_process(size):
+    """
+    Limits the address space of the current process to what it takes now
+    plus size bytes (and PROCESS_BYTES), so that allocating more raises a
+    MemoryError. Run first in the worker processes; does nothing if size is
+    None, or the system has no such limit.
+    """
+    if size is None or resource is None: return
+    try:
+        # The pages mapped now (Linux); a forked worker starts with all of
+        # its parent's
+        with open("/proc/self/statm") as stream:
+            current = int(stream.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        current = 0
+    limit = current + size + PROCESS_BYTES
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        # Over the hard limit set already: keeping that one
+        pass
@@ -0,0 +1,267 @@
+"""
+The npn module. Works on packed truth tables: a function of n variables is an
+integer whose mth bit is its value at the minterm m. Bit p of a minterm is the
+variable at position p (position 0 is the last variable of the BF).
+
+Two functions are NPN equivalent if one can be made from the other by
+Negating some inputs, Permuting the inputs, and Negating the output. The
+canonical form of a function is a packed table picked from its NPN class in
+a way that doesn't depend on which member of the class we start from, so 2
+functions are NPN equivalent iff their canonical forms are the same.
+
+A transform is a tuple (perm, neg, out), applied in this order:
+1. neg : a bitset; the inputs at the positions set in it are negated.
+2. perm: a list; the input at position perm[j] is moved to position j.
+3. out : True if the output is negated.
+
+Instead of trying all the n! * 2^(n + 1) transforms, the search is pruned:
+- The output is negated iff that makes fewer ones (both if it's a tie).
+- Every input is negated iff that makes fewer ones where it is 1 (both if
+  it's a tie).
+- The inputs are sorted by the # of ones where they are 1; only the inputs
+  with the same count are permuted among themselves.
+- Symmetric inputs (swapping them doesn't change the function) are never
+  permuted among themselves, as that gives the same table.
+Every pruning rule gives the same candidates for all the functions in a
+class, so the smallest candidate is canonical (it's the smallest table in the
+class reachable through the sort above, not always the smallest overall).
+"""
+
+# Cache of the masks of the minterms with the bit p 0, by (p, n)
+_masks = {}
+
+def mask(p, n):
+    """
+    Returns the packed table of the minterms (of n variables) whose bit p is
+    0.
+
+    >>> bin(mask(1, 3))
+    '0b110011'
+    """
+    if (p, n) not in _masks:
+        width = 2 ** p
+        block = (1 << width) - 1 # 2^p ones, then (above them) 2^p zeros
+        period = (1 << (2 * width)) - 1
+        _masks[(p, n)] = block * (((1 << 2 ** n) - 1) // period)
+    return _masks[(p, n)]
+
+def ones(table):
+    """
+    Returns the # of ones in a packed table.
+    """
+    return bin(table).count("1")
+
+def negate(table, p, n):
+    """
+    Negates the input at position p.
+
+    >>> bin(negate(0b0010, 0, 2))
+    '0b1'
+    """
+    m = mask(p, n)
+    shift = 2 ** p
+    return ((table & m) << shift) | ((table >> shift) & m)
+
+def swap(table, p, q, n):
+    """
+    Swaps the inputs at the positions p and q.
+
+    >>> bin(swap(0b0010, 0, 1, 2))
+    '0b100'
+    """
+    if p == q: return table
+    if p > q: p, q = q, p
+    # The minterms with bit p 1 and bit q 0 trade places with the ones with
+    # bit p 0 and bit q 1
+    m = ~mask(p, n) & mask(q, n) & ((1 << 2 ** n) - 1)
+    shift = 2 ** q - 2 ** p
+    moved = m | (m << shift)
+    return (table & ~moved) | ((table & m) << shift) | ((table >> shift) & m)
+
+def permute(table, perm, n):
+    """
+    Moves the input at position perm[j] to position j, for every j.
+
+    >>> bin(permute(0b0010, [1, 0], 2))
+    '0b100'
+    """
+    where = list(range(n)) # where[j] = the original position now at j
+    for j in range(n):
+        k = where.index(perm[j])
+        if k != j:
+            table = swap(table, j, k, n)
+            where[j], where[k] = where[k], where[j]
+    return table
+
+def transform(table, n, npn):
+    """
+    Applies the transform (perm, neg, out) to the table (see the module
+    docstring).
+    """
+    perm, neg, out = npn
+    for p in range(n):
+        if neg >> p & 1: table = negate(table, p, n)
+    table = permute(table, perm, n)
+    if out: table ^= (1 << 2 ** n) - 1
+    return table
+
+def _orders(groups, table, n):
+    """
+    Yields every order of the positions: the groups in their order, and the
+    positions in every group in all orders, except that symmetric positions
+    keep their original order.
+    """
+    # Every group is split into classes of symmetric positions
+    labelled = []
+    for group in groups:
+        classes = []
+        for p in group:
+            for c in classes:
+                if swap(table, c[0], p, n) == table:
+                    c.append(p)
+                    break
+            else:
+                classes.append([p])
+        labelled.append(classes)
+
+    def orders(k):
+        if k == len(labelled):
+            yield []
+            return
+        for head in _multiset_orders(labelled[k]):
+            for tail in orders(k + 1):
+                yield head + tail
+
+    return orders(0)
+
+def _multiset_orders(classes):
+    """
+    Yields the orders of the positions in classes, where the positions of a
+    class are interchangeable (so they always appear in their given order).
+    """
+    left = [len(c) for c in classes]
+    total = sum(left)
+    order = []
+
+    def step():
+        if len(order) == total:
+            used = [0] * len(classes)
+            rv = []
+            for i in order:
+                rv.append(classes[i][used[i]])
+                used[i] += 1
+            yield rv
+            return
+        for i in range(len(classes)):
+            if left[i]:
+                left[i] -= 1
+                order.append(i)
+                yield from step()
+                order.pop()
+                left[i] += 1
+
+    return step()
+
+def canonical(table, n, limit = None):
+    """
+    Finds the canonical form of the function with the packed table over n
+    variables. Returns (canonical table, transform), where the transform
+    makes the canonical table from the table. Returns None if more than limit
+    candidates would have to be tried.
+
+    The 3 functions of 2 variables with a single one are in one class:
+    >>> [canonical(t, 2)[0] for t in [0b0001, 0b0010, 0b1000, 0b0111]]
+    [1, 1, 1, 1]
+    >>> table, npn = canonical(0b0100, 2)
+    >>> transform(0b0100, 2, npn) == table
+    True
+    """
+    full = (1 << 2 ** n) - 1
+    count = ones(table)
+    half = 2 ** (n - 1)
+    outs = [False] if count < half else [True] if count > half else \
+           [False, True]
+
+    best = None
+    tried = 0
+    for out in outs:
+        t = table ^ full if out else table
+
+        # The phases worth trying for every input
+        phases = [[]]
+        for p in range(n):
+            high = ones(t & ~mask(p, n))
+            low = count if not out else 2 ** n - count
+            low -= high
+            if high < low: options = [0]
+            elif high > low: options = [1]
+            else: options = [0, 1]
+            phases = [i + [j] for i in phases for j in options]
+
+        for phase in phases:
+            neg = sum(phase[p] << p for p in range(n))
+            u = t
+            for p in range(n):
+                if phase[p]: u = negate(u, p, n)
+
+            # Grouping the inputs by their # of ones
+            keys = {}
+            for p in range(n):
+                keys.setdefault(ones(u & ~mask(p, n)), []).append(p)
+            groups = [keys[k] for k in sorted(keys)]
+
+            for perm in _orders(groups, u, n):
+                tried += 1
+                if limit is not None and tried > limit: return None
+                candidate = permute(u, perm, n)
+                if best is None or candidate < best:
+                    best = candidate
+                    best_npn = (perm, neg, out)
+
+    return best, best_npn
+
+def transform_cube(cube, n, npn):
+    """
+    Applies the input part (perm, neg) of a transform to a cube (see
+    cubes.py; the field at bits 2p is the input at position p).
+
+    >>> transform_cube(0b0110, 2, ([1, 0], 0b01, False))
+    5
+    """
+    perm, neg, out = npn
+    for p in range(n):
+        if neg >> p & 1:
+            field = (cube >> (2 * p)) & 3
+            # 01 <-> 10, 11 stays
+            field = ((field & 1) << 1) | (field >> 1)
+            cube = (cube & ~(3 << (2 * p))) | (field << (2 * p))
+    rv = 0
+    for j in range(n):
+        rv |= ((cube >> (2 * perm[j])) & 3) << (2 * j)
+    return rv
+
+def inverse(npn, n):
+    """
+    Returns the input part of the inverse transform, as (perm, neg, out): it
+    undoes the permutation, then the negation.
+    """
+    perm, neg, out = npn
+    back = [0] * n
+    for j in range(n):
+        back[perm[j]] = j
+    # After undoing the permutation, the negated inputs are at their original
+    # positions again. But the negation comes after the permutation now, so
+    # it's applied by untransform_cube instead
+    return back, neg, out
+
+def untransform_cube(cube, n, npn):
+    """
+    Undoes transform_cube.
+
+    >>> untransform_cube(transform_cube(0b0110, 2, ([1, 0], 1, False)), 2, \
+                         ([1, 0], 1, False))
+    6
+    """
+    back, neg, out = inverse(npn, n)
+    cube = transform_cube(cube, n, (back, 0, out))
+    return transform_cube(cube, n, (list(range(n)), neg, out))
@@ -0,0 +1,232 @@
+"""
+The pla module. Reads and writes BFs in the Berkeley PLA format, used by
+ESPRESSO and most other logic synthesis tools:
+
+.i 3            # of inputs
+.o 2            # of outputs
+.ilb a b c      input names (optional)
+.ob f g         output names (optional)
+.type fd        which sets the output plane gives (optional, fd by default)
+.p 2            # of cubes (optional)
+1-0 10          a cube: the input plane, then the output plane
+-11 11
+.e
+
+In the output plane, 1 puts the cube in the on-set of the output, - (or 2) in
+its don't care set, and 0 in its off-set; ~ leaves it out. Which of these are
+used depends on the type: f (on-set only), fd (on-set and DCs), fr (on-set and
+off-set) or fdr (all 3). With an off-set, the rows in neither the on-set nor
+the off-set are don't cares.
+
+Both directions are streaming: the file is read and written one line at a
+time, and the cubes go straight to/from the cube covers of the BFs (see
+cubes.py). No expression string or truth table is made, so files with 100k+
+cubes are fine.
+"""
+
+from boolfunc import *
+
+class PLAError(Exception):
+    """
+    Handles the exceptions concerning malformed PLA files.
+    """
+    pass
+
+class PLA:
+    """
+    The contents of a PLA file. For every output there is an on-set, a don't
+    care set and an off-set cover, over the inputs in the sorted order (the
+    order of the BF variables).
+
+    >>> import io
+    >>> pla = read_pla(io.StringIO(".i 2\\n.o 1\\n.ilb b a\\n1- 1\\n01 -\\n.e\\n"))
+    >>> pla.inputs, pla.outputs
+    (['a', 'b'], ['f'])
+    >>> pla.on[0], pla.dc[0]
+    (Cover(['-1']), Cover(['10']))
+    >>> pla.bfs()
+    [f(a, b) = b + d(a*~b)]
+    """
+
+    def __init__(self, inputs, outputs, on, dc, off, kind = 'fd'):
+        self.inputs = inputs
+        self.outputs = outputs
+        self.on = on
+        self.dc = dc
+        self.off = off
+        self.kind = kind
+
+    def bfs(self):
+        """
+        Returns the list of BFs made from the on-sets and the don't care sets,
+        one per output. With an off-set (the types fr and fdr), the rows in
+        neither the on-set nor the off-set are don't cares too.
+
+        >>> import io
+        >>> text = ".i 2\\n.o 1\\n.ilb a b\\n.type fr\\n11 1\\n00 0\\n.e\\n"
+        >>> f = read_pla(io.StringIO(text)).bfs()[0]
+        >>> f.minterms(), f.dont_cares()
+        ([3], [1, 2])
+        """
+        rv = []
+        for i in range(len(self.outputs)):
+            dc = self.dc[i]
+            if 'r' in self.kind:
+                dc = dc.union(self.on[i].union(self.off[i]).complement())
+            rv.append(BF.from_cover(self.on[i], self.inputs, \
+                                    self.outputs[i], dc))
+        return rv
+
+def _lines(stream):
+    """
+    Yields the lines of the stream with the comments and the blank lines
+    removed.
+    """
+    for line in stream:
+        line = line.split("#")[0].strip()
+        if line: yield line
+
+def read_pla(stream):
+    """
+    Reads a PLA file from the stream (a file object or anything else yielding
+    lines) and returns a PLA. Inputs without an .ilb are named x0, x1...,
+    and outputs without an .ob f0, f1... (or f if there is just one).
+
+    Raises PLAError if the file is malformed.
+    """
+    header = {'.i' : None, '.o' : None, '.ilb' : None, '.ob' : None}
+    kind = 'fd'
+    sets = None # [on, dc, off], every one a list of cube lists per output
+
+    for line in _lines(stream):
+        if line.startswith("."):
+            words = line.split()
+            key = words[0]
+            if key in ['.i', '.o']: header[key] = int(words[1])
+            elif key in ['.ilb', '.ob']: header[key] = words[1:]
+            elif key == ".type":
+                kind = words[1]
+                if kind not in ['f', 'fd', 'fr', 'fdr']:
+                    raise PLAError("Unknown PLA type '%s'" %kind)
+            elif key in [".e", ".end"]: break
+            elif key in [".mv", ".kiss"]:
+                raise PLAError("%s files are not supported" %key)
+            # Others (e.g. .p, .phase) aren't needed
+            continue
+
+        if sets is None:
+            # First cube: the header is complete
+            inputs, outputs, order = _check_header(header)
+            n_in, n_out = len(inputs), len(outputs)
+            sets = [[[] for j in range(n_out)] for i in range(3)]
+            on, dc, off = sets
+
+        # The 2 planes may or may not be separated by spaces
+        row = "".join(line.split())
+        in_plane = row[:n_in]
+        if len(row) != n_in + n_out or not set(in_plane) <= set("01-2"):
+            raise PLAError("Bad cube '%s'" %line)
+        if order is not None:
+            in_plane = "".join(in_plane[i] for i in order)
+        cube = cube_from_string(in_plane)
+
+        for j in range(n_out):
+            c = row[n_in + j]
+            if c == "1": on[j].append(cube)
+            elif c in "-2":
+                if 'd' in kind: dc[j].append(cube)
+            elif c == "0":
+                if 'r' in kind: off[j].append(cube)
+            elif c != "~":
+                raise PLAError("Bad cube '%s'" %line)
+
+    if sets is None:
+        # No cubes at all
+        inputs, outputs, order = _check_header(header)
+        sets = [[[] for j in range(len(outputs))] for i in range(3)]
+
+    n = len(inputs)
+    on, dc, off = [[Cover(cubes, n) for cubes in i] for i in sets]
+    return PLA(sorted(inputs), outputs, on, dc, off, kind)
+
+def _check_header(header):
+    """
+    Helper for read_pla. Checks the header and fills in the default names.
+    Returns (inputs, outputs, order), where order[i] is the column of the ith
+    input in the sorted order (None if the inputs are already sorted).
+    """
+    n_in, n_out = header['.i'], header['.o']
+    if n_in is None or n_out is None:
+        raise PLAError("The .i and .o lines must come before the cubes")
+
+    inputs = header['.ilb']
+    if inputs is None: inputs = ["x%d" %i for i in range(n_in)]
+    outputs = header['.ob']
+    if outputs is None:
+        outputs = ["f"] if n_out == 1 else ["f%d" %i for i in range(n_out)]
+    if len(inputs) != n_in or len(outputs) != n_out or \
+       len(set(inputs)) != n_in:
+        raise PLAError("The .ilb/.ob names don't match .i/.o")
+
+    order = sorted(range(n_in), key = lambda x: inputs[x])
+    if order == list(range(n_in)): order = None
+    return inputs, outputs, order
+
+def load_pla(path):
+    """
+    Reads the PLA file at the path. See read_pla.
+    """
+    with open(path) as stream:
+        return read_pla(stream)
+
+def write_pla(stream, bfs):
+    """
+    Writes the BFs as the outputs of a PLA to the stream. The inputs are all
+    the variables of the BFs (sorted). Cubes shared by several outputs are
+    written once. The type is fd if any BF has don't cares, f otherwise.
+
+    >>> import io
+    >>> stream = io.StringIO()
+    >>> write_pla(stream, [BF("f = a*b + c"), BF("g = a*b")])
+    >>> print(stream.getvalue(), end = "")
+    .i 3
+    .o 2
+    .ilb a b c
+    .ob f g
+    .type f
+    .p 2
+    --1 10
+    11- 11
+    .e
+    """
+    inputs = sorted(set(var for bf in bfs for var in bf.variables()))
+    n = len(inputs)
+
+    # Maps every cube (over all the inputs) to the outputs having it, as a
+    # bitset. Dicts keep the insertion order, so the output is deterministic
+    rows = {}
+    dc_rows = {}
+    for j in range(len(bfs)):
+        for cube in bfs[j].cover_over(inputs):
+            rows[cube] = rows.get(cube, 0) | (1 << j)
+        for cube in bfs[j]._widen(bfs[j].dc_cover(), inputs):
+            dc_rows[cube] = dc_rows.get(cube, 0) | (1 << j)
+
+    stream.write(".i %d\n.o %d\n" %(n, len(bfs)))
+    stream.write(".ilb %s\n.ob %s\n" %(" ".join(inputs), \
+                                     " ".join(bf.name() for bf in bfs)))
+    stream.write(".type %s\n.p %d\n" %("fd" if dc_rows else "f", \
+                                       len(rows) + len(dc_rows)))
+    for plane, symbol in [(rows, "1"), (dc_rows, "-")]:
+        for cube in plane:
+            outputs = "".join(symbol if plane[cube] >> j & 1 else "0" \
+                              for j in range(len(bfs)))
+            stream.write("%s %s\n" %(cube_to_string(cube, n), outputs))
+    stream.write(".e\n")
+
+def save_pla(path, bfs):
+    """
+    Writes the BFs to the PLA file at the path. See write_pla.
+    """
+    with open(path, "w") as stream:
+        write_pla(stream, bfs)
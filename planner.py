@@ -0,0 +1,365 @@
+"""
+The planner module. Picks the engine (the representation and the algorithm)
+an operation on BFs is done with, from estimates of what each engine would
+cost, so that the callers don't have to choose by hand.
+
+A BF can be held as a truth table (tt, made by evaluating the expression row
+by row), a packed tt (an int, see npn.py) and a cube cover (see cubes.py),
+and most operations can be done on any of them:
+- eq       : cover (containment both ways), packed (compares 2 ints), table
+- minterms : cover (lists the minterms of the cubes), table
+- count    : cover (disjoint cubes, see Cover.count), packed, table
+- min_sop  : the methods of BF.min_sop (qm, parallel, external, espresso)
+- or, and, xor, not, nor, nand : expression (parses the combined
+             expression, as before), cover (cube algebra), packed (bitwise
+             on the packed tts)
+
+The estimates are made from the stats of the BFs (see BF._stats): the # of
+variables, the length of the expression, the size of the cover, what is
+cached already (the tt, the min_sop result, the primes) and the memory the
+operation may take (see memory.py). A representation a BF doesn't have yet
+costs what making it costs, and INFINITY if it doesn't fit in the memory. The costs are in rough
+microseconds of CPython; only their order matters. The cheapest engine is
+picked. ESPRESSO isn't exact, so its estimate includes EXACT_LIMIT: it's
+picked for min_sop only when every exact method would take longer.
+
+Every decision is logged (the last LOG_SIZE of them), with the estimates it
+was made from. An engine can be forced per call (the engine/method argument
+of the BF method), or for the whole session (Planner.override).
+"""
+
+from memory import *
+import collections
+
+# Rough costs of the basic steps the estimates are made of (microseconds)
+ROW_STEP = 1.0       # One row of a tt: filling, reading or comparing it
+PARSE_STEP = 0.6     # One character of an expression, evaluated for a row
+BIT_STEP = 0.02      # A bitwise operation on 64 rows of a packed tt
+PAIR_STEP = 0.5      # A pair of cubes: containment, intersection, sharp
+CONSENSUS_STEP = 8   # A pair of cubes in the iterated consensus
+QM_STEP = 30         # A unit of the 3^n/n bound of the string Q-M
+QM_INT_STEP = 0.5    # A unit of the 3^n/n bound of the integer Q-M
+SPILL_FACTOR = 3     # The integer Q-M keeping its levels in files
+CHART_STEP = 15      # A pair of minterms in the prime chart
+PROCESS_START = 2e5  # Starting a worker process
+
+# Biggest # of variables of the packed tts and the tts made by the engines
+PACKED_VARS = 24
+TABLE_VARS = 24
+
+# Roughly how much an implicant of the Q-M levels takes in RAM (bytes)
+IMPLICANT_BYTES = 100
+
+# The cost of a result that isn't exact: ESPRESSO is picked for min_sop only
+# when every exact method is estimated to take longer (10 minutes)
+EXACT_LIMIT = 6e8
+
+# The cost of what can't be done (e.g. Q-M levels bigger than the memory)
+INFINITY = float("inf")
+
+# The # of decisions kept in the log
+LOG_SIZE = 1000
+
+# The engines of every operation. The first one wins a tie
+ENGINES = {"eq" : ["cover", "packed", "table"],
+           "minterms" : ["table", "cover"],
+           "count" : ["table", "cover", "packed"],
+           "min_sop" : ["qm", "parallel", "external", "espresso"]}
+for op in ["or", "and", "xor", "not", "nor", "nand"]:
+    ENGINES[op] = ["expression", "cover", "packed"]
+
+class PlanError(Exception):
+    """
+    Handles the exceptions concerning unknown or unusable engines.
+    """
+    pass
+
+# The costs of making the representations of a BF from its stats
+
+def fits(stats, size):
+    """
+    Returns True if size bytes fit in the memory the operation may take.
+    """
+    return stats["memory"] is None or size <= stats["memory"]
+
+def table_cost(stats):
+    """
+    Returns the estimated cost of making the tt of the BF.
+    """
+    if stats["table"]: return 0
+    if not fits(stats, table_bytes(stats["n"])): return INFINITY
+    rows = 2 ** stats["n"]
+    if stats["cubes"] is not None:
+        # Filled from the minterms of the cover
+        return rows * ROW_STEP + stats["volume"] * ROW_STEP
+    return rows * (stats["chars"] * PARSE_STEP + ROW_STEP)
+
+def packed_cost(stats):
+    """
+    Returns the estimated cost of making the packed tt of the BF.
+    """
+    if not fits(stats, packed_bytes(stats["n"])): return INFINITY
+    if stats["table"]: return 2 ** stats["n"] * ROW_STEP
+    if stats["cubes"] is not None:
+        # Small cubes set their bits one by one, big ones are shifted in
+        # whole (see Cover.packed)
+        return min(stats["volume"] * ROW_STEP, \
+                   stats["cubes"] * 2 ** stats["n"] / 64 * BIT_STEP * 3)
+    return table_cost(stats) + 2 ** stats["n"] * ROW_STEP
+
+def cover_cost(stats):
+    """
+    Returns the estimated cost of making the cover of the BF (from its
+    minterms, if it hasn't one).
+    """
+    if stats["cubes"] is not None: return 0
+    return table_cost(stats) + 2 ** stats["n"] * stats["n"] * ROW_STEP
+
+def cube_count(stats):
+    """
+    Returns the # of cubes of the cover of the BF, estimated as the # of its
+    minterms if it hasn't one.
+    """
+    if stats["cubes"] is not None: return stats["cubes"]
+    return stats["ones"]
+
+# The costs of the operations, by engine. None for the engines that can't
+# be used
+
+def eq_costs(a, b):
+    """
+    Returns the costs of comparing 2 BFs (of the same # of variables).
+    """
+    n = a["n"]
+    ca, cb = cube_count(a), cube_count(b)
+    return {"cover" : cover_cost(a) + cover_cost(b) + \
+                      (ca + cb) * max(ca, cb) * PAIR_STEP,
+            "packed" : packed_cost(a) + packed_cost(b) + \
+                       2 ** n / 64 * BIT_STEP if n <= PACKED_VARS else None,
+            "table" : table_cost(a) + table_cost(b) + 2 ** n * ROW_STEP \
+                      if n <= TABLE_VARS else None}
+
+def minterms_costs(stats):
+    """
+    Returns the costs of listing the minterms of a BF. The cover engine needs
+    a cover.
+    """
+    n = stats["n"]
+    return {"table" : table_cost(stats) + 2 ** n * ROW_STEP \
+                      if n <= TABLE_VARS else None,
+            "cover" : (stats["volume"] + stats["dc_volume"]) * ROW_STEP \
+                      if stats["cubes"] is not None else None}
+
+def count_costs(stats):
+    """
+    Returns the costs of counting the minterms of a BF.
+    """
+    n = stats["n"]
+    c = cube_count(stats) + stats["dcs"]
+    return {"table" : table_cost(stats) + 2 ** n * ROW_STEP \
+                      if n <= TABLE_VARS else None,
+            "cover" : cover_cost(stats) + c * c * PAIR_STEP,
+            "packed" : packed_cost(stats) + 2 ** n / 64 * BIT_STEP \
+                       if n <= PACKED_VARS else None}
+
+def min_sop_costs(stats, workers):
+    """
+    Returns the costs of minimising a BF with every method of BF.min_sop, on
+    workers processes. Finding the primes is estimated from the 3^n/n bound
+    on their # (or from the cubes, for the iterated consensus on a cover),
+    solving the chart from the # of minterms.
+
+    >>> stats = {"n" : 2, "cubes" : None, "volume" : None, "dcs" : 0,
+    ...          "dc_volume" : 0, "ones" : 2, "chars" : 5, "table" : False,
+    ...          "min_sop" : False, "primes" : False, "memory" : None}
+    >>> costs = min_sop_costs(stats, 1)
+    >>> costs["parallel"] == costs["qm"], Planner().choose("min_sop", costs)
+    (True, 'qm')
+    """
+    n = stats["n"]
+    bound = 3 ** n / n
+    chart = stats["ones"] ** 2 * CHART_STEP
+    if stats["min_sop"]:
+        # Cached: every exact method just returns it
+        qm = parallel = external = chart = 0
+    elif stats["primes"]:
+        # Only the chart is left, whatever the method
+        qm = parallel = external = 0
+    else:
+        if stats["cubes"] is not None and not stats["table"]:
+            # Iterated consensus on the cover
+            qm = cube_count(stats) ** 2 * CONSENSUS_STEP
+        else:
+            qm = table_cost(stats) + bound * QM_STEP
+        parallel = packed_cost(stats) + bound * QM_INT_STEP / workers
+        if workers > 1: parallel += workers * PROCESS_START
+        else:
+            # One process: it's the Q-M, done in this process
+            parallel = qm
+        if not fits(stats, bound * IMPLICANT_BYTES):
+            # The levels don't fit in memory
+            parallel = INFINITY
+            if stats["table"] or stats["cubes"] is None: qm = INFINITY
+        external = packed_cost(stats) + bound * QM_INT_STEP * SPILL_FACTOR
+        if parallel < INFINITY:
+            # The levels fit in memory: keeping them there isn't slower
+            external = max(external, qm, parallel)
+        if not fits(stats, terms_bytes(stats["ones"])):
+            # Even the minterms (and so the chart) don't fit
+            qm = parallel = external = INFINITY
+
+    costs = {"qm" : qm + chart, "parallel" : parallel + chart, \
+             "external" : external + chart}
+
+    # Not being exact costs EXACT_LIMIT
+    costs["espresso"] = cover_cost(stats) + cube_count(stats) ** 2 * n * \
+                        PAIR_STEP + EXACT_LIMIT
+    return costs
+
+def op_costs(op, a, b, n):
+    """
+    Returns the costs of the operator op ("or", "and", "xor", "not", "nor" or
+    "nand") on the BFs with the stats a and b (None for "not"). n is the #
+    of variables of the result.
+    """
+    operands = [a] if b is None else [a, b]
+    c = sum(cube_count(i) for i in operands)
+
+    # The cube algebra: the union is a containment check of every pair, the
+    # intersection makes a cube of every pair, the complement is about as
+    # costly as both
+    if op == "or": algebra = c * c
+    elif op == "and": algebra = cube_count(a) * cube_count(b) * 2
+    else: algebra = c * c * n
+    if op == "xor": algebra *= 2
+    algebra *= PAIR_STEP
+
+    # Making the covers over n variables
+    widen = sum(cover_cost(i) + cube_count(i) * ROW_STEP for i in operands)
+    cover = widen + algebra
+
+    # The expression: parsed into a cover if it has no XOR and every operand
+    # has a cover, else evaluated for every row of the result
+    chars = sum(i["chars"] for i in operands)
+    if op == "xor" or any(i["cubes"] is None for i in operands):
+        expression = 2 ** n * (chars * PARSE_STEP + ROW_STEP)
+        if not fits(a, table_bytes(n)): expression = INFINITY
+    else:
+        expression = chars * n * ROW_STEP + cover
+
+    # The packed tts over n variables, then the result made from its
+    # minterms (up to all the rows, listed and made into cubes)
+    if n <= PACKED_VARS:
+        packed = sum(packed_cost(i) * 2 ** (n - i["n"]) for i in operands) + \
+                 2 ** n / 64 * BIT_STEP + 2 ** n * n * ROW_STEP
+        if not fits(a, 2 * terms_bytes(2 ** n)): packed = INFINITY
+    else: packed = None
+    return {"expression" : expression, "cover" : cover, "packed" : packed}
+
+class Decision:
+    """
+    A decision of the planner: the operation, the names of the BFs it was
+    on, the engine picked, the estimated costs of the engines it was picked
+    from, and why (auto: the cheapest, call: given with the call, session:
+    overridden for the session).
+    """
+
+    def __init__(self, op, names, engine, costs, reason):
+        self.op = op
+        self.names = names
+        self.engine = engine
+        self.costs = costs
+        self.reason = reason
+
+    def __repr__(self):
+        estimates = ", ".join("%s %s" %(i, "-" if self.costs[i] is None \
+                                        else "%.3g" %self.costs[i]) \
+                              for i in self.costs)
+        return "%s(%s): %s [%s] (%s)" %(self.op, ", ".join(self.names), \
+                                        self.engine, self.reason, estimates)
+
+class Planner:
+    """
+    Picks the engines of the operations, and logs its decisions. An engine
+    can be overridden for the whole session.
+
+    >>> planner = Planner()
+    >>> planner.choose("eq", {"cover" : 5, "packed" : 2, "table" : None}, \
+                       names = ("f", "g"))
+    'packed'
+    >>> planner.override("eq", "cover")
+    >>> planner.choose("eq", {"cover" : 5, "packed" : 2, "table" : None})
+    'cover'
+    >>> planner.decisions()
+    [eq(f, g): packed [auto] (cover 5, packed 2, table -), eq(): cover \
+[session] (cover 5, packed 2, table -)]
+    >>> planner.choose("eq", {"cover" : 5, "packed" : 2, "table" : None}, \
+                       "table")
+    Traceback (most recent call last):
+    ...
+    planner.PlanError: The table engine can't do eq here
+    """
+
+    def __init__(self, log_size = LOG_SIZE):
+        self._overrides = {}
+        self._log = collections.deque(maxlen = log_size)
+
+    def choose(self, op, costs, engine = None, names = ()):
+        """
+        Returns the engine to do op with, given the estimated costs of its
+        engines (None for those that can't be used): the engine given, else
+        the one overridden for the session, else the cheapest. Logs the
+        decision.
+        """
+        reason = "call"
+        if engine is None:
+            engine = self._overrides.get(op)
+            reason = "session"
+            if engine is not None and costs.get(engine) is None:
+                # Can't be used for this one: planned as usual
+                engine = None
+        if engine is None:
+            reason = "auto"
+            usable = [i for i in ENGINES[op] if costs.get(i) is not None]
+            engine = min(usable, key = lambda x: costs[x])
+        elif engine not in ENGINES[op]:
+            raise PlanError("Unknown engine '%s' for %s" %(engine, op))
+        elif costs.get(engine) is None:
+            raise PlanError("The %s engine can't do %s here" %(engine, op))
+
+        self._log.append(Decision(op, tuple(names), engine, costs, reason))
+        return engine
+
+    def override(self, op, engine = None):
+        """
+        Makes op use the engine for the rest of the session (where it can be
+        used), or be planned again if engine is None.
+        """
+        if op not in ENGINES:
+            raise PlanError("Unknown operation '%s'" %op)
+        if engine is None:
+            self._overrides.pop(op, None)
+        elif engine not in ENGINES[op]:
+            raise PlanError("Unknown engine '%s' for %s" %(engine, op))
+        else:
+            self._overrides[op] = engine
+
+    def overrides(self):
+        """
+        Returns a copy of the session overrides, by operation.
+        """
+        return dict(self._overrides)
+
+    def decisions(self, count = None):
+        """
+        Returns the last count decisions (all the logged ones by default),
+        oldest first.
+        """
+        rv = list(self._log)
+        return rv if count is None else rv[-count:]
+
+    def clear(self):
+        """
+        Empties the log.
+        """
+        self._log.clear()
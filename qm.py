@@ -0,0 +1,405 @@
+"""
+The qm module. An integer Quine-McCluskey engine finding all the prime
+implicants of a function, which can spread its work over several processes.
+
+An implicant is a pair (bits, mask) of ints: mask has the bits of the free
+(dashed) variables, bits the values of the others (0 under the mask). Bit p
+is the variable at position p, as in the minterms (the last variable of the
+BF is at position 0). The primes are returned as cubes (see cubes.py).
+
+Q-M merges the implicants level by level. Two implicants merge only if they
+have the same mask, so every level is a set of mask groups, and the groups
+are merged independently of each other (merge_groups). The parallel mode
+splits every level into shards of mask groups, one per process, and
+collects the merged implicants (removing the duplicates: the same implicant
+can come from 2 groups) and the primes.
+
+iter_primes does the same in a single process, yielding the primes as soon
+as they are found instead of returning them all at the end. It can also keep
+the levels on disk, for the functions whose levels don't fit in memory: the
+next level is written to temporary files in sorted runs of SPILL_LIMIT
+implicants, and read back merged (removing the duplicates), one mask group at
+a time. An implicant (bits, mask) is stored as the key mask << n | bits, so
+sorting the keys groups the implicants by mask.
+
+The other way to use several processes is the Shannon split: the function
+is split into 2^k cofactors on its first k variables, the primes of which
+are found at the same time. The primes of f = ~x*f0 + x*f1 are then made from
+the primes P0 and P1 of the cofactors: the biggest cubes among ~x*p0, x*p1
+and p0 & p1 (for all p0 in P0, p1 in P1).
+"""
+
+from cubes import *
+from covering import Budget
+from memory import limit_process
+import concurrent.futures, heapq, itertools, os, tempfile
+
+# The # of processes used by default
+WORKERS = os.cpu_count() or 1
+
+# Levels with fewer implicants than this are merged in the main process; the
+# processes would cost more than they save
+PARALLEL_MIN = 20000
+
+# The # of implicants of the next level iter_primes(spill = True) holds in
+# memory before writing them to a temporary file, and the # of such files
+# (runs) a level can have before they are merged into one
+SPILL_LIMIT = 1000000
+MAX_RUNS = 64
+
+def to_cube(bits, mask, n):
+    """
+    Returns the cube of the implicant (bits, mask).
+
+    >>> cube_to_string(to_cube(0b100, 0b001, 3), 3)
+    '10-'
+    """
+    cube = 0
+    for p in range(n):
+        if mask >> p & 1: field = 3
+        elif bits >> p & 1: field = 2
+        else: field = 1
+        cube |= field << (2 * p)
+    return cube
+
+def merge_groups(groups, n):
+    """
+    Merges the implicants of every mask group (over n variables). groups is a
+    list of (mask, list of bits). Returns (merged, primes): merged maps the
+    masks of the next level to the sets of their bits, and primes is the
+    list of the implicants (bits, mask) that didn't merge.
+
+    >>> merged, primes = merge_groups([(0, [0b00, 0b01, 0b11])], 2)
+    >>> merged, primes
+    ({1: {0}, 2: {1}}, [])
+    """
+    merged = {}
+    primes = []
+    for mask, group in groups:
+        present = set(group)
+        used = set()
+        for bits in group:
+            # The partner has one more 1, at a 0 outside the mask. Looking it
+            # up is cheaper than pairing the popcount groups
+            for p in range(n):
+                d = 1 << p
+                if not (bits | mask) & d and bits | d in present:
+                    merged.setdefault(mask | d, set()).add(bits)
+                    used.add(bits)
+                    used.add(bits | d)
+        primes += [(bits, mask) for bits in group if bits not in used]
+    return merged, primes
+
+def _shards(level, k):
+    """
+    Splits the mask groups of a level into k lists of about the same total
+    size. Returns the non-empty ones.
+    """
+    shards = [[] for i in range(k)]
+    sizes = [0] * k
+    for mask in sorted(level, key = lambda x: -len(level[x])):
+        i = sizes.index(min(sizes))
+        shards[i].append((mask, list(level[mask])))
+        sizes[i] += len(level[mask])
+    return [i for i in shards if i]
+
+def qm_primes(minterms, dcs, n, workers = 1, pool = None, budget = None, \
+              checkpoint = None, memory = None):
+    """
+    Returns the list of the primes (cubes) of the function with the given
+    minterms and don't cares over n variables. With workers > 1, the big
+    levels are merged by that many processes (from pool, if given), each of
+    which may allocate memory bytes (see memory.limit_process).
+
+    Returns None (and sets budget.cut) if the budget (see covering.Budget)
+    runs out of time, or more than budget.max_implicants implicants are held
+    at once (the primes and the current level).
+
+    With a checkpoint (see checkpoint.py), the level being merged and the
+    primes found before it are saved as its "qm" part when a save is due, and
+    when the merging stops early. If the checkpoint holds a "qm" part, the
+    merging resumes from it. The primes are returned sorted, so that they
+    don't depend on where it resumed.
+
+    >>> sorted(cube_to_string(i, 3) for i in qm_primes([1, 3, 5, 6, 7], [], 3))
+    ['--1', '11-']
+    >>> qm_primes([1, 3, 5, 6, 7], [], 3, budget = Budget(max_implicants = 4))
+    """
+    level = {0 : set(minterms) | set(dcs)}
+    if not level[0]: return []
+    primes = []
+    if checkpoint is not None and "qm" in checkpoint.state:
+        saved = checkpoint.state["qm"]
+        level = {mask : set(group) for mask, group in saved["level"]}
+        primes = [tuple(i) for i in saved["primes"]]
+
+    # The level to merge and the primes found before it. Replaced as a
+    # whole, so that an interrupted level is saved as it was before
+    current = (level, primes)
+
+    def save():
+        level, primes = current
+        checkpoint.save(qm = {"level" : [[i, sorted(level[i])] for i in \
+                                         level], "primes" : primes})
+
+    own = None
+    if workers > 1 and pool is None:
+        own = pool = concurrent.futures.ProcessPoolExecutor(workers, \
+                         initializer = limit_process, initargs = (memory,))
+    try:
+        while current[0]:
+            level, primes = current
+            size = sum(len(i) for i in level.values())
+            if budget is not None and (budget.expired() or \
+                                       budget.too_many(size + len(primes))):
+                budget.cut = True
+                if checkpoint is not None: save()
+                return None
+            if checkpoint is not None and checkpoint.due(): save()
+            if workers > 1 and size >= PARALLEL_MIN:
+                shards = _shards(level, workers)
+                results = pool.map(merge_groups, shards, [n] * len(shards))
+            else:
+                results = [merge_groups([(i, list(level[i])) for i in level], \
+                                        n)]
+
+            following = {}
+            found = []
+            for merged, new in results:
+                found += new
+                for mask in merged:
+                    following.setdefault(mask, set()).update(merged[mask])
+            current = (following, primes + found)
+    except KeyboardInterrupt:
+        if checkpoint is not None: save()
+        raise
+    finally:
+        if own is not None: own.shutdown()
+    return sorted(to_cube(bits, mask, n) for bits, mask in current[1])
+
+def _count_on(bits, mask, dcs):
+    """
+    Returns the # of minterms of the implicant (bits, mask) that aren't in
+    the set of don't cares dcs.
+    """
+    size = 1 << bin(mask).count("1")
+    if not dcs: return size
+    if size <= len(dcs):
+        # Going through the minterms of the implicant (the subsets of mask)
+        inside = 0
+        sub = mask
+        while True:
+            if bits | sub in dcs: inside += 1
+            if sub == 0: break
+            sub = (sub - 1) & mask
+    else:
+        inside = sum(1 for i in dcs if i & ~mask == bits)
+    return size - inside
+
+class _Runs:
+    """
+    A level of implicants stored on disk as sorted runs of keys (see the
+    module docstring), width bytes each. Iterating gives all the keys in an
+    increasing order, without duplicates.
+    """
+
+    # Keys read from a file at once
+    BLOCK = 4096
+
+    def __init__(self, width, directory = None):
+        self.width = width
+        self.directory = directory
+        self.files = []
+
+    def add(self, keys):
+        """
+        Writes a sorted run of keys to a new temporary file.
+        """
+        stream = tempfile.TemporaryFile(dir = self.directory)
+        for i in range(0, len(keys), self.BLOCK):
+            stream.write(b"".join(k.to_bytes(self.width, "big") for k in \
+                                  keys[i:i + self.BLOCK]))
+        self.files.append(stream)
+        if len(self.files) > MAX_RUNS:
+            # Too many files open; merging them into one
+            stream = tempfile.TemporaryFile(dir = self.directory)
+            block = []
+            for key in self:
+                block.append(key.to_bytes(self.width, "big"))
+                if len(block) == self.BLOCK:
+                    stream.write(b"".join(block))
+                    block = []
+            stream.write(b"".join(block))
+            self.close()
+            self.files = [stream]
+
+    def _read(self, stream):
+        """
+        Yields the keys of a run.
+        """
+        stream.seek(0)
+        size = self.width * self.BLOCK
+        while True:
+            data = stream.read(size)
+            if not data: return
+            for i in range(0, len(data), self.width):
+                yield int.from_bytes(data[i:i + self.width], "big")
+
+    def __iter__(self):
+        last = None
+        for key in heapq.merge(*[self._read(i) for i in self.files]):
+            if key != last: yield key
+            last = key
+
+    def close(self):
+        """
+        Closes (and so deletes) the files.
+        """
+        for stream in self.files: stream.close()
+        self.files = []
+
+def _merge_levels(minterms, dcs, n):
+    """
+    Helper for iter_primes. Yields the primes (bits, mask), keeping the
+    levels in memory.
+    """
+    level = {0 : set(minterms) | dcs}
+    while level:
+        following = {}
+        for mask in sorted(level):
+            merged, found = merge_groups([(mask, sorted(level.pop(mask)))], n)
+            for i in merged:
+                following.setdefault(i, set()).update(merged[i])
+            yield from found
+        level = following
+
+def _merge_runs(minterms, dcs, n, limit, directory):
+    """
+    Helper for iter_primes. Yields the primes (bits, mask), keeping the
+    levels on disk. Only a mask group of the current level, and at most
+    limit implicants of the next, are in memory at a time.
+    """
+    width = (2 * n + 7) // 8 or 1
+    low = (1 << n) - 1
+    level = _Runs(width, directory)
+    level.add(sorted(set(minterms) | dcs))
+    try:
+        while level.files:
+            following = _Runs(width, directory)
+            held = set()
+            for mask, keys in itertools.groupby(level, lambda x: x >> n):
+                merged, found = merge_groups([(mask, [i & low for i in \
+                                                      keys])], n)
+                for i in merged:
+                    held.update((i << n) | bits for bits in merged[i])
+                if len(held) >= limit:
+                    following.add(sorted(held))
+                    held = set()
+                yield from found
+            if held: following.add(sorted(held))
+            level.close()
+            level = following
+    finally:
+        level.close()
+
+def iter_primes(minterms, dcs, n, spill = False, directory = None):
+    """
+    Yields the primes of the function as (cube, # of its minterms that aren't
+    don't cares), as soon as they are proven prime: an implicant is prime iff
+    nothing in its mask group merges with it, so the primes of every group
+    are yielded as soon as the group is merged, before the rest of its level.
+    The primes with the most literals come first. Only the current and the
+    next level are kept; the primes aren't. The primes covering only don't
+    cares are skipped.
+
+    With spill = True, the levels are kept in temporary files (in directory,
+    or the default one) instead, see the module docstring.
+
+    >>> [(cube_to_string(c, 3), k) for c, k in iter_primes([1, 3, 5, 6, 7], \
+                                                           [], 3)]
+    [('11-', 2), ('--1', 4)]
+    >>> [(cube_to_string(c, 2), k) for c, k in iter_primes([3], [0, 1], 2)]
+    [('-1', 1)]
+    >>> [(cube_to_string(c, 2), k) for c, k in iter_primes([3], [0, 1], 2, \
+                                                           spill = True)]
+    [('-1', 1)]
+    """
+    dcs = set(dcs)
+    if not minterms and not dcs: return
+    if spill:
+        found = _merge_runs(minterms, dcs, n, SPILL_LIMIT, directory)
+    else:
+        found = _merge_levels(minterms, dcs, n)
+    for bits, mask in found:
+        count = _count_on(bits, mask, dcs)
+        if count: yield to_cube(bits, mask, n), count
+
+def _cofactor_primes(args):
+    """
+    Helper for shannon_primes, run by the processes: the primes of a cofactor
+    (None if it ran out of the budget).
+    """
+    return qm_primes(*args)
+
+def _merge_cofactors(args):
+    """
+    Helper for shannon_primes, run by the processes. Given the primes of the
+    cofactors f0 and f1 on the variable at position p, returns the primes of
+    f = ~x*f0 + x*f1 over n variables.
+    """
+    p0, p1, p, n = args
+    rv = [i & ~(2 << (2 * p)) for i in p0] + [i & ~(1 << (2 * p)) for i in p1]
+    for a in p0:
+        for b in p1:
+            c = a & b
+            if not is_empty(c, n): rv.append(c)
+    return single_cube_containment(rv)
+
+def shannon_primes(minterms, dcs, n, split, workers = 1, budget = None, \
+                   memory = None):
+    """
+    Returns the list of the primes (cubes) of the function, splitting it into
+    2^split cofactors on its first split variables (the ones at the highest
+    positions). The cofactors, and then their merges, are done by workers
+    processes, each of which may allocate memory bytes. The budget applies to every cofactor and is checked before
+    every merge; None is returned if it runs out (see qm_primes).
+
+    >>> sorted(cube_to_string(i, 3) for i in \
+               shannon_primes([1, 3, 5, 6, 7], [], 3, 2))
+    ['--1', '11-']
+    """
+    split = min(split, n)
+    low = n - split
+    parts = [([], []) for i in range(2 ** split)]
+    for i in minterms: parts[i >> low][0].append(i & ((1 << low) - 1))
+    for i in dcs: parts[i >> low][1].append(i & ((1 << low) - 1))
+
+    pool = None
+    if workers > 1:
+        pool = concurrent.futures.ProcessPoolExecutor(workers, \
+                   initializer = limit_process, initargs = (memory,))
+    try:
+        run = pool.map if pool is not None else map
+        # The cofactors are over the low variables; the split variables are
+        # free (11) in their cubes until they are merged
+        free = sum(3 << (2 * p) for p in range(low, n))
+        found = list(run(_cofactor_primes, [(on, dc, low, 1, None, budget) \
+                                            for on, dc in parts]))
+        # The processes set cut on their copies of the budget only
+        if None in found:
+            budget.cut = True
+            return None
+        primes = [[cube | free for cube in i] for i in found]
+
+        # Merging pairs of cofactors on one more variable each time, the
+        # lowest split variable first
+        for p in range(low, n):
+            if budget is not None and budget.expired():
+                budget.cut = True
+                return None
+            pairs = [(primes[i], primes[i + 1], p, n) for i in \
+                     range(0, len(primes), 2)]
+            primes = list(run(_merge_cofactors, pairs))
+    finally:
+        if pool is not None: pool.shutdown()
+    return primes[0]
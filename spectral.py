@@ -0,0 +1,129 @@
+"""
+The spectral module. Finds the Walsh spectrum of a function from its packed
+tt (see npn.py), and what is read from it: the influence of every variable,
+the autocorrelation and the correlation immunity.
+
+The Walsh coefficient of the function f of n variables at w (an n-bit int,
+bit p being the variable at position p) is
+    W(w) = sum over all x of (-1)^(f(x) % w.x)
+where w.x is the parity of x & w. The coefficients are found all at once by
+the fast Walsh-Hadamard transform (WHT): n rounds of 2^(n-1) butterflies
+(a, b) -> (a + b, a - b) on the (-1)^f(x) column of the tt, which is
+O(n*2^n) instead of the O(4^n) of finding every coefficient by itself.
+NumPy does the rounds on whole arrays when it is installed; otherwise they
+are done on lists.
+
+From the spectrum:
+- the influence of the variable at position p (the fraction of the rows
+  where flipping it flips f) is the sum of W(w)^2 over the w having bit p,
+  divided by 4^n
+- the autocorrelation r(d) = sum over all x of (-1)^(f(x) % f(x ^ d)) is the
+  WHT of the W(w)^2, divided by 2^n
+- f is correlation immune of order m if W(w) = 0 for every w of 1 to m bits
+"""
+
+try:
+    import numpy
+except ImportError:
+    # The WHT is done on lists
+    numpy = None
+
+# Biggest # of variables the NumPy path is used for: the autocorrelation
+# sums go up to 8^n, which has to fit in its 64 bit ints
+NUMPY_VARS = 20
+
+def signs(table, n):
+    """
+    Returns the list of (-1)^f(x) for all the x, f being the function whose
+    packed tt over n variables is table.
+
+    >>> signs(0b0110, 2)
+    [1, -1, -1, 1]
+    """
+    bits = format(table, "0%db" %(1 << n))[::-1]
+    return [1 - 2 * (i == "1") for i in bits]
+
+def wht(values):
+    """
+    Returns the fast Walsh-Hadamard transform of the list of ints values
+    (of length a power of 2).
+
+    >>> wht([1, -1, -1, 1])
+    [0, 0, 0, 4]
+    """
+    size = len(values)
+    if numpy is not None and size <= 1 << NUMPY_VARS:
+        a = numpy.array(values, dtype = numpy.int64)
+        h = 1
+        while h < size:
+            # Every block of 2h: its first half gets a + b, the other a - b
+            a = a.reshape(-1, 2, h)
+            a = numpy.concatenate((a[:, 0] + a[:, 1], a[:, 0] - a[:, 1]), \
+                                  axis = 1).reshape(-1)
+            h *= 2
+        return [int(i) for i in a]
+
+    a = list(values)
+    h = 1
+    while h < size:
+        for i in range(0, size, 2 * h):
+            low, high = a[i : i + h], a[i + h : i + 2 * h]
+            a[i : i + h] = [x + y for x, y in zip(low, high)]
+            a[i + h : i + 2 * h] = [x - y for x, y in zip(low, high)]
+        h *= 2
+    return a
+
+def walsh_spectrum(table, n):
+    """
+    Returns the Walsh spectrum (the list of the W(w) for all the w) of the
+    function whose packed tt over n variables is table.
+
+    >>> walsh_spectrum(0b1000, 2) # a*b
+    [2, 2, 2, -2]
+    """
+    return wht(signs(table, n))
+
+def influences(spectrum, n):
+    """
+    Returns the influence of every variable, by position (the last variable
+    of a BF first), from the spectrum of the function.
+
+    >>> influences(walsh_spectrum(0b1000, 2), 2) # a*b
+    [0.5, 0.5]
+    >>> influences(walsh_spectrum(0b0110, 2), 2) # a % b
+    [1.0, 1.0]
+    """
+    squares = [i * i for i in spectrum]
+    rv = []
+    for p in range(n):
+        # The w having bit p are the upper halves of the blocks of 2^(p+1)
+        h = 1 << p
+        rv.append(sum(sum(squares[i + h : i + 2 * h]) for i in \
+                      range(0, len(squares), 2 * h)) / 4 ** n)
+    return rv
+
+def autocorrelation(spectrum, n):
+    """
+    Returns the autocorrelation (the list of the r(d) for all the d) of the
+    function with the given spectrum.
+
+    >>> autocorrelation(walsh_spectrum(0b1000, 2), 2) # a*b
+    [4, 0, 0, 0]
+    """
+    return [i >> n for i in wht([i * i for i in spectrum])]
+
+def correlation_immunity(spectrum, n):
+    """
+    Returns the biggest m such that the function with the given spectrum is
+    correlation immune of order m: W(w) = 0 for all the w of 1 to m bits.
+
+    >>> correlation_immunity(walsh_spectrum(0b10010110, 3), 3) # a % b % c
+    2
+    >>> correlation_immunity(walsh_spectrum(0b1000, 2), 2)
+    0
+    """
+    rv = n
+    for w, coefficient in enumerate(spectrum):
+        if w and coefficient:
+            rv = min(rv, bin(w).count("1") - 1)
+    return rv
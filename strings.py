@@ -637,6 +637,47 @@ def proper(function, name = "f"):
     return rv
 
 
+def split_dc(function):
+    """
+    Splits the don't care clause off a function string. The clause is a
+    "d(...)" at the very end of the function, optionally added with a "+".
+    It can hold a list of minterms or an expression. Returns the function
+    without the clause, and the inside of the clause (None if there is no
+    clause).
+
+    >>> split_dc("f(a,b,c) = a*b + d(0, 3)")
+    ('f(a,b,c) = a*b', '0, 3')
+    >>> split_dc("a*b d(~a*(b + c))")
+    ('a*b', '~a*(b + c)')
+    >>> split_dc("f(a,b) = a*(b)")
+    ('f(a,b) = a*(b)', None)
+    """
+    s = function.rstrip()
+    if not s.endswith(")"): return function, None
+
+    # Finding the matching bracket
+    depth = 0
+    start = None
+    for i in range(len(s) - 1, -1, -1):
+        if s[i] == ")": depth += 1
+        elif s[i] == "(":
+            depth -= 1
+            if depth == 0:
+                start = i
+                break
+    if start is None: return function, None
+
+    head = s[:start].rstrip()
+    if not head.endswith("d"): return function, None
+    head = head[:-1]
+    if head and (head[-1].isalnum() or head[-1] == "_"):
+        return function, None # Part of a longer name
+    head = head.rstrip()
+    if head.endswith("+"): head = head[:-1].rstrip()
+    if head == "" or head.endswith("="):
+        return function, None # Nothing left for the function itself
+    return head, s[start + 1:-1].strip()
+
 def find_name(function):
     """
     Given a function string in the proper format, traces out the name of the